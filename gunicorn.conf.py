@@ -0,0 +1,28 @@
+"""
+Config de gunicorn (se lee automáticamente desde la raíz del repo).
+
+Prepara el modo multiproceso de prometheus_client: cada worker escribe sus
+métricas en PROMETHEUS_MULTIPROC_DIR y /metrics las agrega. El directorio se
+limpia al arrancar el master y se marca como muerto cada worker que sale.
+"""
+import os
+import shutil
+import tempfile
+
+# antes de cualquier import de prometheus_client (el tipo de valor se fija al importar)
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "place-between-prometheus"),
+)
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,84 @@
+"""empty message
+
+Revision ID: 6b68030229d8
+Revises: 1d86b9f78d98
+Create Date: 2026-10-17 00:50:49.689910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b68030229d8'
+down_revision = '1d86b9f78d98'
+branch_labels = None
+depends_on = None
+
+# copia fija de api.models.WEEKDAYS: la migración no debe depender del código actual
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+ALL_DAYS_MASK = 0b1111111
+
+reminders = sa.table(
+    'reminders',
+    sa.column('id', sa.Integer),
+    sa.column('days_of_week', sa.String),
+    sa.column('days_mask', sa.Integer),
+)
+
+
+def _to_mask(days_of_week):
+    if not days_of_week or days_of_week.strip().lower() == "daily":
+        return ALL_DAYS_MASK
+    mask = 0
+    for d in days_of_week.split(","):
+        d = d.strip().lower()
+        if d in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(d)
+    return mask or ALL_DAYS_MASK
+
+
+def _to_days(mask):
+    if mask is None or mask == ALL_DAYS_MASK:
+        return "daily"
+    return ",".join(d for i, d in enumerate(WEEKDAYS) if mask & (1 << i)) or "daily"
+
+
+def _convert(src, dst, fn):
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(reminders.c.id, reminders.c[src])).all()
+    # un UPDATE por valor distinto (hay muy pocos: "daily" y algunas combinaciones)
+    by_value = {}
+    for rid, value in rows:
+        by_value.setdefault(fn(value), []).append(rid)
+    for value, ids in by_value.items():
+        for i in range(0, len(ids), 500):
+            bind.execute(
+                reminders.update()
+                .where(reminders.c.id.in_(ids[i:i + 500]))
+                .values({dst: value})
+            )
+
+
+def upgrade():
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('days_mask', sa.Integer(), nullable=False,
+                                      server_default=str(ALL_DAYS_MASK)))
+
+    _convert('days_of_week', 'days_mask', _to_mask)
+
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.alter_column('days_mask', server_default=None)
+        batch_op.drop_column('days_of_week')
+
+
+def downgrade():
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('days_of_week', sa.VARCHAR(length=40), nullable=False,
+                                      server_default='daily'))
+
+    _convert('days_mask', 'days_of_week', _to_days)
+
+    with op.batch_alter_table('reminders', schema=None) as batch_op:
+        batch_op.alter_column('days_of_week', server_default=None)
+        batch_op.drop_column('days_mask')
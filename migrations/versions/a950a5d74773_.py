@@ -0,0 +1,88 @@
+"""empty message
+
+Revision ID: a950a5d74773
+Revises: e3cf58acb1e5
+Create Date: 2026-10-17 01:12:31.476141
+
+"""
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a950a5d74773'
+down_revision = 'e3cf58acb1e5'
+branch_labels = None
+depends_on = None
+
+
+# Backfill de reminders.next_due_at (columna de 1d86b9f78d98, que quedó en NULL
+# para los reminders fijos ya existentes: nunca salían).
+# Copia fija de api.fixed_reminders.compute_next_due_at: la migración no debe
+# depender del código actual.
+ALL_DAYS_MASK = 0b1111111
+
+reminders = sa.table(
+    'reminders',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('mode', sa.String),
+    sa.column('local_time', sa.Time),
+    sa.column('days_mask', sa.Integer),
+    sa.column('is_active', sa.Boolean),
+    sa.column('next_due_at', sa.DateTime),
+)
+users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('timezone', sa.String),
+)
+
+
+def _zone(tz_name):
+    try:
+        return ZoneInfo(tz_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _next_due_at(local_time, tz_name, days_mask, after):
+    if local_time is None or not days_mask & ALL_DAYS_MASK:
+        return None
+    tz = _zone(tz_name)
+    local_after = after.replace(tzinfo=timezone.utc).astimezone(tz)
+    for offset in range(8):
+        day = local_after.date() + timedelta(days=offset)
+        if not days_mask & (1 << day.weekday()):
+            continue
+        candidate = datetime.combine(day, local_time).replace(tzinfo=tz, fold=0)
+        due = candidate.astimezone(timezone.utc).replace(tzinfo=None)
+        if due > after:
+            return due
+    return None
+
+
+def upgrade():
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    rows = bind.execute(
+        sa.select(reminders.c.id, reminders.c.local_time, reminders.c.days_mask,
+                  users.c.timezone)
+        .join(users, users.c.id == reminders.c.user_id)
+        .where(reminders.c.mode == 'fixed',
+               reminders.c.is_active.is_(True),
+               reminders.c.next_due_at.is_(None))
+    ).all()
+    for rid, local_time, days_mask, tz_name in rows:
+        due = _next_due_at(local_time, tz_name, days_mask, now)
+        if due is not None:
+            bind.execute(reminders.update().where(reminders.c.id == rid)
+                         .values(next_due_at=due))
+
+
+def downgrade():
+    # solo datos: next_due_at se recalcula en el próximo envío / --reschedule
+    pass
@@ -12,3 +12,4 @@ pip install pipenv
 pipenv install
 
 pipenv run upgrade
+pipenv run rebuild-daily-stats
@@ -0,0 +1,59 @@
+// node scripts/precompress.mjs [dir]   (corre solo con `npm run build`)
+// Genera hermanos .br y .gz de los assets de dist/ para que Flask
+// (api/static_files.py -> StaticSite._pick) los sirva sin comprimir en cada request.
+
+import { readdir, readFile, writeFile, stat } from "node:fs/promises";
+import { join, extname } from "node:path";
+import { brotliCompressSync, gzipSync, constants } from "node:zlib";
+
+const DIST = process.argv[2] || "dist";
+const MIN_SIZE = Number(process.env.COMPRESS_MIN_SIZE || 1024);
+const EXTENSIONS = new Set([
+  ".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".xml", ".map", ".ico", ".webmanifest",
+]);
+
+async function* walk(dir) {
+  for (const entry of await readdir(dir, { withFileTypes: true })) {
+    const path = join(dir, entry.name);
+    if (entry.isDirectory()) yield* walk(path);
+    else if (EXTENSIONS.has(extname(entry.name))) yield path;
+  }
+}
+
+async function run() {
+  let files = 0;
+  let before = 0;
+  let afterBr = 0;
+
+  for await (const path of walk(DIST)) {
+    const { size } = await stat(path);
+    if (size < MIN_SIZE) continue;
+
+    const data = await readFile(path);
+    // en el build sobra tiempo: calidad máxima
+    const br = brotliCompressSync(data, {
+      params: {
+        [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+        [constants.BROTLI_PARAM_SIZE_HINT]: size,
+      },
+    });
+    const gz = gzipSync(data, { level: constants.Z_BEST_COMPRESSION });
+
+    // solo si de verdad achica (un .ico ya comprimido puede crecer)
+    if (br.length < size) await writeFile(`${path}.br`, br);
+    if (gz.length < size) await writeFile(`${path}.gz`, gz);
+
+    files += 1;
+    before += size;
+    afterBr += Math.min(br.length, size);
+  }
+
+  console.log(
+    `precompress: ${files} archivos, ${(before / 1024).toFixed(1)} KB -> ${(afterBr / 1024).toFixed(1)} KB (br)`,
+  );
+}
+
+run().catch((e) => {
+  console.error("precompress ERROR:", e);
+  process.exit(1);
+});
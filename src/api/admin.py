@@ -5,8 +5,11 @@ from . import models
 from .models import db
 from flask_admin.contrib.sqla import ModelView
 from flask_admin.theme import Bootstrap4Theme
-from flask import request, redirect, url_for, flash
+from flask import request, redirect, url_for, flash, abort, send_file
+from wtforms import SelectMultipleField, validators
 import requests
+from .profiling import list_profiles, profile_path, profile_summary
+from .fixed_reminders import schedule_reminder
 
 
 class DevToolsView(BaseView):
@@ -35,6 +38,66 @@ class DevToolsView(BaseView):
         return redirect(url_for(".index"))
 
 
+class ProfilesView(BaseView):
+    @expose("/")
+    def index(self):
+        selected = request.args.get("name")
+        summary = profile_summary(selected) if selected else None
+        return self.render(
+            "admin/profiles.html",
+            profiles=list_profiles(),
+            selected=selected,
+            summary=summary,
+        )
+
+    @expose("/download/<filename>")
+    def download(self, filename):
+        path = profile_path(filename)
+        if path is None:
+            abort(404)
+        return send_file(path, as_attachment=True, download_name=filename)
+
+
+class ReminderAdmin(ModelView):
+    """days_mask se ve y se edita como días ("mon,wed"), no como entero."""
+    column_formatters = {
+        "days_mask": lambda view, context, model, name: model.days_of_week,
+    }
+    column_labels = {"days_mask": "Days of week"}
+    # next_due_at lo calcula schedule_reminder al guardar
+    form_excluded_columns = ("days_mask", "next_due_at")
+    form_extra_fields = {
+        "days": SelectMultipleField(
+            "Days of week",
+            choices=[(d, d) for d in models.WEEKDAYS],
+            validators=[validators.InputRequired("Elige al menos un día")],
+        ),
+    }
+
+    def create_form(self, obj=None):
+        form = super().create_form(obj)
+        if request.method == "GET":
+            form.days.data = list(models.WEEKDAYS)
+        return form
+
+    def edit_form(self, obj=None):
+        form = super().edit_form(obj)
+        if request.method == "GET" and obj is not None:
+            form.days.data = [d for i, d in enumerate(models.WEEKDAYS)
+                              if obj.days_mask & (1 << i)]
+        return form
+
+    def on_model_change(self, form, model, is_created):
+        model.days_of_week = ",".join(form.days.data)
+        # el select de Flask-Admin asigna el nombre ("fixed"), no el Enum
+        model.mode = models.ReminderMode(model.mode)
+        # misma regla que la API: cambia hora / días / activo -> nuevo next_due_at
+        schedule_reminder(model, model.user.timezone if model.user else None)
+
+
+MODEL_VIEWS = {models.Reminder: ReminderAdmin}
+
+
 def setup_admin(app):
     app.secret_key = os.environ.get('FLASK_APP_KEY', 'sample key')
     admin = Admin(app, name='4Geeks Admin',
@@ -44,6 +107,7 @@ def setup_admin(app):
     for name, obj in inspect.getmembers(models):
         # Verify that the object is a SQLAlchemy model before adding it to the admin.
         if inspect.isclass(obj) and issubclass(obj, db.Model):
-            admin.add_view(ModelView(obj, db.session))
+            admin.add_view(MODEL_VIEWS.get(obj, ModelView)(obj, db.session))
 
-    admin.add_view(DevToolsView(name="Dev Tools", endpoint="devtools"))
\ No newline at end of file
+    admin.add_view(DevToolsView(name="Dev Tools", endpoint="devtools"))
+    admin.add_view(ProfilesView(name="Profiles", endpoint="profiles"))
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Avatares: la subida se procesa una vez y se sirven miniaturas WebP fijas.
+
+POST /api/users/avatar:
+  1. el tipo se valida por contenido (Pillow abre la imagen: PNG/JPEG/WebP),
+     no por la extensión del nombre; también el tamaño en píxeles (bombas);
+  2. se aplica la orientación EXIF y se descartan los metadatos (EXIF con GPS,
+     ICC, comentarios): el WebP se guarda sin ellos;
+  3. recorte cuadrado centrado a cada tamaño de SIZES (64/128/256), WebP.
+Los archivos se guardan por hash del contenido subido:
+
+    uploads/avatars/<sha256[:32]>-128.webp
+
+La misma imagen subida dos veces (o por dos usuarios) no se procesa ni se
+guarda de nuevo, y como el nombre cambia si cambia el contenido, serve_avatar
+los sirve con Cache-Control immutable. User.avatar_url guarda la URL de
+DEFAULT_SIZE; avatar_urls() da las demás.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+SIZES = (64, 128, 256)
+DEFAULT_SIZE = 128
+WEBP_QUALITY = int(os.getenv("AVATAR_WEBP_QUALITY", "80"))
+ALLOWED_FORMATS = {"PNG", "JPEG", "WEBP"}
+# 40 MP: una foto de móvil pasa, una bomba de descompresión no
+MAX_PIXELS = 40_000_000
+
+AVATAR_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "uploads", "avatars")
+URL_PREFIX = "/api/uploads/avatars/"
+HASHED_NAME = re.compile(r"^(?P<digest>[0-9a-f]{32})-(?P<size>\d+)\.webp$")
+
+
+class AvatarError(ValueError):
+    """Imagen inválida: el mensaje va tal cual en la respuesta 400."""
+
+
+def _filename(digest: str, size: int) -> str:
+    return f"{digest}-{size}.webp"
+
+
+def avatar_url(digest: str, size: int = DEFAULT_SIZE) -> str:
+    return f"{URL_PREFIX}{_filename(digest, size)}"
+
+
+def avatar_urls(url: str | None) -> dict:
+    """{"64": url, "128": url, "256": url} de un avatar procesado; {} si no lo es."""
+    name = (url or "").rsplit("/", 1)[-1]
+    m = HASHED_NAME.match(name) if (url or "").startswith(URL_PREFIX) else None
+    if not m:
+        return {}
+    return {str(size): avatar_url(m["digest"], size) for size in SIZES}
+
+
+def is_content_addressed(filename: str) -> bool:
+    return HASHED_NAME.match(filename) is not None
+
+
+def _open(data: bytes) -> Image.Image:
+    try:
+        img = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise AvatarError("El archivo no es una imagen válida (png/jpg/jpeg/webp)")
+    if img.format not in ALLOWED_FORMATS:
+        raise AvatarError("Formato no permitido (png/jpg/jpeg/webp)")
+    # el header no es de fiar: se mide antes de decodificar
+    if img.width * img.height > MAX_PIXELS:
+        raise AvatarError("Imagen demasiado grande en píxeles")
+    if img.format == "JPEG":
+        # decodifica JPEG ya reducido (1/2, 1/4, 1/8) si sobra resolución
+        img.draft("RGB", (2 * max(SIZES), 2 * max(SIZES)))
+    try:
+        img.load()
+    except (OSError, Image.DecompressionBombError):
+        raise AvatarError("El archivo no es una imagen válida (png/jpg/jpeg/webp)")
+    return img
+
+
+def _normalize(img: Image.Image) -> Image.Image:
+    # orientación de la cámara antes de soltar el EXIF
+    img = ImageOps.exif_transpose(img)
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    return img.convert("RGBA" if has_alpha else "RGB")
+
+
+def _write_atomic(path: str, data: bytes):
+    # nadie lee un .webp a medio escribir (dos subidas iguales en paralelo)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def process_avatar(data: bytes, folder: str = AVATAR_DIR) -> str:
+    """Valida, genera las miniaturas (si no existen ya) y devuelve el digest."""
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    paths = {size: os.path.join(folder, _filename(digest, size)) for size in SIZES}
+    if all(os.path.isfile(p) for p in paths.values()):
+        return digest
+
+    img = _normalize(_open(data))
+    os.makedirs(folder, exist_ok=True)
+    # de mayor a menor: cada miniatura sale de la anterior (menos píxeles que remuestrear)
+    for size in sorted(SIZES, reverse=True):
+        img = ImageOps.fit(img, (size, size), method=Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, "WEBP", quality=WEBP_QUALITY, method=6)
+        _write_atomic(paths[size], out.getvalue())
+    return digest
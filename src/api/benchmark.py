@@ -0,0 +1,208 @@
+"""
+Suite de benchmark de endpoints (flask bench).
+
+Corre in-process con el test client contra la base de DATABASE_URL, usando los
+usuarios creados por `flask seed-benchmark`. Cada endpoint se mide N veces y se
+reporta p50/p95/mean/max + queries por request (del header Server-Timing) en
+un JSON con commit y dialecto, para comparar runs entre commits.
+"""
+import os
+import re
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select, update, delete
+
+from api.models import (
+    db, User, Activity, Reminder, ReminderType, DailySession, ActivityCompletion,
+    EmotionCheckin,
+)
+from api.cache import mirror_cache, bump_user_data_version
+from api.mirror import delete_user_daily_stats
+from api.user_time import user_today
+
+
+_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return os.getenv("GIT_COMMIT", "unknown")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _summarize(name, method, path, timings, queries, statuses):
+    return {
+        "name": name,
+        "method": method,
+        "path": path,
+        "n": len(timings),
+        "p50_ms": round(_percentile(timings, 0.50), 3),
+        "p95_ms": round(_percentile(timings, 0.95), 3),
+        "mean_ms": round(statistics.fmean(timings), 3) if timings else 0.0,
+        "max_ms": round(max(timings), 3) if timings else 0.0,
+        "queries": int(statistics.median(queries)) if queries else None,
+        "status_codes": sorted(set(statuses)),
+    }
+
+
+def _bench_users(prefix):
+    return select(User.id).where(User.email.like(f"{prefix}\\_%@bench.test", escape="\\"))
+
+
+def _reset_reminders(prefix):
+    # cada vuelta del sweep parte del mismo estado (sin anti-duplicado de 1h)
+    db.session.execute(
+        update(Reminder)
+        .where(Reminder.user_id.in_(_bench_users(prefix)),
+               Reminder.reminder_type == ReminderType.inactive_nudge)
+        .values(last_sent_at=None, inactive_after_minutes=1440, is_active=True)
+    )
+    db.session.commit()
+
+
+def _reset_today(user_ids, today):
+    # /activities/complete siempre inserta (no cae en already_completed entre runs)
+    sessions = select(DailySession.id).where(
+        DailySession.user_id.in_(user_ids), DailySession.session_date == today)
+    db.session.execute(delete(ActivityCompletion).where(
+        ActivityCompletion.daily_session_id.in_(sessions)))
+    db.session.execute(delete(EmotionCheckin).where(
+        EmotionCheckin.daily_session_id.in_(sessions)))
+    db.session.execute(delete(DailySession).where(
+        DailySession.user_id.in_(user_ids), DailySession.session_date == today))
+    for uid in user_ids:
+        delete_user_daily_stats(uid, today, today)
+        bump_user_data_version(uid)
+    db.session.commit()
+
+
+def run_benchmark(app, prefix="bench", iterations=20, warmup=2, sample_users=10,
+                  warm_cache=False):
+    with app.app_context():
+        users = db.session.execute(
+            _bench_users(prefix)
+            .order_by(User.id)
+            .limit(sample_users)
+        ).scalars().all()
+        if not users:
+            raise SystemExit(f"No hay usuarios '{prefix}_*'. Corre antes: flask seed-benchmark")
+
+        external_ids = db.session.execute(
+            select(Activity.external_id).where(Activity.is_active.is_(True))
+            .order_by(Activity.id)
+        ).scalars().all()
+        tokens = {uid: create_access_token(identity=str(uid)) for uid in users}
+        dialect = db.engine.dialect.name
+
+        # los usuarios bench comparten zona y horarios (defaults de seed-benchmark)
+        today = user_today(db.session.get(User, users[0]))
+        _reset_today(users, today)
+
+    def mirror_range(days):
+        start = (today - timedelta(days=days - 1)).isoformat()
+        return f"/api/mirror/range?start={start}&end={today.isoformat()}"
+
+    complete_bodies = iter([
+        {"external_id": ext, "session_type": st}
+        for ext in external_ids for st in ("day", "night")
+    ] * 1000)
+
+    # (name, method, path, body_fn, setup_fn)
+    cases = [
+        ("activities_complete", "POST", "/api/activities/complete",
+         lambda: next(complete_bodies), None),
+        ("mirror_today", "GET", "/api/mirror/today", None, None),
+        ("mirror_range_30d", "GET", mirror_range(30), None, None),
+        ("mirror_range_90d", "GET", mirror_range(90), None, None),
+        ("mirror_range_365d", "GET", mirror_range(365), None, None),
+        ("goals_list", "GET", "/api/goals", None, None),
+        ("reminder_sweep", "POST", "/api/tasks/send-reminders", None,
+         lambda: _reset_reminders(prefix)),
+    ]
+
+    internal_token = os.getenv("INTERNAL_TASK_TOKEN") or "bench-internal-token"
+    client = app.test_client()
+    results = []
+
+    # sin llamadas reales a Loops: se mide selección + bookkeeping del sweep
+    with mock.patch.dict(os.environ, {"INTERNAL_TASK_TOKEN": internal_token}), \
+            mock.patch("api.reminders.send_inactive_reminder", lambda **kw: None):
+        for name, method, path, body_fn, setup_fn in cases:
+            timings, queries, statuses = [], [], []
+            for i in range(warmup + iterations):
+                uid = users[i % len(users)]
+                headers = {"Authorization": f"Bearer {tokens[uid]}",
+                           "X-Internal-Token": internal_token}
+                if setup_fn:
+                    with app.app_context():
+                        setup_fn()
+                if not warm_cache:
+                    mirror_cache.backend.clear()
+
+                body = body_fn() if body_fn else None
+                # app context nuevo por request: `g` (stats SQL, memo de versiones) no se
+                # comparte con el contexto del comando CLI
+                with app.app_context():
+                    start = time.perf_counter()
+                    resp = client.open(path, method=method, json=body, headers=headers)
+                    elapsed = (time.perf_counter() - start) * 1000
+
+                if i < warmup:
+                    continue
+                timings.append(elapsed)
+                statuses.append(resp.status_code)
+                m = _QUERIES_RE.search(resp.headers.get("Server-Timing", ""))
+                if m:
+                    queries.append(int(m.group(1)))
+
+            results.append(_summarize(name, method, path, timings, queries, statuses))
+
+    return {
+        "commit": _git_commit(),
+        "dialect": dialect,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "params": {
+            "iterations": iterations,
+            "warmup": warmup,
+            "sample_users": len(users),
+            "warm_cache": warm_cache,
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, max_regression):
+    """Imprime deltas p50/p95 y devuelve los endpoints cuyo p95 empeoró más de max_regression."""
+    before = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"Compare vs {baseline.get('commit')} ({baseline.get('dialect')})")
+    for r in current["results"]:
+        old = before.get(r["name"])
+        if not old or not old["p95_ms"]:
+            continue
+        d50 = (r["p50_ms"] - old["p50_ms"]) / old["p50_ms"] if old["p50_ms"] else 0.0
+        d95 = (r["p95_ms"] - old["p95_ms"]) / old["p95_ms"]
+        flag = "REGRESSION" if d95 > max_regression else ""
+        print(f"{r['name']:<24} p50 {d50:+.1%}  p95 {d95:+.1%}  {flag}")
+        if flag:
+            regressions.append(r["name"])
+    return regressions
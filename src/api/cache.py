@@ -0,0 +1,296 @@
+"""
+Cache de respuestas calculadas (mirror) y ETags, versionados por usuario/catálogo.
+
+La clave siempre incluye users.data_version: cada escritura que cambia datos
+del usuario hace bump de la versión en la misma transacción, así que una
+entrada vieja nunca se vuelve a leer (solo expira por TTL / LRU).
+
+Backend:
+  - por defecto: LRU + TTL en memoria (por proceso/worker)
+  - CACHE_REDIS_URL: Redis compartido entre workers (requiere el paquete `redis`)
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import g, request, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select, update, insert, event
+from sqlalchemy.orm import Session
+
+from api.models import db, User, Activity, ActivityCategory, Emotion, CatalogVersion
+from api.user_time import user_today, resolve_local_day
+
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """LRU en memoria con expiración por entrada. Thread-safe."""
+
+    def __init__(self, maxsize: int = 1024, ttl: int = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return _MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Backend compartido: valores JSON con SETEX (el LRU lo resuelve Redis)."""
+
+    def __init__(self, url: str, prefix: str, ttl: int = 300):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key):
+        return self.prefix + ":" + ":".join(str(k) for k in key)
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            return _MISSING
+        return json.loads(raw)
+
+    def set(self, key, value):
+        self.client.setex(self._key(key), self.ttl, json.dumps(value))
+
+    def clear(self):
+        for k in self.client.scan_iter(self.prefix + ":*"):
+            self.client.delete(k)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(self.prefix + ":*"))
+
+
+class ResponseCache:
+    """get_or_set + contadores hit/miss sobre el backend elegido."""
+
+    def __init__(self, name: str, maxsize: int, ttl: int):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        self.backend = self._make_backend(name, maxsize, ttl)
+
+    @staticmethod
+    def _make_backend(name, maxsize, ttl):
+        url = os.getenv("CACHE_REDIS_URL")
+        if url:
+            try:
+                return RedisCache(url, prefix=f"pb:{name}", ttl=ttl)
+            except Exception as e:
+                print("Cache Redis no disponible, uso memoria local:", repr(e))
+        return LocalTTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get_or_set(self, key, compute):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Cache {self.name} get error:", repr(e))
+            value = _MISSING
+
+        if value is not _MISSING:
+            with self._counter_lock:
+                self.hits += 1
+            return value
+
+        with self._counter_lock:
+            self.misses += 1
+        value = compute()
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            print(f"Cache {self.name} set error:", repr(e))
+        return value
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "name": self.name,
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else None,
+            "size": len(self.backend),
+        }
+
+
+mirror_cache = ResponseCache(
+    "mirror",
+    maxsize=int(os.getenv("MIRROR_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("MIRROR_CACHE_TTL", "300")),
+)
+
+
+# -------------------------
+# VERSION DE DATOS POR USUARIO
+# -------------------------
+
+def _user_row(user_id: int):
+    # memo por request: ETag, cache de mirror y "hoy" del usuario salen de la misma fila
+    memo = g.setdefault("_user_rows", {})
+    if user_id not in memo:
+        memo[user_id] = db.session.execute(
+            select(User.data_version, User.timezone, User.day_start_time,
+                   User.night_start_time).where(User.id == user_id)
+        ).first()
+    return memo[user_id]
+
+
+def user_data_version(user_id: int) -> int:
+    row = _user_row(user_id)
+    return int(row.data_version or 0) if row else 0
+
+
+def user_today_by_id(user_id: int):
+    """Fecha local del usuario sin cargar la entidad User (comparte query con data_version)."""
+    row = _user_row(user_id)
+    return user_today(row) if row else resolve_local_day("UTC")[0]
+
+
+def user_timezone_by_id(user_id: int) -> str:
+    row = _user_row(user_id)
+    return (row.timezone if row else None) or "UTC"
+
+
+def bump_user_data_version(user_id: int):
+    """UPDATE atómico dentro de la transacción actual (sin commit)."""
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+    )
+    g.pop("_user_rows", None)
+
+
+# -------------------------
+# VERSION DE CATALOGOS
+# -------------------------
+
+_CATALOG_MODELS = {
+    Activity: "activities",
+    ActivityCategory: "activities",
+    Emotion: "emotions",
+}
+
+
+def catalog_version(name: str) -> int:
+    v = db.session.execute(
+        select(CatalogVersion.version).where(CatalogVersion.name == name)
+    ).scalar()
+    return int(v or 0)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_catalog_versions(session, flush_context):
+    """
+    Cualquier flush que toque Activity / ActivityCategory / Emotion (seeds,
+    Flask-Admin, etc.) incrementa la versión del catálogo en la misma transacción.
+    """
+    names = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        name = _CATALOG_MODELS.get(type(obj))
+        if name:
+            names.add(name)
+    if not names:
+        return
+
+    table = CatalogVersion.__table__
+    conn = session.connection()
+    now = datetime.utcnow()
+    for name in sorted(names):
+        res = conn.execute(
+            update(table)
+            .where(table.c.name == name)
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if res.rowcount == 0:
+            conn.execute(insert(table).values(
+                name=name, version=1, updated_at=now))
+
+
+# -------------------------
+# ETAG / If-None-Match
+# -------------------------
+
+def _strong_etag(*parts) -> str:
+    raw = ":".join(str(p) for p in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def user_etag(daily: bool = False):
+    """ETag por usuario: data_version + ruta/query (+ fecha local si depende de 'hoy')."""
+    def _etag():
+        user_id = int(get_jwt_identity())
+        parts = ["u", user_id, user_data_version(user_id), request.full_path]
+        if daily:
+            parts.append(user_today_by_id(user_id).isoformat())
+        return _strong_etag(*parts)
+    return _etag
+
+
+def catalog_etag(name: str):
+    def _etag():
+        return _strong_etag("c", name, catalog_version(name), request.full_path)
+    return _etag
+
+
+def conditional(etag_fn):
+    """
+    Calcula el ETag ANTES de ejecutar la vista (solo versiones, sin payload).
+    Si coincide con If-None-Match responde 304 sin cuerpo; si no, ejecuta la
+    vista y agrega el ETag a la respuesta 200.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = etag_fn()
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            # débil en el 200 y en el 304: el ETag sale de versiones, no de los
+            # bytes, y el body puede ir comprimido o no (api/compression.py)
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return wrapper
+    return decorator
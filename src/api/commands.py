@@ -1,6 +1,26 @@
 
+import json
+import time
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
 import click
-from api.models import db, User
+from flask import jsonify
+from sqlalchemy import select, exists, insert, update
+from werkzeug.security import generate_password_hash
+from api.models import (
+    db, User, DailySession, UserDailyStats, SessionType, Activity, ActivityCategory,
+    ActivityCompletion, Emotion, EmotionCheckin, Goal, GoalSize, GoalProgress,
+    Reminder, ReminderType, ReminderMode, ALL_DAYS_MASK
+)
+from api.mirror import rebuild_user_daily_stats, build_mirror_range_payload
+from api.mirror_reference import build_mirror_range_payload as reference_mirror_payload
+from api.benchmark import run_benchmark, compare_results
+from api.outbox import drain_outbox, requeue_dead
+from api.loops_stub import LoopsStubServer
+from api.reminders import parse_shard, run_reminder_shard, SWEEP_CHUNK_SIZE, SEND_CONCURRENCY
+from api.fixed_reminders import tick_fixed_reminders, run_fixed_reminders_loop, reschedule_all
+from api.idempotency import purge_expired_idempotency_keys
 
 """
 In this file, you can add as many commands as you want using the @app.cli.command decorator
@@ -31,4 +51,458 @@ def setup_commands(app):
 
     @app.cli.command("insert-test-data")
     def insert_test_data():
-        pass
\ No newline at end of file
+        pass
+
+    """
+    Recalcula el rollup user_daily_stats (mirror) desde las tablas base.
+    Por defecto solo usuarios con sesiones y sin filas de rollup (backfill tras migrar):
+    $ flask rebuild-daily-stats
+    $ flask rebuild-daily-stats --user-id 12
+    $ flask rebuild-daily-stats --all
+    """
+    @app.cli.command("rebuild-daily-stats")
+    @click.option("--user-id", type=int, default=None)
+    @click.option("--all", "rebuild_all", is_flag=True, default=False)
+    def rebuild_daily_stats(user_id, rebuild_all):
+        q = select(User.id).where(
+            exists().where(DailySession.user_id == User.id))
+        if user_id is not None:
+            q = q.where(User.id == user_id)
+        elif not rebuild_all:
+            q = q.where(~exists().where(UserDailyStats.user_id == User.id))
+
+        user_ids = db.session.execute(q.order_by(User.id)).scalars().all()
+        print(f"Rebuilding daily stats for {len(user_ids)} users")
+
+        for uid in user_ids:
+            days = rebuild_user_daily_stats(uid)
+            db.session.commit()
+            print("User:", uid, "days:", days)
+
+        print("Daily stats rebuilt")
+
+    """
+    Compara byte a byte el body de jsonify entre la implementación original
+    (api/mirror_reference.py, copia sin cambios del código previo al rollup) y los
+    modos orm, sql (GROUP BY en la base) y rollup, sobre un dataset sintético.
+    Todo corre dentro de una transacción que se descarta al final:
+    $ flask verify-mirror-aggregation --days 120
+    """
+    @app.cli.command("verify-mirror-aggregation")
+    @click.option("--days", type=int, default=120)
+    @click.option("--seed", type=int, default=7)
+    def verify_mirror_aggregation(days, seed):
+        rnd = random.Random(seed)
+        today = datetime.now(timezone.utc).date()
+        mismatches = 0
+
+        try:
+            user = _create_synthetic_history(rnd, days, today)
+            rebuild_user_daily_stats(user.id)
+            db.session.flush()
+
+            ranges = [
+                (today - timedelta(days=6), today),
+                (today - timedelta(days=29), today),
+                (today - timedelta(days=days - 1), today),
+                (today - timedelta(days=days + 30), today + timedelta(days=5)),
+                (today + timedelta(days=1), today + timedelta(days=7)),
+            ]
+            for start, end in ranges:
+                # cuerpo HTTP real (jsonify) de la implementación original, sin tocar
+                ref = jsonify(reference_mirror_payload(user.id, start, end)).get_data()
+                for mode in ("orm", "sql", "rollup"):
+                    out = jsonify(build_mirror_range_payload(
+                        user.id, start, end, mode=mode)).get_data()
+                    ok = out == ref
+                    mismatches += 0 if ok else 1
+                    print(f"{start} .. {end} {mode}: {'OK' if ok else 'MISMATCH'} ({len(out)} bytes)")
+        finally:
+            db.session.rollback()
+
+        if mismatches:
+            raise SystemExit(f"{mismatches} payloads differ from the original implementation")
+        print("All mirror payloads match")
+
+    """
+    Dataset sintético grande para capacity planning / benchmarks (inserts en bulk).
+    Usuarios {prefix}_<n>@bench.test con M días de sesiones, completions,
+    check-ins, goals + progress y un reminder de inactividad cada uno:
+    $ flask seed-benchmark --users 200 --days 365
+    """
+    @app.cli.command("seed-benchmark")
+    @click.option("--users", type=int, default=50)
+    @click.option("--days", type=int, default=365)
+    @click.option("--seed", type=int, default=42)
+    @click.option("--prefix", default="bench")
+    @click.option("--chunk", type=int, default=25, help="Usuarios por commit")
+    def seed_benchmark(users, days, seed, prefix, chunk):
+        started = time.perf_counter()
+        totals = _seed_benchmark_dataset(
+            random.Random(seed), users, days, prefix, chunk)
+        elapsed = time.perf_counter() - started
+        print(f"Benchmark dataset ready in {elapsed:.1f}s:",
+              ", ".join(f"{k}={v}" for k, v in totals.items()))
+
+    """
+    Mide los endpoints principales contra la base configurada (DATABASE_URL:
+    SQLite o Postgres) usando los usuarios de seed-benchmark, y escribe JSON
+    con p50/p95 por endpoint. --compare marca regresiones contra otro run:
+    $ flask bench --iterations 30 --output bench.json
+    $ flask bench --compare bench-main.json --max-regression 0.25
+    """
+    @app.cli.command("bench")
+    @click.option("--iterations", type=int, default=20)
+    @click.option("--warmup", type=int, default=2)
+    @click.option("--prefix", default="bench")
+    @click.option("--sample-users", type=int, default=10)
+    @click.option("--warm-cache", is_flag=True, default=False,
+                  help="No limpiar el cache de mirror entre requests")
+    @click.option("--output", type=click.Path(dir_okay=False), default=None)
+    @click.option("--compare", "baseline", type=click.Path(exists=True, dir_okay=False), default=None)
+    @click.option("--max-regression", type=float, default=0.25)
+    def bench(iterations, warmup, prefix, sample_users, warm_cache, output, baseline,
+              max_regression):
+        results = run_benchmark(
+            app, prefix=prefix, iterations=iterations, warmup=warmup,
+            sample_users=sample_users, warm_cache=warm_cache)
+
+        output = output or f"bench-{results['dialect']}-{results['commit']}.json"
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+        for r in results["results"]:
+            print(f"{r['name']:<24} p50={r['p50_ms']:>8.2f}ms  p95={r['p95_ms']:>8.2f}ms  "
+                  f"queries={r['queries']}  status={r['status_codes']}")
+        print("Results written to", output)
+
+        if baseline:
+            with open(baseline) as f:
+                regressions = compare_results(json.load(f), results, max_regression)
+            if regressions:
+                raise SystemExit(f"{len(regressions)} endpoints regressed more than "
+                                 f"{max_regression:.0%}: {', '.join(regressions)}")
+
+    """
+    Envía los emails pendientes del outbox (Loops). Sin --loop hace una pasada
+    (cron); con --loop queda corriendo como worker:
+    $ flask drain-email-outbox
+    $ flask drain-email-outbox --loop --interval 5
+    $ flask drain-email-outbox --requeue-dead
+    """
+    @app.cli.command("drain-email-outbox")
+    @click.option("--batch-size", type=int, default=50)
+    @click.option("--loop", "keep_running", is_flag=True, default=False)
+    @click.option("--interval", type=float, default=5.0)
+    @click.option("--requeue-dead", "requeue_dead_letters", is_flag=True, default=False)
+    def drain_email_outbox(batch_size, keep_running, interval, requeue_dead_letters):
+        if requeue_dead_letters:
+            print("Requeued dead emails:", requeue_dead())
+
+        while True:
+            stats = drain_outbox(batch_size=batch_size)
+            if any(stats.values()):
+                print("Email outbox:", ", ".join(f"{k}={v}" for k, v in stats.items()))
+            if not keep_running:
+                break
+            time.sleep(interval)
+
+    """
+    Stub local de la API de Loops para probar el outbox sin enviar emails:
+    $ flask loops-stub --port 8025 --fail-rate 0.2
+    (y en otra terminal LOOPS_BASE_URL=http://127.0.0.1:8025/api/v1)
+    """
+    @app.cli.command("loops-stub")
+    @click.option("--host", default="127.0.0.1")
+    @click.option("--port", type=int, default=8025)
+    @click.option("--fail-rate", type=float, default=0.0)
+    @click.option("--latency-ms", type=int, default=0)
+    def loops_stub(host, port, fail_rate, latency_ms):
+        server = LoopsStubServer(host, port, fail_rate=fail_rate, latency_ms=latency_ms)
+        print(f"Loops stub listening on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+    """
+    Sweep de reminders de inactividad fuera del web worker (cron / workers).
+    --shard i/n reparte por user_id % n: se pueden correr n procesos en paralelo.
+    Cada shard guarda su cursor en task_checkpoints y, si se corta, la próxima
+    ejecución continúa donde quedó (--restart para empezar de cero):
+    $ flask send-reminders
+    $ flask send-reminders --shard 0/4 & flask send-reminders --shard 1/4 & ...
+    """
+    @app.cli.command("send-reminders")
+    @click.option("--shard", "shard_raw", default="0/1", help="i/n, ej: 0/4")
+    @click.option("--chunk-size", type=int, default=SWEEP_CHUNK_SIZE)
+    @click.option("--concurrency", type=int, default=SEND_CONCURRENCY)
+    @click.option("--restart", is_flag=True, default=False)
+    def send_reminders(shard_raw, chunk_size, concurrency, restart):
+        try:
+            shard = parse_shard(shard_raw)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--shard")
+
+        run_reminder_shard(shard, chunk_size=chunk_size, concurrency=concurrency,
+                           restart=restart, progress=print)
+
+
+    """
+    Reminders de hora fija (mode=fixed). Cada tick solo lee los que tienen
+    next_due_at <= ahora; pensado para cron cada minuto o como worker:
+    $ flask send-fixed-reminders
+    $ flask send-fixed-reminders --loop
+    $ flask send-fixed-reminders --reschedule   # recalcula next_due_at de todos
+    """
+    @app.cli.command("send-fixed-reminders")
+    @click.option("--loop", is_flag=True, default=False)
+    @click.option("--interval", type=float, default=60)
+    @click.option("--reschedule", is_flag=True, default=False)
+    def send_fixed_reminders(loop, interval, reschedule):
+        if reschedule:
+            print(f"Rescheduled {reschedule_all()} fixed reminders")
+            return
+        if loop:
+            run_fixed_reminders_loop(interval=interval, progress=print)
+            return
+        print(tick_fixed_reminders())
+
+
+    """
+    Borra las Idempotency-Key vencidas (IDEMPOTENCY_TTL_HOURS). Pensado para cron diario:
+    $ flask purge-idempotency-keys
+    """
+    @app.cli.command("purge-idempotency-keys")
+    def purge_idempotency_keys():
+        print(f"Purged {purge_expired_idempotency_keys()} expired idempotency keys")
+
+
+
+def _create_synthetic_history(rnd, days, today):
+    """Usuario temporal con sesiones, completions y check-ins aleatorios (sin commit)."""
+    suffix = uuid.uuid4().hex[:10]
+    user = User(email=f"verify_{suffix}@test.com", username=f"verify_{suffix}")
+    user.set_password(suffix)
+    db.session.add(user)
+
+    activities = Activity.query.all()
+    if not activities:
+        cats = [ActivityCategory(name=f"verify-{suffix}-{i}") for i in range(3)]
+        db.session.add_all(cats)
+        db.session.flush()
+        activities = [
+            Activity(external_id=f"verify-{suffix}-{i}", name=f"Activity {i}",
+                     category_id=cats[i % 3].id)
+            for i in range(10)
+        ]
+        db.session.add_all(activities)
+
+    emotions = Emotion.query.all()
+    if not emotions:
+        emotions = [Emotion(name=f"verify-{suffix}-{i}") for i in range(4)]
+        db.session.add_all(emotions)
+    db.session.flush()
+
+    for i in range(days):
+        d = today - timedelta(days=i)
+        for stype in (SessionType.day, SessionType.night):
+            if rnd.random() < 0.2:
+                continue
+            session = DailySession(user_id=user.id, session_date=d,
+                                   session_type=stype, points_earned=0)
+            db.session.add(session)
+            db.session.flush()
+
+            points = 0
+            chosen = rnd.sample(activities, min(len(activities), rnd.randint(0, 4)))
+            for idx, act in enumerate(chosen):
+                pts = [20, 10, 5, 0][idx]
+                db.session.add(ActivityCompletion(
+                    daily_session_id=session.id, activity_id=act.id, points_awarded=pts,
+                    completed_at=datetime(d.year, d.month, d.day, rnd.randint(0, 23),
+                                          rnd.randint(0, 59), rnd.randint(0, 59),
+                                          rnd.choice([0, 123456]))))
+                points += pts
+
+            # puntos de goals (sin completion)
+            if rnd.random() < 0.3:
+                points += 7
+            session.points_earned = points
+
+            if stype == SessionType.night:
+                for _ in range(rnd.randint(0, 2)):
+                    db.session.add(EmotionCheckin(
+                        daily_session_id=session.id, emotion_id=rnd.choice(emotions).id,
+                        intensity=rnd.randint(1, 10), note=rnd.choice([None, "nota"]),
+                        created_at=datetime(d.year, d.month, d.day, rnd.randint(0, 23),
+                                            rnd.randint(0, 59), rnd.randint(0, 59))))
+
+    db.session.flush()
+    return user
+
+
+def _ensure_benchmark_catalog(prefix):
+    activities = db.session.execute(
+        select(Activity.id).where(Activity.is_active.is_(True))).scalars().all()
+    if not activities:
+        cats = [ActivityCategory(name=f"{prefix}-cat-{i}") for i in range(4)]
+        db.session.add_all(cats)
+        db.session.flush()
+        rows = [
+            Activity(external_id=f"{prefix}-act-{i}", name=f"Bench activity {i}",
+                     category_id=cats[i % 4].id)
+            for i in range(16)
+        ]
+        db.session.add_all(rows)
+        db.session.flush()
+        activities = [a.id for a in rows]
+
+    emotions = db.session.execute(select(Emotion.id)).scalars().all()
+    if not emotions:
+        rows = [Emotion(name=f"{prefix}-emotion-{i}") for i in range(6)]
+        db.session.add_all(rows)
+        db.session.flush()
+        emotions = [e.id for e in rows]
+
+    return activities, emotions
+
+
+def _bulk_insert(model, rows, batch=5000):
+    for i in range(0, len(rows), batch):
+        db.session.execute(insert(model), rows[i:i + batch])
+
+
+def _seed_benchmark_dataset(rnd, users, days, prefix, chunk):
+    """
+    N usuarios x M días (hasta ayer, para que /activities/complete inserte de verdad).
+    Inserts en bulk por tabla y commit cada `chunk` usuarios.
+    """
+    activity_ids, emotion_ids = _ensure_benchmark_catalog(prefix)
+    db.session.commit()
+
+    now = datetime.utcnow()
+    today = now.date()
+    password_hash = generate_password_hash(prefix)
+    totals = {"users": 0, "sessions": 0, "completions": 0, "checkins": 0,
+              "goals": 0, "progress": 0, "stats_days": 0}
+
+    emails = [f"{prefix}_{n}@bench.test" for n in range(users)]
+    existing = set(db.session.execute(
+        select(User.email).where(User.email.in_(emails))).scalars())
+
+    pending = [e for e in emails if e not in existing]
+    for i in range(0, len(pending), chunk):
+        batch = pending[i:i + chunk]
+        _bulk_insert(User, [{
+            "email": email,
+            "username": email.split("@")[0],
+            "password_hash": password_hash,
+            "timezone": "UTC",
+            "is_email_verified": True,
+            "email_verified_at": now,
+            "created_at": now - timedelta(days=days + 1),
+            "last_activity_at": now - timedelta(minutes=rnd.randint(0, 5 * 1440)),
+        } for email in batch])
+        user_ids = db.session.execute(
+            select(User.id).where(User.email.in_(batch))).scalars().all()
+
+        sessions = []
+        for uid in user_ids:
+            for back in range(1, days + 1):
+                d = today - timedelta(days=back)
+                for stype in (SessionType.day, SessionType.night):
+                    if rnd.random() < 0.15:
+                        continue
+                    sessions.append({
+                        "user_id": uid, "session_date": d, "session_type": stype,
+                        "points_earned": 0, "is_active": True,
+                        "created_at": datetime(d.year, d.month, d.day, 8 if stype == SessionType.day else 20),
+                    })
+        _bulk_insert(DailySession, sessions)
+
+        _bulk_insert(Goal, [{
+            "user_id": uid, "title": f"Bench goal {g}", "goal_type": "custom",
+            "frequency": "flexible", "size": rnd.choice(list(GoalSize)),
+            "target_value": 30, "current_value": 0, "points_reward": 7,
+            "is_active": True, "created_at": now - timedelta(days=days),
+        } for uid in user_ids for g in range(3)])
+        goals_by_user = {}
+        for gid, uid in db.session.execute(
+                select(Goal.id, Goal.user_id).where(Goal.user_id.in_(user_ids))):
+            goals_by_user.setdefault(uid, []).append(gid)
+
+        session_rows = db.session.execute(
+            select(DailySession.id, DailySession.user_id, DailySession.session_date,
+                   DailySession.session_type)
+            .where(DailySession.user_id.in_(user_ids))
+        ).all()
+
+        completions, checkins, progress = [], [], []
+        session_points, goal_totals = {}, {}
+        for sid, uid, d, stype in session_rows:
+            points = 0
+            chosen = rnd.sample(activity_ids, min(len(activity_ids), rnd.randint(0, 4)))
+            for idx, aid in enumerate(chosen):
+                pts = [20, 10, 5, 0][idx]
+                completions.append({
+                    "daily_session_id": sid, "activity_id": aid, "points_awarded": pts,
+                    "completed_at": datetime(d.year, d.month, d.day, rnd.randint(0, 23),
+                                             rnd.randint(0, 59), rnd.randint(0, 59)),
+                })
+                points += pts
+
+            if goals_by_user.get(uid) and rnd.random() < 0.3:
+                gid = rnd.choice(goals_by_user[uid])
+                progress.append({
+                    "goal_id": gid, "daily_session_id": sid, "delta_value": 1,
+                    "created_at": datetime(d.year, d.month, d.day, 12),
+                })
+                goal_totals[gid] = goal_totals.get(gid, 0) + 1
+                points += 7
+
+            if stype == SessionType.night:
+                for _ in range(rnd.randint(0, 2)):
+                    checkins.append({
+                        "daily_session_id": sid, "emotion_id": rnd.choice(emotion_ids),
+                        "intensity": rnd.randint(1, 10), "note": rnd.choice([None, "nota"]),
+                        "created_at": datetime(d.year, d.month, d.day, rnd.randint(19, 23),
+                                               rnd.randint(0, 59), rnd.randint(0, 59)),
+                    })
+            session_points[sid] = points
+
+        _bulk_insert(ActivityCompletion, completions)
+        _bulk_insert(EmotionCheckin, checkins)
+        _bulk_insert(GoalProgress, progress)
+
+        # ORM bulk UPDATE por primary key (executemany)
+        db.session.execute(
+            update(DailySession),
+            [{"id": sid, "points_earned": pts} for sid, pts in session_points.items() if pts])
+        if goal_totals:
+            db.session.execute(
+                update(Goal),
+                [{"id": gid, "current_value": min(30, v)} for gid, v in goal_totals.items()])
+
+        _bulk_insert(Reminder, [{
+            "user_id": uid, "reminder_type": ReminderType.inactive_nudge,
+            "mode": ReminderMode.inactivity, "inactive_after_minutes": 1440,
+            "days_mask": ALL_DAYS_MASK, "is_active": True,
+        } for uid in user_ids])
+
+        for uid in user_ids:
+            totals["stats_days"] += rebuild_user_daily_stats(uid)
+        db.session.commit()
+
+        totals["users"] += len(user_ids)
+        totals["sessions"] += len(session_rows)
+        totals["completions"] += len(completions)
+        totals["checkins"] += len(checkins)
+        totals["goals"] += sum(len(v) for v in goals_by_user.values())
+        totals["progress"] += len(progress)
+        print(f"  {totals['users']}/{len(pending)} users seeded")
+
+    return totals
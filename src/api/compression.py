@@ -0,0 +1,105 @@
+"""
+Compresión de respuestas (gzip / brotli) según Accept-Encoding.
+
+API: after_request comprime JSON / texto de COMPRESS_MIN_SIZE bytes o más
+(1 KB por defecto; debajo de eso los headers pesan más que lo que se ahorra).
+brotli si el cliente lo acepta y el paquete `brotli` está instalado, si no gzip.
+El ETag de `conditional` ya es débil (W/"...") en el 200 y en el 304; un ETag
+fuerte de otra vista se debilita al comprimir, como hace nginx.
+
+SPA (dist/): los assets se comprimen una vez en el build
+(`node scripts/precompress.mjs`, corre con `npm run build`) y api/static_files.py
+sirve el hermano .br / .gz si existe y el cliente lo acepta.
+"""
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+# 4-5: buena relación tamaño / CPU para respuestas dinámicas (11 es para el build)
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE = {
+    "application/json",
+    "application/javascript",
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/javascript",
+    "image/svg+xml",
+}
+
+# orden de preferencia: (encoding, extensión del precomprimido)
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepts_encoding(encoding: str) -> bool:
+    return request.accept_encodings.quality(encoding) > 0
+
+
+def choose_encoding():
+    """"br", "gzip" o None según Accept-Encoding (y si hay brotli instalado)."""
+    if brotli is not None and accepts_encoding("br"):
+        return "br"
+    if accepts_encoding("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0: mismo body para el mismo JSON
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _should_compress(response) -> bool:
+    return (
+        200 <= response.status_code < 300
+        and response.status_code not in (204, 206)
+        and not response.direct_passthrough
+        and "Content-Encoding" not in response.headers
+        and response.mimetype in COMPRESSIBLE
+        and not response.cache_control.no_transform
+    )
+
+
+def setup_compression(app):
+    """
+    Registrar antes que los demás after_request (Flask los corre en orden
+    inverso): así comprime el body final, con Server-Timing y demás ya puestos.
+    """
+    @app.after_request
+    def _compress_response(response):
+        if request.method == "HEAD" or not _should_compress(response):
+            return response
+
+        data = response.get_data()
+        if len(data) < MIN_SIZE:
+            return response
+
+        # cacheable por encoding, se comprima o no esta vez
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding()
+        if encoding is None:
+            return response
+
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
@@ -0,0 +1,264 @@
+"""
+Reminders de hora fija (mode=fixed): "a las 09:00 de mi zona, lun/mié/vie".
+
+Cada reminder guarda su próximo envío ya resuelto a UTC en `next_due_at`
+(indexado), así cada tick solo lee las filas vencidas en vez de recorrer todos
+los reminders y convertir zonas horarias:
+
+    $ flask send-fixed-reminders            # un tick (cron cada minuto)
+    $ flask send-fixed-reminders --loop     # worker continuo
+    $ flask send-fixed-reminders --reschedule   # recalcula todos (tras migrar)
+
+Cambios de hora (DST), con zoneinfo:
+  - hora inexistente (salto de primavera, ej 02:30 en America/New_York):
+    se envía al final del salto (03:30 hora nueva), como cron.
+  - hora ambigua (otoño, ej 01:30 se repite): se envía solo en la primera.
+
+Por lote, el mismo esquema que el sweep de inactividad (api/reminders.py):
+claim (last_sent_at = now, commit) -> envíos en paralelo -> resultados en batch
+(éxito: next_due_at avanza al siguiente día válido; fallo: se libera el claim
+y el próximo tick reintenta). Un claim huérfano (proceso muerto) se recupera
+tras CLAIM_LEASE con el mismo Idempotency-Key, y un envío con más de
+FIXED_REMINDER_GRACE_MINUTES de retraso ya no sale: solo se reprograma.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, or_, and_, bindparam
+
+from api.models import db, User, Reminder, ReminderMode, ALL_DAYS_MASK
+from api.service_loops.fixed_reminder import send_fixed_reminder
+from api.user_time import get_zone
+
+
+TICK_CHUNK_SIZE = int(os.getenv("FIXED_REMINDER_CHUNK", "500"))
+SEND_CONCURRENCY = int(os.getenv("REMINDER_SEND_CONCURRENCY", "8"))
+GRACE = timedelta(minutes=int(os.getenv("FIXED_REMINDER_GRACE_MINUTES", "60")))
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def compute_next_due_at(local_time, tz_name: str, days_mask: int, after: datetime):
+    """
+    Primer instante UTC (naive) estrictamente posterior a `after` (UTC naive)
+    en que son `local_time` en `tz_name`, en un día de days_mask (bit 0 = lunes).
+    """
+    if local_time is None or not days_mask & ALL_DAYS_MASK:
+        return None
+
+    tz = get_zone(tz_name)
+    local_after = after.replace(tzinfo=timezone.utc).astimezone(tz)
+
+    # 8 días: el mismo día de la semana puede quedar ya pasado hoy
+    for offset in range(8):
+        day = local_after.date() + timedelta(days=offset)
+        if not days_mask & (1 << day.weekday()):
+            continue
+        # fold=0: en una hora ambigua es la primera; en una inexistente,
+        # zoneinfo aplica el offset previo al salto -> cae justo después
+        candidate = datetime.combine(day, local_time).replace(tzinfo=tz, fold=0)
+        due = candidate.astimezone(timezone.utc).replace(tzinfo=None)
+        if due > after:
+            return due
+    return None
+
+
+def schedule_reminder(r: Reminder, tz_name: str, after: datetime | None = None):
+    """Actualiza r.next_due_at (None si no es fixed o está inactivo). Sin commit."""
+    if not r.is_active or r.mode != ReminderMode.fixed:
+        r.next_due_at = None
+    else:
+        r.next_due_at = compute_next_due_at(
+            r.local_time, tz_name, r.days_mask, after or datetime.utcnow())
+    return r.next_due_at
+
+
+def reschedule_user_reminders(user: User, after: datetime | None = None):
+    """Tras cambiar User.timezone: recalcula sus reminders fijos. Sin commit."""
+    for r in Reminder.query.filter_by(user_id=user.id, mode=ReminderMode.fixed).all():
+        schedule_reminder(r, user.timezone, after)
+
+
+def reschedule_all(chunk_size: int = TICK_CHUNK_SIZE) -> int:
+    """Recalcula next_due_at de todos los reminders fijos (backfill). Devuelve cuántos."""
+    now = datetime.utcnow()
+    table = Reminder.__table__
+    total = 0
+    after_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Reminder.id, Reminder.local_time, Reminder.days_mask,
+                   Reminder.is_active, User.timezone)
+            .join(User, User.id == Reminder.user_id)
+            .where(Reminder.id > after_id, Reminder.mode == ReminderMode.fixed)
+            .order_by(Reminder.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        after_id = rows[-1].id
+        db.session.execute(
+            update(table).where(table.c.id == bindparam("rid"))
+            .values(next_due_at=bindparam("next_due")),
+            [{"rid": r.id,
+              "next_due": compute_next_due_at(r.local_time, r.timezone, r.days_mask, now)
+              if r.is_active else None}
+             for r in rows],
+        )
+        db.session.commit()
+        total += len(rows)
+    return total
+
+
+def _claimable(now: datetime):
+    return and_(
+        Reminder.is_active.is_(True),
+        Reminder.mode == ReminderMode.fixed,
+        Reminder.next_due_at <= now,
+        or_(Reminder.last_sent_at.is_(None),
+            Reminder.last_sent_at < Reminder.next_due_at,
+            # claim huérfano de un tick que murió a mitad
+            Reminder.last_sent_at <= now - CLAIM_LEASE),
+    )
+
+
+def due_fixed_reminders(now: datetime, after_id: int = 0, limit: int = TICK_CHUNK_SIZE):
+    """Un lote de reminders vencidos (filtra por ix_reminders_next_due_at, pagina por id)."""
+    return db.session.execute(
+        select(
+            Reminder.id,
+            Reminder.user_id,
+            Reminder.reminder_type,
+            Reminder.local_time,
+            Reminder.days_mask,
+            Reminder.next_due_at,
+            Reminder.last_sent_at,
+            User.email,
+            User.username,
+            User.timezone,
+            User.is_email_verified,
+            User.emails_enabled,
+        )
+        .join(User, User.id == Reminder.user_id)
+        .where(Reminder.id > after_id, _claimable(now))
+        .order_by(Reminder.id)
+        .limit(limit)
+    ).all()
+
+
+def _claim(ids, now: datetime) -> set:
+    if not ids:
+        return set()
+    stmt = (
+        update(Reminder)
+        .where(Reminder.id.in_(ids), _claimable(now))
+        .values(last_sent_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if db.engine.dialect.update_returning:
+        claimed = set(db.session.execute(stmt.returning(Reminder.id)).scalars())
+    else:
+        claimed = {
+            rid for rid in ids
+            if db.session.execute(stmt.where(Reminder.id == rid)).rowcount == 1
+        }
+    db.session.commit()
+    return claimed
+
+
+def _idempotency_key(r) -> str:
+    return f"fixed-{r.id}-{r.next_due_at.strftime('%Y%m%d%H%M')}"
+
+
+def _send(r, url_app: str):
+    """Corre en un hilo del pool: solo HTTP."""
+    try:
+        send_fixed_reminder(
+            email=r.email,
+            username=r.username,
+            url_app=url_app,
+            reminder_type=r.reminder_type.value,
+            idempotency_key=_idempotency_key(r),
+        )
+        return None
+    except Exception as e:
+        return e
+
+
+def tick_fixed_reminders(now: datetime | None = None, chunk_size: int = TICK_CHUNK_SIZE,
+                         concurrency: int = SEND_CONCURRENCY):
+    now = now or datetime.utcnow()
+    frontend_url = (os.getenv("VITE_FRONTEND_URL") or "").rstrip("/")
+    url_app = f"{frontend_url}/" if frontend_url else "/"
+    table = Reminder.__table__
+    ours = and_(table.c.id == bindparam("rid"), table.c.last_sent_at == bindparam("claimed_at"))
+
+    stats = {"due": 0, "sent": 0, "skipped": 0, "errors": 0}
+    after_id = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency),
+                            thread_name_prefix="fixed-reminder-send") as pool:
+        while True:
+            batch = due_fixed_reminders(now, after_id=after_id, limit=chunk_size)
+            if not batch:
+                break
+            after_id = batch[-1].id
+            stats["due"] += len(batch)
+
+            claimed = _claim([r.id for r in batch], now)
+            mine = [r for r in batch if r.id in claimed]
+            # tarde, sin email verificado o con emails apagados: no se envía, solo se reprograma
+            to_send = [r for r in mine
+                       if r.next_due_at > now - GRACE and r.is_email_verified and r.emails_enabled]
+            results = dict(zip([r.id for r in to_send],
+                               pool.map(lambda r: _send(r, url_app), to_send)))
+
+            advanced, failed = [], []
+            for r in mine:
+                error = results.get(r.id)
+                if error is not None:
+                    print("Error Loops fixed reminder:", repr(error))
+                    stats["errors"] += 1
+                    failed.append({"rid": r.id, "previous": r.last_sent_at, "claimed_at": now})
+                    continue
+                sent = r.id in results
+                stats["sent" if sent else "skipped"] += 1
+                advanced.append({
+                    "rid": r.id,
+                    "claimed_at": now,
+                    # si no salió, last_sent_at no debe mentir: vuelve al valor previo
+                    "last_sent": now if sent else r.last_sent_at,
+                    "next_due": compute_next_due_at(r.local_time, r.timezone,
+                                                    r.days_mask, now),
+                })
+
+            if advanced:
+                db.session.execute(
+                    update(table).where(ours).values(next_due_at=bindparam("next_due"),
+                                                     last_sent_at=bindparam("last_sent")),
+                    advanced)
+            if failed:
+                db.session.execute(
+                    update(table).where(ours).values(last_sent_at=bindparam("previous")),
+                    failed)
+            db.session.commit()
+
+            # los fallidos siguen vencidos pero quedan detrás del cursor: reintento en el próximo tick
+            if len(batch) < chunk_size:
+                break
+
+    return stats
+
+
+def run_fixed_reminders_loop(interval: float = 60, progress=print):
+    """Un tick por `interval` segundos, alineado al reloj (ej 09:00:00, 09:01:00...)."""
+    while True:
+        try:
+            stats = tick_fixed_reminders()
+            if stats["due"]:
+                progress(f"fixed reminders: {stats}")
+        except Exception as e:
+            db.session.rollback()
+            progress(f"fixed reminders tick error: {e!r}")
+        time.sleep(interval - time.time() % interval)
@@ -0,0 +1,135 @@
+"""
+Idempotency-Key para escrituras que suman puntos (complete_activity, batch,
+complete_goal, add_goal_progress):
+
+    @api.route("/goals/<int:goal_id>/progress", methods=["POST"])
+    @jwt_required()
+    @idempotent()
+    def add_goal_progress(goal_id): ...
+
+Sin header, la vista corre igual que siempre. Con header:
+  - la key se reserva (INSERT ... ON CONFLICT DO NOTHING) en la MISMA
+    transacción que las escrituras de la vista: o se guardan ambas o ninguna;
+  - respuesta 2xx: se guarda (status + JSON) y un reintento la recibe tal cual,
+    con `Idempotent-Replayed: true`, sin tocar sesión ni goal;
+  - respuesta no 2xx o excepción: la reserva se descarta (el cliente puede reintentar);
+  - reintento mientras la original sigue en curso: 409;
+  - misma key con otra ruta/body: 422.
+Las keys viven IDEMPOTENCY_TTL_HOURS (24h); `flask purge-idempotency-keys` borra las vencidas.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import request, jsonify, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select, update, delete
+
+from api.models import db, IdempotencyKey
+from api.sql_compat import upsert_insert
+
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 128
+TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+
+
+def _request_hash() -> str:
+    h = hashlib.sha256()
+    h.update(request.method.encode())
+    h.update(b" ")
+    h.update(request.path.encode())
+    h.update(b"\n")
+    # cache=True: la vista vuelve a leer el body con get_json
+    h.update(request.get_data(cache=True))
+    return h.hexdigest()
+
+
+def _reserve(user_id: int, key: str, request_hash: str, now: datetime):
+    """Id de la reserva nueva, o None si la key ya existe (vigente)."""
+    table = IdempotencyKey.__table__
+    # una key vencida se puede reutilizar
+    db.session.execute(
+        delete(table).where(table.c.user_id == user_id, table.c.key == key,
+                            table.c.expires_at <= now))
+    stmt = upsert_insert(table, db.engine.dialect.name).values(
+        user_id=user_id,
+        key=key,
+        request_hash=request_hash,
+        created_at=now,
+        expires_at=now + TTL,
+    ).on_conflict_do_nothing(index_elements=["user_id", "key"]).returning(table.c.id)
+    return db.session.execute(stmt).scalar()
+
+
+def _discard(reservation_id: int):
+    db.session.rollback()
+    # por si la vista ya había hecho commit antes de fallar
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id == reservation_id))
+    db.session.commit()
+
+
+def _replay(user_id: int, key: str, request_hash: str):
+    row = db.session.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    ).first()
+    db.session.rollback()
+    if row is None:
+        # la original falló y soltó la key justo ahora
+        return jsonify({"msg": "Request en curso con este Idempotency-Key, reintenta"}), 409
+    if row.request_hash != request_hash:
+        return jsonify({"msg": "Idempotency-Key ya usado con otra request"}), 422
+    if row.status_code is None:
+        return jsonify({"msg": "Request en curso con este Idempotency-Key, reintenta"}), 409
+
+    resp = make_response(jsonify(row.response), row.status_code)
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def idempotent():
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.headers.get(HEADER) or "").strip()
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return jsonify({"msg": f"{HEADER} demasiado largo (máx {MAX_KEY_LENGTH})"}), 400
+
+            user_id = int(get_jwt_identity())
+            request_hash = _request_hash()
+            now = datetime.utcnow()
+
+            reservation_id = _reserve(user_id, key, request_hash, now)
+            if reservation_id is None:
+                return _replay(user_id, key, request_hash)
+
+            try:
+                resp = make_response(view(*args, **kwargs))
+            except Exception:
+                _discard(reservation_id)
+                raise
+
+            if not 200 <= resp.status_code < 300:
+                _discard(reservation_id)
+                return resp
+
+            db.session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == reservation_id)
+                .values(status_code=resp.status_code, response=resp.get_json())
+            )
+            db.session.commit()
+            return resp
+        return wrapper
+    return decorator
+
+
+def purge_expired_idempotency_keys(now: datetime | None = None) -> int:
+    res = db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at <= (now or datetime.utcnow())))
+    db.session.commit()
+    return res.rowcount
@@ -0,0 +1,135 @@
+"""
+Instrumentación SQL por request.
+
+Cuenta statements, tiempo total en DB y el statement más lento de cada request
+(eventos de cursor de SQLAlchemy) y lo expone como header Server-Timing y como
+línea de log. En debug/testing (o SQL_QUERY_BUDGET_ENFORCE=1) una request que
+supera el presupuesto de queries de su endpoint responde 500.
+
+Uso en una vista:
+
+    @api.route("/mirror/today", methods=["GET"])
+    @query_budget(5)
+    @jwt_required()
+    def mirror_today(): ...
+"""
+import os
+import time
+import logging
+
+from flask import g, request, jsonify, has_request_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger("api.sql")
+
+_STATEMENT_PREVIEW = 200
+
+
+def query_budget(max_queries: int):
+    """Máximo de statements SQL que puede emitir la vista (por request)."""
+    def decorator(view):
+        view._query_budget = max_queries
+        return view
+    return decorator
+
+
+def _stats():
+    stats = g.get("_sql_stats")
+    if stats is None:
+        stats = {"count": 0, "total": 0.0, "slowest": 0.0, "slowest_sql": None}
+        g._sql_stats = stats
+    return stats
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    if not has_request_context():
+        return
+
+    stats = _stats()
+    stats["count"] += 1
+    stats["total"] += elapsed
+    if elapsed >= stats["slowest"]:
+        stats["slowest"] = elapsed
+        stats["slowest_sql"] = " ".join(statement.split())[:_STATEMENT_PREVIEW]
+
+
+def _budget_for_request():
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, "_query_budget", None)
+    if budget is None:
+        default = os.getenv("SQL_QUERY_BUDGET_DEFAULT")
+        budget = int(default) if default else None
+    return budget
+
+
+def _enforce_budget(app):
+    return app.debug or app.testing or os.getenv("SQL_QUERY_BUDGET_ENFORCE") == "1"
+
+
+def setup_instrumentation(app):
+    level = os.getenv("SQL_LOG_LEVEL") or ("INFO" if app.debug else "WARNING")
+    logger.setLevel(level.upper())
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("[%(name)s] %(message)s"))
+        logger.addHandler(handler)
+
+    @app.before_request
+    def _start_request_timer():
+        g._request_start = time.perf_counter()
+        g.pop("_sql_stats", None)
+
+    @app.after_request
+    def _report_sql_stats(response):
+        stats = _stats()
+        total_ms = stats["total"] * 1000
+        slowest_ms = stats["slowest"] * 1000
+        request_ms = (time.perf_counter() - g.get("_request_start", time.perf_counter())) * 1000
+
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={total_ms:.1f};desc="{stats["count"]} queries", '
+            f"db-slowest;dur={slowest_ms:.1f}, "
+            f"app;dur={request_ms:.1f}"
+        )
+
+        logger.info(
+            "%s %s -> %s queries=%d db_ms=%.1f slowest_ms=%.1f request_ms=%.1f slowest_sql=%r",
+            request.method, request.path, response.status_code,
+            stats["count"], total_ms, slowest_ms, request_ms, stats["slowest_sql"],
+        )
+
+        budget = _budget_for_request()
+        if budget is None or stats["count"] <= budget:
+            return response
+
+        logger.warning(
+            "Query budget exceeded on %s: %d queries (budget %d). Slowest: %r",
+            request.endpoint, stats["count"], budget, stats["slowest_sql"],
+        )
+        if not _enforce_budget(app):
+            return response
+
+        failed = jsonify({
+            "msg": "Query budget exceeded",
+            "endpoint": request.endpoint,
+            "queries": stats["count"],
+            "budget": budget,
+            "slowest_sql": stats["slowest_sql"],
+        })
+        failed.status_code = 500
+        failed.headers["Server-Timing"] = response.headers.get("Server-Timing")
+        return failed
@@ -0,0 +1,98 @@
+"""
+Proveedor JSON de Flask (jsonify / request.get_json) respaldado por orjson.
+
+Los serialize() de los modelos devuelven datetime / date / Enum tal cual y el
+proveedor los formatea al codificar, con el mismo formato que antes:
+  - datetime naive (UTC en la base) -> "2026-01-31T09:00:00Z"
+  - datetime aware en UTC           -> "...Z"; otras zonas -> "...+02:00"
+  - date -> "2026-01-31"; time -> "09:00:00"; Enum -> .value
+Mismas claves ordenadas que el proveedor por defecto (app.json.sort_keys) y
+salida indentada en debug. Única diferencia: orjson escribe UTF-8 sin escapar
+("canción" en vez de "canci\\u00f3n"), igual de válido para cualquier cliente.
+
+Sin orjson instalado se usa FallbackJSONProvider (stdlib json, mismo formato).
+"""
+import dataclasses
+import decimal
+import enum
+import os
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def _iso_z(dt: datetime) -> str:
+    if dt.tzinfo is None or dt.utcoffset() == timedelta(0):
+        return dt.replace(tzinfo=None).isoformat() + "Z"
+    return dt.isoformat()
+
+
+def _default(o):
+    """Tipos que ni orjson ni json conocen (mismo criterio que el proveedor de Flask)."""
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FallbackJSONProvider(DefaultJSONProvider):
+    """stdlib json con el formato de fechas/enums de OrjsonProvider."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, datetime):
+            return _iso_z(o)
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        if isinstance(o, enum.Enum):
+            return o.value
+        return _default(o)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    orjson codifica datetime/date/time/Enum/dataclass en C; `_default` solo
+    se llama para lo que no conoce (Decimal, Markup...).
+    """
+
+    _OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def _options(self, pretty: bool = False) -> int:
+        option = self._OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default, option=self._options()).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        # mismo "\n" final que DefaultJSONProvider
+        body = orjson.dumps(obj, default=_default, option=self._options(pretty)) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def setup_json(app):
+    """JSON_PROVIDER=stdlib fuerza el proveedor sin orjson (comparar / depurar)."""
+    if orjson is not None and os.getenv("JSON_PROVIDER", "orjson") != "stdlib":
+        app.json = OrjsonProvider(app)
+    else:
+        app.json = FallbackJSONProvider(app)
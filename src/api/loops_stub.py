@@ -0,0 +1,79 @@
+"""
+Servidor HTTP local que imita POST /api/v1/transactional de Loops.
+
+Para probar el outbox sin enviar emails reales:
+
+    $ flask loops-stub --port 8025 --fail-rate 0.3 --latency-ms 200
+    $ LOOPS_BASE_URL=http://127.0.0.1:8025/api/v1 flask drain-email-outbox
+
+Responde 200 {"success": true}, o 500 con probabilidad --fail-rate, y registra
+cada request recibida en `received` (útil al usarlo embebido en un script).
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LoopsStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=8025, fail_rate=0.0, latency_ms=0, quiet=False):
+        super().__init__((host, port), _LoopsStubHandler)
+        self.fail_rate = fail_rate
+        self.latency_ms = latency_ms
+        self.quiet = quiet
+        self.received = []
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def start_background(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class _LoopsStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como la API real
+    disable_nagle_algorithm = True  # headers y body salen en writes separados
+
+    def _reply(self, status, body):
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._reply(400, {"success": False, "message": "invalid json"})
+
+        if not self.path.rstrip("/").endswith("/transactional"):
+            return self._reply(404, {"success": False, "message": "not found"})
+        if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            return self._reply(401, {"success": False, "message": "missing api key"})
+
+        server = self.server
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000)
+
+        failed = random.random() < server.fail_rate
+        with server._lock:
+            server.received.append({"path": self.path, "payload": payload, "failed": failed})
+
+        if failed:
+            return self._reply(500, {"success": False, "message": "stub failure"})
+        return self._reply(200, {"success": True})
+
+    def log_message(self, fmt, *args):
+        if not self.server.quiet:
+            super().log_message(fmt, *args)
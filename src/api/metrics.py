@@ -0,0 +1,126 @@
+"""
+Métricas Prometheus de la API (GET /metrics).
+
+- http_requests_total / http_request_duration_seconds por ruta (url_rule), método y status
+- db_pool_checkout_wait_seconds: espera para obtener una conexión del pool
+- loops_send_duration_seconds / loops_send_failures_total por template de Loops
+
+Con gunicorn (varios workers) cada proceso escribe sus valores en
+PROMETHEUS_MULTIPROC_DIR y /metrics los agrega al leer (ver gunicorn.conf.py).
+Sin esa variable (flask run) se usa el registry normal del proceso.
+
+METRICS_TOKEN (opcional): si está definido, /metrics exige
+`Authorization: Bearer <METRICS_TOKEN>`.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import g, request, jsonify, Response
+from prometheus_client import (
+    Counter, Histogram, CollectorRegistry, REGISTRY,
+    generate_latest, CONTENT_TYPE_LATEST,
+)
+from prometheus_client import multiprocess
+from sqlalchemy.pool import QueuePool
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Requests HTTP atendidas",
+    ["method", "route", "status"],
+)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de requests HTTP",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Tiempo esperando una conexión libre del pool de SQLAlchemy",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+LOOPS_LATENCY = Histogram(
+    "loops_send_duration_seconds",
+    "Latencia de envíos transaccionales a Loops",
+    ["template"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15),
+)
+
+LOOPS_FAILURES = Counter(
+    "loops_send_failures_total",
+    "Envíos a Loops que fallaron",
+    ["template", "reason"],
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto tarda cada checkout (incluye la espera por overflow)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+@contextmanager
+def observe_loops_send(template: str):
+    """Envuelve un envío a Loops: latencia siempre, fallo si sale con excepción."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        LOOPS_FAILURES.labels(template=template, reason=type(e).__name__).inc()
+        raise
+    finally:
+        LOOPS_LATENCY.labels(template=template).observe(time.perf_counter() - start)
+
+
+def _registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def _route_label():
+    # la regla (no el path) para no explotar la cardinalidad con ids
+    if request.url_rule is None:
+        return "<unmatched>"
+    return request.url_rule.rule
+
+
+def setup_metrics(app):
+    @app.before_request
+    def _start_metrics_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = g.pop("_metrics_start", None)
+        if start is None or request.endpoint == "metrics":
+            return response
+
+        route = _route_label()
+        HTTP_REQUESTS.labels(
+            method=request.method, route=route, status=str(response.status_code)
+        ).inc()
+        HTTP_LATENCY.labels(method=request.method, route=route).observe(
+            time.perf_counter() - start
+        )
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        token = os.getenv("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return jsonify({"msg": "Unauthorized"}), 401
+
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,645 @@
+"""
+Mirror: rollup diario por usuario (user_daily_stats) y payload de /mirror/*.
+
+Las escrituras (complete_activity, create_emotion_checkin, complete_goal)
+actualizan el rollup de forma incremental; las lecturas de rango solo hacen
+un range scan sobre (user_id, stat_date).
+
+MIRROR_AGGREGATION elige de dónde sale el payload:
+  - "rollup" (default): user_daily_stats
+  - "sql": GROUP BY en la base, una sola query (sin rollup)
+  - "orm": implementación original con entidades ORM (referencia)
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone, date
+
+from sqlalchemy import select, union_all, literal, cast, null, case, func, String, Integer, DateTime
+from sqlalchemy.exc import IntegrityError
+
+from api.models import (
+    db,
+    DailySession,
+    Activity,
+    ActivityCompletion,
+    Emotion,
+    EmotionCheckin,
+    SessionType,
+    ActivityCategory,
+    UserDailyStats,
+)
+from api.cache import mirror_cache, user_data_version, user_today_by_id, user_timezone_by_id
+
+
+# -------------------------
+# HELPERS
+# -------------------------
+
+def _daterange_days(start_date: date, end_date: date):
+    days = []
+    d = start_date
+    while d <= end_date:
+        days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def _calc_streak(flags_by_date):
+    """
+    flags_by_date: lista bool en orden cronológico (True = día consistente)
+    current: racha desde el final
+    best: máxima racha
+    """
+    best = 0
+    tmp = 0
+    for f in flags_by_date:
+        if f:
+            tmp += 1
+            best = max(best, tmp)
+        else:
+            tmp = 0
+
+    cur = 0
+    for f in reversed(flags_by_date):
+        if f:
+            cur += 1
+        else:
+            break
+
+    return cur, best
+
+
+def _iso_z(dt):
+    return (dt.isoformat() + "Z") if dt else None
+
+
+def _empty_day(iso: str):
+    return {
+        "date": iso,
+        "points_total": 0,
+        "points_day": 0,
+        "points_night": 0,
+        "completions_count": 0,
+        "principal_count": 0,      # points_awarded >= 10
+        "recommended_count": 0,    # points_awarded == 20
+        "categories": {},          # {cat_name: points}
+        # {emotion_name: {count, intensity_sum, intensity_count}} (se normaliza al final)
+        "emotions": {},
+        "emotion_entries": [],     # [{name,intensity,note,created_at}]
+        # [{name,category_name,points,session_type,completed_at,external_id}]
+        "activities": [],
+    }
+
+
+def _empty_days_map(start_date, end_date):
+    # siempre incluye todos los días aunque no haya datos
+    return {d.isoformat(): _empty_day(d.isoformat()) for d in _daterange_days(start_date, end_date)}
+
+
+def _activity_entry(external_id, name, category_name, points, session_type, completed_at):
+    return {
+        "external_id": external_id,
+        "name": name,
+        "category_name": category_name,
+        "points": points,
+        "session_type": session_type,
+        "completed_at": _iso_z(completed_at),
+    }
+
+
+def _emotion_entry(name, intensity, note, created_at):
+    return {
+        "name": name,
+        "intensity": int(intensity) if intensity is not None else None,
+        "note": note if note else None,
+        "created_at": _iso_z(created_at),
+    }
+
+
+def _add_emotion(acc: dict, name: str, count: int, intensity_sum: int, intensity_count: int):
+    e = acc.get(name, {"count": 0, "intensity_sum": 0, "intensity_count": 0})
+    e["count"] += count
+    e["intensity_sum"] += intensity_sum
+    e["intensity_count"] += intensity_count
+    acc[name] = e
+
+
+def _emotions_out(acc: dict):
+    out = {}
+    for name, obj in acc.items():
+        ic = obj.get("intensity_count", 0)
+        avg = (obj["intensity_sum"] / ic) if ic else None
+        out[name] = {"count": obj["count"], "intensity_avg": avg}
+    return out
+
+
+def _finish_payload(start_date, end_date, days_map, today=None, tz_name="UTC"):
+    """
+    Recibe days_map con emociones en forma de sumas y arma el payload final:
+    promedios, orden de drilldowns, distribuciones globales, totales y streak.
+    `today`: día local del usuario (las claves de days_map ya son días locales).
+    """
+    dist_cat_points = defaultdict(int)
+    dist_emotions = {}
+
+    for d in days_map.values():
+        for cat_name, pts in d["categories"].items():
+            dist_cat_points[cat_name] += pts
+        for name, obj in d["emotions"].items():
+            _add_emotion(dist_emotions, name, obj["count"],
+                         obj["intensity_sum"], obj["intensity_count"])
+
+        d["emotions"] = _emotions_out(d["emotions"])
+        d["activities"].sort(key=lambda x: (x.get("completed_at") or ""))
+        d["emotion_entries"].sort(key=lambda x: (
+            x.get("created_at") or ""), reverse=True)
+
+    days_list = list(days_map.values())
+
+    # Consistencia: día con >= 1 "principal" (points_awarded >= 10)
+    # IMPORTANTE: "racha actual" debe medirse hasta HOY, no hasta el final del rango
+    today = today or datetime.now(timezone.utc).date()
+    cutoff_iso = min(end_date, today).isoformat()
+
+    consistency_flags_all = [d["principal_count"] > 0 for d in days_list]
+    consistency_flags_upto_today = [
+        d["principal_count"] > 0 for d in days_list if d["date"] <= cutoff_iso]
+
+    # Best streak puede calcularse con todo el rango (da igual que haya futuros a False, no reduce el máximo),
+    # pero current streak debe excluir días futuros.
+    _, streak_best = _calc_streak(consistency_flags_all)
+    streak_cur, _ = _calc_streak(consistency_flags_upto_today)
+
+    totals = {
+        "points_total": sum(int(d["points_total"] or 0) for d in days_list),
+        "completions_total": sum(int(d["completions_count"] or 0) for d in days_list),
+        "principal_days": sum(1 for d in days_list if (d["principal_count"] or 0) > 0),
+        "recommended_days": sum(1 for d in days_list if (d["recommended_count"] or 0) > 0),
+    }
+
+    return {
+        "range": {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "days": len(days_list),
+            "timezone": tz_name
+        },
+        "days": days_list,
+        "totals": totals,
+        "streak": {"current": streak_cur, "best": streak_best},
+        "distributions": {
+            "categories_points": dict(dist_cat_points),
+            "emotions": _emotions_out(dist_emotions)
+        },
+    }
+
+
+# -------------------------
+# LECTURA (rollup)
+# -------------------------
+
+def cached_mirror_range_payload(user_id: int, start_date, end_date):
+    """
+    build_mirror_range_payload detrás de mirror_cache.
+    La clave incluye data_version (bump en cada escritura) y el corte de la
+    racha actual (min(end, hoy local)), que cambia con el día aunque no haya escrituras.
+    Zona y "hoy" salen de la misma fila que data_version (sin query extra).
+    """
+    today = user_today_by_id(user_id)
+    tz_name = user_timezone_by_id(user_id)
+    cutoff = min(end_date, today)
+    key = (user_id, start_date.isoformat(), end_date.isoformat(),
+           user_data_version(user_id), cutoff.isoformat(), tz_name)
+    return mirror_cache.get_or_set(
+        key, lambda: build_mirror_range_payload(user_id, start_date, end_date,
+                                                today=today, tz_name=tz_name))
+
+
+def build_mirror_range_payload(user_id: int, start_date, end_date, mode: str = None,
+                               today=None, tz_name: str = "UTC"):
+    mode = mode or os.getenv("MIRROR_AGGREGATION", "rollup")
+    if mode == "sql":
+        days_map, _ = _collect_days_sql(user_id, start_date, end_date)
+    elif mode == "orm":
+        days_map, _ = _collect_days_orm(user_id, start_date, end_date)
+    else:
+        days_map = _collect_days_rollup(user_id, start_date, end_date)
+    return _finish_payload(start_date, end_date, days_map, today=today, tz_name=tz_name)
+
+
+def _collect_days_rollup(user_id: int, start_date, end_date):
+    """Lee solo user_daily_stats (un range scan sobre uq_daily_stats_user_date)."""
+    rows = db.session.execute(
+        select(
+            UserDailyStats.stat_date,
+            UserDailyStats.points_day,
+            UserDailyStats.points_night,
+            UserDailyStats.completions_count,
+            UserDailyStats.principal_count,
+            UserDailyStats.recommended_count,
+            UserDailyStats.categories_points,
+            UserDailyStats.emotions,
+            UserDailyStats.activities,
+            UserDailyStats.emotion_entries,
+        )
+        .where(
+            UserDailyStats.user_id == user_id,
+            UserDailyStats.stat_date >= start_date,
+            UserDailyStats.stat_date <= end_date,
+        )
+    ).all()
+
+    days_map = _empty_days_map(start_date, end_date)
+
+    for (stat_date, points_day, points_night, completions_count, principal_count,
+         recommended_count, categories_points, emotions, activities, emotion_entries) in rows:
+        day = days_map.get(stat_date.isoformat())
+        if day is None:
+            continue
+
+        day["points_day"] = int(points_day or 0)
+        day["points_night"] = int(points_night or 0)
+        day["points_total"] = day["points_day"] + day["points_night"]
+        day["completions_count"] = int(completions_count or 0)
+        day["principal_count"] = int(principal_count or 0)
+        day["recommended_count"] = int(recommended_count or 0)
+        day["categories"] = dict(categories_points or {})
+        day["emotions"] = {name: dict(obj) for name, obj in (emotions or {}).items()}
+        day["activities"] = list(activities or [])
+        day["emotion_entries"] = list(emotion_entries or [])
+
+    return days_map
+
+
+# -------------------------
+# ESCRITURA INCREMENTAL
+# -------------------------
+
+def _stats_row(user_id: int, stat_date: date):
+    """Get-or-create de la fila del rollup, bloqueada para el resto de la transacción."""
+    q = UserDailyStats.query.filter_by(
+        user_id=user_id, stat_date=stat_date).with_for_update()
+    row = q.first()
+    if row is not None:
+        return row
+
+    row = UserDailyStats(
+        user_id=user_id,
+        stat_date=stat_date,
+        points_day=0,
+        points_night=0,
+        completions_count=0,
+        principal_count=0,
+        recommended_count=0,
+        categories_points={},
+        emotions={},
+        activities=[],
+        emotion_entries=[],
+    )
+    try:
+        with db.session.begin_nested():
+            db.session.add(row)
+    except IntegrityError:
+        # otra request creó la fila en paralelo
+        row = q.one()
+    return row
+
+
+def _add_points(row, session_type: SessionType, points: int):
+    if session_type == SessionType.day:
+        row.points_day = int(row.points_day or 0) + points
+    else:
+        row.points_night = int(row.points_night or 0) + points
+
+
+def record_session_points(user_id: int, session_date: date, session_type: SessionType, points: int):
+    """Puntos sumados a una sesión sin completion asociada (ej: complete_goal)."""
+    if not points:
+        return
+    row = _stats_row(user_id, session_date)
+    _add_points(row, session_type, points)
+    row.updated_at = datetime.utcnow()
+
+
+def record_activity_completion(user_id: int, session_date: date, session_type: SessionType,
+                               activity: Activity, category_name: str, points: int,
+                               completed_at: datetime):
+    row = _stats_row(user_id, session_date)
+    _add_points(row, session_type, points)
+
+    row.completions_count = int(row.completions_count or 0) + 1
+    if points >= 10:
+        row.principal_count = int(row.principal_count or 0) + 1
+    if points == 20:
+        row.recommended_count = int(row.recommended_count or 0) + 1
+
+    # JSON: se reasigna para que SQLAlchemy detecte el cambio
+    cats = dict(row.categories_points or {})
+    cats[category_name] = int(cats.get(category_name, 0)) + points
+    row.categories_points = cats
+
+    row.activities = list(row.activities or []) + [_activity_entry(
+        activity.external_id, activity.name, category_name, points,
+        session_type.value, completed_at)]
+    row.updated_at = datetime.utcnow()
+
+
+def record_emotion_checkin(user_id: int, session_date: date, emotion_name: str,
+                           intensity, note, created_at: datetime):
+    row = _stats_row(user_id, session_date)
+
+    emotions = {name: dict(obj) for name, obj in (row.emotions or {}).items()}
+    _add_emotion(emotions, emotion_name, 1,
+                 int(intensity) if intensity is not None else 0,
+                 1 if intensity is not None else 0)
+    row.emotions = emotions
+
+    row.emotion_entries = list(row.emotion_entries or []) + [
+        _emotion_entry(emotion_name, intensity, note, created_at)]
+    row.updated_at = datetime.utcnow()
+
+
+def delete_user_daily_stats(user_id: int, start_date=None, end_date=None):
+    q = UserDailyStats.query.filter(UserDailyStats.user_id == user_id)
+    if start_date is not None:
+        q = q.filter(UserDailyStats.stat_date >= start_date)
+    if end_date is not None:
+        q = q.filter(UserDailyStats.stat_date <= end_date)
+    return q.delete(synchronize_session=False)
+
+
+# -------------------------
+# LECTURA DESDE TABLAS BASE
+# -------------------------
+
+def _cols(kind, session_date, session_type, name=None, label=None, external_id=None,
+          n1=None, n2=None, n3=None, n4=None, note=None, ts=None, ordinal=None):
+    """Columnas comunes del UNION ALL (los huecos van como NULL tipado)."""
+    def _or_null(v, type_):
+        return cast(null(), type_) if v is None else v
+
+    return [
+        literal(kind, String).label("kind"),
+        session_date.label("day"),
+        session_type.label("session_type"),
+        _or_null(name, String).label("name"),
+        _or_null(label, String).label("label"),
+        _or_null(external_id, String).label("external_id"),
+        _or_null(n1, Integer).label("n1"),
+        _or_null(n2, Integer).label("n2"),
+        _or_null(n3, Integer).label("n3"),
+        _or_null(n4, Integer).label("n4"),
+        _or_null(note, String).label("note"),
+        _or_null(ts, DateTime).label("ts"),
+        (literal(0, Integer) if ordinal is None else ordinal).label("ordinal"),
+    ]
+
+
+def _collect_days_sql(user_id: int, start_date, end_date):
+    """
+    Un solo round-trip: UNION ALL de
+      s: puntos por (fecha, session_type)
+      c: completions por (fecha, session_type, categoría)
+      e: check-ins por (fecha, session_type, emoción)
+      a / k: drilldown de actividades y emociones (solo columnas escalares)
+    Devuelve (days_map, dias_con_sesion) igual que _collect_days_orm.
+    """
+    in_range = (
+        DailySession.user_id == user_id,
+        DailySession.session_date >= start_date,
+        DailySession.session_date <= end_date,
+    )
+    pts = ActivityCompletion.points_awarded
+    day_col = DailySession.session_date
+    st_col = DailySession.session_type
+
+    q_sessions = (
+        select(*_cols("s", day_col, st_col,
+                      n1=func.sum(DailySession.points_earned)))
+        .where(*in_range)
+        .group_by(day_col, st_col)
+    )
+
+    completions_from = (
+        select()
+        .select_from(ActivityCompletion)
+        .join(DailySession, ActivityCompletion.daily_session_id == DailySession.id)
+        .join(Activity, ActivityCompletion.activity_id == Activity.id)
+        .join(ActivityCategory, Activity.category_id == ActivityCategory.id)
+        .where(*in_range)
+    )
+    q_categories = (
+        completions_from
+        .add_columns(*_cols(
+            "c", day_col, st_col,
+            name=ActivityCategory.name,
+            n1=func.count(ActivityCompletion.id),
+            n2=func.sum(pts),
+            n3=func.sum(case((pts >= 10, 1), else_=0)),
+            n4=func.sum(case((pts == 20, 1), else_=0)),
+        ))
+        .group_by(day_col, st_col, ActivityCategory.name)
+    )
+    q_activities = completions_from.add_columns(*_cols(
+        "a", day_col, st_col,
+        name=ActivityCategory.name,
+        label=Activity.name,
+        external_id=Activity.external_id,
+        n1=pts,
+        ts=ActivityCompletion.completed_at,
+        ordinal=ActivityCompletion.id,
+    ))
+
+    checkins_from = (
+        select()
+        .select_from(EmotionCheckin)
+        .join(DailySession, EmotionCheckin.daily_session_id == DailySession.id)
+        .join(Emotion, EmotionCheckin.emotion_id == Emotion.id)
+        .where(*in_range)
+    )
+    q_emotions = (
+        checkins_from
+        .add_columns(*_cols(
+            "e", day_col, st_col,
+            name=Emotion.name,
+            n1=func.count(EmotionCheckin.id),
+            n2=func.sum(EmotionCheckin.intensity),
+            n3=func.count(EmotionCheckin.intensity),
+        ))
+        .group_by(day_col, st_col, Emotion.name)
+    )
+    q_checkins = checkins_from.add_columns(*_cols(
+        "k", day_col, st_col,
+        name=Emotion.name,
+        n1=EmotionCheckin.intensity,
+        note=EmotionCheckin.note,
+        ts=EmotionCheckin.created_at,
+        ordinal=EmotionCheckin.id,
+    ))
+
+    u = union_all(q_sessions, q_categories, q_activities,
+                  q_emotions, q_checkins).subquery()
+    rows = db.session.execute(select(u).order_by(u.c.ordinal)).all()
+
+    days_map = _empty_days_map(start_date, end_date)
+    touched = set()
+
+    for (kind, day_date, session_type, name, label, external_id,
+         n1, n2, n3, n4, note, ts, _) in rows:
+        key = day_date.isoformat()
+        day = days_map[key]
+
+        if kind == "s":
+            touched.add(key)
+            p = int(n1 or 0)
+            day["points_total"] += p
+            if session_type == SessionType.day:
+                day["points_day"] += p
+            else:
+                day["points_night"] += p
+        elif kind == "c":
+            day["completions_count"] += int(n1 or 0)
+            day["principal_count"] += int(n3 or 0)
+            day["recommended_count"] += int(n4 or 0)
+            day["categories"][name] = int(
+                day["categories"].get(name, 0)) + int(n2 or 0)
+        elif kind == "a":
+            day["activities"].append(_activity_entry(
+                external_id, label, name, int(n1 or 0), session_type.value, ts))
+        elif kind == "e":
+            _add_emotion(day["emotions"], name, int(n1 or 0),
+                         int(n2 or 0), int(n3 or 0))
+        elif kind == "k":
+            day["emotion_entries"].append(_emotion_entry(name, n1, note, ts))
+
+    return days_map, touched
+
+
+def _collect_days_orm(user_id: int, start_date, end_date):
+    """
+    Implementación original: entidades ORM + lazy loads de activity/category/emotion.
+    Se mantiene como referencia para verify-mirror-aggregation.
+    Devuelve (days_map, dias_con_sesion). Las emociones quedan como sumas.
+    """
+    sessions = (
+        DailySession.query
+        .filter(
+            DailySession.user_id == user_id,
+            DailySession.session_date >= start_date,
+            DailySession.session_date <= end_date
+        )
+        .all()
+    )
+
+    days_map = _empty_days_map(start_date, end_date)
+    session_by_id = {}
+    touched = set()
+
+    for s in sessions:
+        session_by_id[s.id] = s
+        key = s.session_date.isoformat()
+        touched.add(key)
+
+        pts = int(s.points_earned or 0)
+        days_map[key]["points_total"] += pts
+        if s.session_type == SessionType.day:
+            days_map[key]["points_day"] += pts
+        else:
+            days_map[key]["points_night"] += pts
+
+    if not session_by_id:
+        return days_map, touched
+
+    completions = (
+        ActivityCompletion.query
+        .join(Activity, ActivityCompletion.activity_id == Activity.id)
+        .join(ActivityCategory, Activity.category_id == ActivityCategory.id)
+        .filter(ActivityCompletion.daily_session_id.in_(list(session_by_id)))
+        .all()
+    )
+
+    for c in completions:
+        s = session_by_id[c.daily_session_id]
+        day = days_map[s.session_date.isoformat()]
+
+        pts = int(c.points_awarded or 0)
+        cat_name = "General"
+        if c.activity and c.activity.category:
+            cat_name = c.activity.category.name or cat_name
+
+        day["completions_count"] += 1
+        if pts >= 10:
+            day["principal_count"] += 1
+        if pts == 20:
+            day["recommended_count"] += 1
+        day["categories"][cat_name] = int(day["categories"].get(cat_name, 0)) + pts
+
+        day["activities"].append(_activity_entry(
+            c.activity.external_id if c.activity else None,
+            c.activity.name if c.activity else "Actividad",
+            cat_name, pts, s.session_type.value, c.completed_at))
+
+    checkins = (
+        EmotionCheckin.query
+        .join(Emotion, EmotionCheckin.emotion_id == Emotion.id)
+        .filter(EmotionCheckin.daily_session_id.in_(list(session_by_id)))
+        .all()
+    )
+
+    for ch in checkins:
+        s = session_by_id[ch.daily_session_id]
+        day = days_map[s.session_date.isoformat()]
+
+        name = ch.emotion.name if ch.emotion else "Desconocida"
+        day["emotion_entries"].append(_emotion_entry(
+            name, ch.intensity, ch.note, ch.created_at))
+        _add_emotion(day["emotions"], name, 1,
+                     int(ch.intensity) if ch.intensity is not None else 0,
+                     1 if ch.intensity is not None else 0)
+
+    return days_map, touched
+
+
+# -------------------------
+# REBUILD (backfill / dev tools)
+# -------------------------
+
+def rebuild_user_daily_stats(user_id: int, start_date=None, end_date=None):
+    """
+    Recalcula el rollup del usuario desde las tablas base.
+    Sin rango: todo el historial del usuario. No hace commit.
+    """
+    if start_date is None or end_date is None:
+        lo, hi = db.session.execute(
+            select(db.func.min(DailySession.session_date),
+                   db.func.max(DailySession.session_date))
+            .where(DailySession.user_id == user_id)
+        ).one()
+        start_date = start_date or lo
+        end_date = end_date or hi
+
+    delete_user_daily_stats(user_id, start_date, end_date)
+    if start_date is None or end_date is None or start_date > end_date:
+        return 0
+
+    days_map, touched = _collect_days_sql(user_id, start_date, end_date)
+
+    now = datetime.utcnow()
+    for key in sorted(touched):
+        day = days_map[key]
+        db.session.add(UserDailyStats(
+            user_id=user_id,
+            stat_date=date.fromisoformat(key),
+            points_day=day["points_day"],
+            points_night=day["points_night"],
+            completions_count=day["completions_count"],
+            principal_count=day["principal_count"],
+            recommended_count=day["recommended_count"],
+            categories_points=day["categories"],
+            emotions=day["emotions"],
+            activities=day["activities"],
+            emotion_entries=day["emotion_entries"],
+            updated_at=now,
+        ))
+
+    return len(touched)
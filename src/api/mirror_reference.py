@@ -0,0 +1,307 @@
+"""
+Implementación ORIGINAL del payload de /mirror/range|week|month, copiada tal
+cual de api/routes.py antes del rollup (commit baseline). No editar: es la
+referencia contra la que `flask verify-mirror-aggregation` compara byte a byte
+los modos rollup / sql / orm de api/mirror.py.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone, date
+
+from api.models import (
+    DailySession,
+    Activity,
+    ActivityCompletion,
+    Emotion,
+    EmotionCheckin,
+    SessionType,
+    ActivityCategory,
+)
+
+
+def _daterange_days(start_date: date, end_date: date):
+    days = []
+    d = start_date
+    while d <= end_date:
+        days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def _calc_streak(flags_by_date):
+    """
+    flags_by_date: lista bool en orden cronológico (True = día consistente)
+    current: racha desde el final
+    best: máxima racha
+    """
+    best = 0
+    tmp = 0
+    for f in flags_by_date:
+        if f:
+            tmp += 1
+            best = max(best, tmp)
+        else:
+            tmp = 0
+
+    cur = 0
+    for f in reversed(flags_by_date):
+        if f:
+            cur += 1
+        else:
+            break
+
+    return cur, best
+
+
+def _utc_iso(dt: datetime):
+    if not dt:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def build_mirror_range_payload(user_id: int, start_date, end_date):
+    # 1) sesiones en rango
+    sessions = (
+        DailySession.query
+        .filter(
+            DailySession.user_id == user_id,
+            DailySession.session_date >= start_date,
+            DailySession.session_date <= end_date
+        )
+        .all()
+    )
+
+    # 2) inicializa days map (siempre incluye todos los días aunque no haya datos)
+    days_map = {}
+    for d in _daterange_days(start_date, end_date):
+        iso = d.isoformat()
+        days_map[iso] = {
+            "date": iso,
+            "points_total": 0,
+            "points_day": 0,
+            "points_night": 0,
+            "completions_count": 0,
+            "principal_count": 0,      # points_awarded >= 10
+            "recommended_count": 0,    # points_awarded == 20
+            "categories": {},          # {cat_name: points}
+            "emotions": {},            # {emotion_name: {count, intensity_avg}}
+            "emotion_entries": [],     # [{name,intensity,note,created_at}]
+            # [{name,category_name,points,session_type,completed_at,external_id}]
+            "activities": [],
+        }
+
+    # 3) puntos day/night por sesión
+    session_ids = []
+    session_by_id = {}
+
+    for s in sessions:
+        session_ids.append(s.id)
+        session_by_id[s.id] = s
+
+        key = s.session_date.isoformat()
+        pts = int(s.points_earned or 0)
+
+        if key in days_map:
+            days_map[key]["points_total"] += pts
+            if s.session_type == SessionType.day:
+                days_map[key]["points_day"] += pts
+            else:
+                days_map[key]["points_night"] += pts
+
+    # si no hay sesiones, devolvemos vacío pero con días
+    if not session_ids:
+        days_list = list(days_map.values())
+        flags = [False for _ in days_list]
+        cur, best = _calc_streak(flags)
+        return {
+            "range": {
+                "start": start_date.isoformat(),
+                "end": end_date.isoformat(),
+                "days": len(days_list),
+                "timezone": "UTC"
+            },
+            "days": days_list,
+            "totals": {
+                "points_total": 0,
+                "completions_total": 0,
+                "principal_days": 0,
+                "recommended_days": 0
+            },
+            "streak": {"current": cur, "best": best},
+            "distributions": {"categories_points": {}, "emotions": {}},
+        }
+
+    # 4) completions + categorías + ACTIVITIES[] por día
+    completions = (
+        ActivityCompletion.query
+        .join(Activity, ActivityCompletion.activity_id == Activity.id)
+        .join(ActivityCategory, Activity.category_id == ActivityCategory.id)
+        .filter(ActivityCompletion.daily_session_id.in_(session_ids))
+        .all()
+    )
+
+    dist_cat_points = defaultdict(int)
+
+    for c in completions:
+        s = session_by_id.get(c.daily_session_id)
+        if not s:
+            continue
+
+        day_key = s.session_date.isoformat()
+        if day_key not in days_map:
+            continue
+
+        pts = int(c.points_awarded or 0)
+        cat_name = "General"
+        act_name = "Actividad"
+
+        if c.activity:
+            act_name = c.activity.name or act_name
+            if c.activity.category:
+                cat_name = c.activity.category.name or cat_name
+
+        days_map[day_key]["completions_count"] += 1
+        if pts >= 10:
+            days_map[day_key]["principal_count"] += 1
+        if pts == 20:
+            days_map[day_key]["recommended_count"] += 1
+
+        # puntos por categoría por día
+        day_cats = days_map[day_key]["categories"]
+        day_cats[cat_name] = int(day_cats.get(cat_name, 0)) + pts
+
+        # distribución global por categoría
+        dist_cat_points[cat_name] += pts
+
+        # DRILLDOWN: lista de actividades del día
+        completed_at = None
+        try:
+            completed_at = c.completed_at.isoformat() + "Z" if c.completed_at else None
+        except Exception:
+            completed_at = None
+
+        days_map[day_key]["activities"].append({
+            "external_id": c.activity.external_id if c.activity else None,
+            "name": c.activity.name if c.activity else "Actividad",
+            "category_name": cat_name,
+            "points": pts,
+            "session_type": s.session_type.value,
+            "completed_at": (c.completed_at.isoformat() + "Z") if c.completed_at else None,
+        })
+
+    # ordena activities por hora (si existe)
+    for d in days_map.values():
+        d["activities"].sort(key=lambda x: (x.get("completed_at") or ""))
+
+    # 5) emociones (freq + intensidad avg)
+    checkins = (
+        EmotionCheckin.query
+        .join(DailySession, EmotionCheckin.daily_session_id == DailySession.id)
+        .join(Emotion, EmotionCheckin.emotion_id == Emotion.id)
+        .filter(DailySession.id.in_(session_ids))
+        .all()
+    )
+
+    dist_emotions = {}  # name -> {count, intensity_sum, intensity_count}
+
+    for ch in checkins:
+        s = session_by_id.get(ch.daily_session_id)
+        if not s:
+            continue
+
+        day_key = s.session_date.isoformat()
+        if day_key not in days_map:
+            continue
+
+        name = ch.emotion.name if ch.emotion else "Desconocida"
+
+        days_map[day_key]["emotion_entries"].append({
+            "name": name,
+            "intensity": int(ch.intensity) if ch.intensity is not None else None,
+            "note": ch.note if ch.note else None,
+            "created_at": (ch.created_at.isoformat() + "Z") if ch.created_at else None
+        })
+
+        # por día
+        day_em = days_map[day_key]["emotions"].get(
+            name, {"count": 0, "intensity_sum": 0, "intensity_count": 0})
+        day_em["count"] += 1
+        if ch.intensity is not None:
+            day_em["intensity_sum"] += int(ch.intensity)
+            day_em["intensity_count"] += 1
+        days_map[day_key]["emotions"][name] = day_em
+
+        # global
+        g = dist_emotions.get(
+            name, {"count": 0, "intensity_sum": 0, "intensity_count": 0})
+        g["count"] += 1
+        if ch.intensity is not None:
+            g["intensity_sum"] += int(ch.intensity)
+            g["intensity_count"] += 1
+        dist_emotions[name] = g
+
+    # normaliza intensity_avg (día + global)
+    for d in days_map.values():
+        for name, obj in list(d["emotions"].items()):
+            ic = obj.get("intensity_count", 0)
+            avg = (obj["intensity_sum"] / ic) if ic else None
+            d["emotions"][name] = {"count": obj["count"], "intensity_avg": avg}
+
+    dist_emotions_out = {}
+    for name, obj in dist_emotions.items():
+        ic = obj.get("intensity_count", 0)
+        avg = (obj["intensity_sum"] / ic) if ic else None
+        dist_emotions_out[name] = {"count": obj["count"], "intensity_avg": avg}
+
+    for da in days_map.values():
+        da["emotion_entries"].sort(key=lambda x: (
+            x.get("created_at") or ""), reverse=True)
+
+    # 6) totales + streak
+    days_list = list(days_map.values())
+
+    # Consistencia: día con >= 1 "principal" (points_awarded >= 10)
+    # IMPORTANTE: "racha actual" debe medirse hasta HOY, no hasta el final del rango
+    today_utc = datetime.now(timezone.utc).date()
+    cutoff_date = min(end_date, today_utc)
+
+    def _day_leq_cutoff(day_obj):
+        try:
+            d = date.fromisoformat(day_obj["date"])
+            return d <= cutoff_date
+        except Exception:
+            # Si por algún motivo falla el parseo, no bloqueamos el streak
+            return True
+
+    consistency_flags_all = [d["principal_count"] > 0 for d in days_list]
+    consistency_flags_upto_today = [
+        d["principal_count"] > 0 for d in days_list if _day_leq_cutoff(d)]
+
+    # Best streak puede calcularse con todo el rango (da igual que haya futuros a False, no reduce el máximo),
+    # pero current streak debe excluir días futuros.
+    _, streak_best = _calc_streak(consistency_flags_all)
+    streak_cur, _ = _calc_streak(consistency_flags_upto_today)
+
+    totals = {
+        "points_total": sum(int(d["points_total"] or 0) for d in days_list),
+        "completions_total": sum(int(d["completions_count"] or 0) for d in days_list),
+        "principal_days": sum(1 for d in days_list if (d["principal_count"] or 0) > 0),
+        "recommended_days": sum(1 for d in days_list if (d["recommended_count"] or 0) > 0),
+    }
+
+    return {
+        "range": {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "days": len(days_list),
+            "timezone": "UTC"
+        },
+        "days": days_list,
+        "totals": totals,
+        "streak": {"current": streak_cur, "best": streak_best},
+        "distributions": {
+            "categories_points": dict(dist_cat_points),
+            "emotions": dist_emotions_out
+        },
+    }
@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Boolean, Integer, Time, DateTime, Date, ForeignKey, UniqueConstraint, Index, CheckConstraint
+from sqlalchemy import String, Boolean, Integer, Time, DateTime, Date, ForeignKey, UniqueConstraint, Index, CheckConstraint, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 from datetime import datetime, date, time, timezone
@@ -9,6 +9,9 @@ from werkzeug.security import generate_password_hash, check_password_hash
 
 db = SQLAlchemy()
 
+# serialize(): datetime / date / Enum se devuelven tal cual; el proveedor JSON
+# (api/json_provider.py) los codifica como "...Z" / "YYYY-MM-DD" / .value
+
 # ENUMS
 
 
@@ -99,6 +102,10 @@ class User(db.Model):
     welcome_email_sent_at: Mapped[datetime |
                                   None] = mapped_column(DateTime, nullable=True)
 
+    # Se incrementa en cada escritura que cambia datos del usuario (cache de mirror)
+    data_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0")
+
     # Relationships
     sessions: Mapped[list["DailySession"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
@@ -109,6 +116,9 @@ class User(db.Model):
     reminders: Mapped[list["Reminder"]] = relationship(
         back_populates="user", cascade="all, delete-orphan"
     )
+    daily_stats: Mapped[list["UserDailyStats"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan"
+    )
 
     def serialize(self):
         return {
@@ -120,9 +130,9 @@ class User(db.Model):
             "day_start_time": self.day_start_time.strftime("%H:%M"),
             "night_start_time": self.night_start_time.strftime("%H:%M"),
             "is_email_verified": self.is_email_verified,
-            "created_at": self.created_at.isoformat() + "Z",
-            "last_login_at": self.last_login_at.isoformat() + "Z" if self.last_login_at else None,
-            "last_activity_at": self.last_activity_at.isoformat() + "Z" if self.last_activity_at else None,
+            "created_at": self.created_at,
+            "last_login_at": self.last_login_at,
+            "last_activity_at": self.last_activity_at,
             "emails_enabled": self.emails_enabled,
         }
 
@@ -178,11 +188,92 @@ class DailySession(db.Model):
         return {
             "id": self.id,
             "user_id": self.user_id,
-            "session_date": self.session_date.isoformat(),
-            "session_type": self.session_type.value,
+            "session_date": self.session_date,
+            "session_type": self.session_type,
             "points_earned": self.points_earned,
             "is_active": self.is_active,
-            "created_at": self.created_at.isoformat() + "Z",
+            "created_at": self.created_at,
+        }
+
+# VERSION DE CATALOGOS (ETag de /activities, /emotions)
+
+
+class CatalogVersion(db.Model):
+    __tablename__ = "catalog_versions"
+
+    # "activities" | "emotions"
+    name: Mapped[str] = mapped_column(String(40), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow)
+
+    def serialize(self):
+        return {
+            "name": self.name,
+            "version": self.version,
+            "updated_at": self.updated_at,
+        }
+
+# ROLLUP DIARIO (mirror)
+
+
+class UserDailyStats(db.Model):
+    """
+    Agregado por usuario y día que alimenta /mirror/week|month|range.
+    Lo mantienen complete_activity, create_emotion_checkin y complete_goal.
+    """
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("user_id", "stat_date",
+                         name="uq_daily_stats_user_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    stat_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    points_day: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    points_night: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0)
+
+    completions_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0)
+    principal_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0)
+    recommended_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0)
+
+    # {cat_name: points}
+    categories_points: Mapped[dict] = mapped_column(
+        JSON, nullable=False, default=dict)
+    # {emotion_name: {count, intensity_sum, intensity_count}}
+    emotions: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+
+    # Drilldown del día (mismo formato que el payload de mirror)
+    activities: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    emotion_entries: Mapped[list] = mapped_column(
+        JSON, nullable=False, default=list)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow)
+
+    user: Mapped["User"] = relationship(back_populates="daily_stats")
+
+    def serialize(self):
+        return {
+            "user_id": self.user_id,
+            "stat_date": self.stat_date,
+            "points_day": self.points_day,
+            "points_night": self.points_night,
+            "points_total": self.points_day + self.points_night,
+            "completions_count": self.completions_count,
+            "principal_count": self.principal_count,
+            "recommended_count": self.recommended_count,
+            "categories_points": self.categories_points,
+            "emotions": self.emotions,
         }
 
 # EMOTION y CHECKINS
@@ -249,7 +340,7 @@ class EmotionCheckin(db.Model):
             "emotion_id": self.emotion_id,
             "intensity": self.intensity,
             "note": self.note,
-            "created_at": self.created_at.isoformat() + "Z",
+            "created_at": self.created_at,
         }
 
 
@@ -311,7 +402,7 @@ class Activity(db.Model):
             "category_id": self.category_id,
             "name": self.name,
             "description": self.description,
-            "activity_type": self.activity_type.value,
+            "activity_type": self.activity_type,
             "is_active": self.is_active,
         }
 
@@ -361,7 +452,7 @@ class ActivityCompletion(db.Model):
             "daily_session_id": self.daily_session_id,
             "activity_id": self.activity_id,
             "points_awarded": self.points_awarded,
-            "completed_at": self.completed_at.isoformat() + "Z",
+            "completed_at": self.completed_at,
         }
 
 # GOALS  SESSIONLINK  PROGRESS
@@ -441,22 +532,22 @@ class Goal(db.Model):
 
             "goal_type": self.goal_type,
             "frequency": self.frequency,
-            "start_date": self.start_date.isoformat() if self.start_date else None,
-            "end_date": self.end_date.isoformat() if self.end_date else None,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
 
             "goal_type": self.goal_type,
             "frequency": self.frequency,
-            "start_date": self.start_date.isoformat() if self.start_date else None,
-            "end_date": self.end_date.isoformat() if self.end_date else None,
-            "size": self.size.value,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "size": self.size,
             "target_value": self.target_value,
             "current_value": self.current_value,
             "points_reward": int(self.points_reward or 0),
 
             "points_reward": int(self.points_reward or 0),
             "is_active": self.is_active,
-            "completed_at": self.completed_at.isoformat() + "Z" if self.completed_at else None,
-            "created_at": self.created_at.isoformat() + "Z",
+            "completed_at": self.completed_at,
+            "created_at": self.created_at,
         }
 
 
@@ -520,7 +611,7 @@ class GoalTemplate(db.Model):
             "title": self.title,
             "description": self.description,
             "frequency": self.frequency,
-            "size": self.size.value,
+            "size": self.size,
             "target_value": self.target_value,
             "points_reward": self.points_reward,
             "is_active": self.is_active,
@@ -562,9 +653,9 @@ class DailySessionGoal(db.Model):
             "id": self.id,
             "daily_session_id": self.daily_session_id,
             "goal_id": self.goal_id,
-            "status": self.status.value,
+            "status": self.status,
             "note": self.note,
-            "created_at": self.created_at.isoformat() + "Z",
+            "created_at": self.created_at,
         }
 
 
@@ -599,11 +690,33 @@ class GoalProgress(db.Model):
             "daily_session_id": self.daily_session_id,
             "delta_value": self.delta_value,
             "note": self.note,
-            "created_at": self.created_at.isoformat() + "Z",
+            "created_at": self.created_at,
         }
 
 # REMINDERS (loops)
 
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+ALL_DAYS_MASK = 0b1111111
+
+
+def days_to_mask(days_of_week: str | None) -> int:
+    """"daily" -> 127; "mon,wed" -> 0b101 (bit 0 = lunes, como date.weekday())."""
+    if not days_of_week or days_of_week == "daily":
+        return ALL_DAYS_MASK
+    mask = 0
+    for d in days_of_week.split(","):
+        d = d.strip().lower()
+        if d in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(d)
+    return mask
+
+
+def mask_to_days(mask: int) -> str:
+    """Inversa de days_to_mask: 127 -> "daily"; 0b101 -> "mon,wed"."""
+    if mask == ALL_DAYS_MASK:
+        return "daily"
+    return ",".join(d for i, d in enumerate(WEEKDAYS) if mask & (1 << i))
+
 
 class Reminder(db.Model):
     __tablename__ = "reminders"
@@ -611,6 +724,7 @@ class Reminder(db.Model):
         Index("ix_reminders_user", "user_id"),
         Index("ix_reminders_user_type_active",
               "user_id", "reminder_type", "is_active"),
+        Index("ix_reminders_next_due_at", "next_due_at"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -631,26 +745,156 @@ class Reminder(db.Model):
     inactive_after_minutes: Mapped[int | None] = mapped_column(
         Integer, nullable=True)
 
-    # simple: "daily" o "mon,tue,wed"
-    days_of_week: Mapped[str] = mapped_column(
-        String(40), nullable=False, default="daily")
+    # días como bitmask de 7 bits (bit 0 = lunes); la API sigue usando
+    # "daily" / "mon,tue,wed" a través de la propiedad days_of_week
+    days_mask: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=ALL_DAYS_MASK)
 
     last_sent_at: Mapped[datetime | None] = mapped_column(
         DateTime, nullable=True)
+    # mode=fixed: próximo envío en UTC (naive), calculado desde local_time,
+    # User.timezone y days_of_week (ver api/fixed_reminders.py)
+    next_due_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True)
     is_active: Mapped[bool] = mapped_column(
         Boolean, nullable=False, default=True)
 
     user: Mapped["User"] = relationship(back_populates="reminders")
 
+    @property
+    def days_of_week(self) -> str:
+        return mask_to_days(ALL_DAYS_MASK if self.days_mask is None else self.days_mask)
+
+    @days_of_week.setter
+    def days_of_week(self, value: str):
+        self.days_mask = days_to_mask(value)
+
     def serialize(self):
         return {
             "id": self.id,
             "user_id": self.user_id,
-            "reminder_type": self.reminder_type.value,
-            "mode": self.mode.value,
+            "reminder_type": self.reminder_type,
+            "mode": self.mode,
             "local_time": self.local_time.strftime("%H:%M") if self.local_time else None,
             "inactive_after_minutes": self.inactive_after_minutes,
             "days_of_week": self.days_of_week,
-            "last_sent_at": self.last_sent_at.isoformat() + "Z" if self.last_sent_at else None,
+            "last_sent_at": self.last_sent_at,
+            "next_due_at": self.next_due_at,
             "is_active": self.is_active,
         }
+
+# OUTBOX DE EMAILS (Loops)
+
+
+class EmailOutbox(db.Model):
+    """
+    Emails transaccionales pendientes. Se escriben en la misma transacción que
+    el cambio del usuario y los envía `flask drain-email-outbox` (ver api/outbox.py).
+    status: pending -> sending -> sent | dead (tras max_attempts)
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    user_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+
+    # "verify_email" | "welcome" | "password_reset"
+    kind: Mapped[str] = mapped_column(String(40), nullable=False)
+    to_email: Mapped[str] = mapped_column(String(120), nullable=False)
+    # kwargs del sender (sin el email)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=8)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow)
+    last_error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    locked_by: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "kind": self.kind,
+            "to_email": self.to_email,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "next_attempt_at": self.next_attempt_at,
+            "last_error": self.last_error,
+            "created_at": self.created_at,
+            "sent_at": self.sent_at,
+        }
+
+
+# CHECKPOINTS DE TAREAS (CLI)
+
+
+class TaskCheckpoint(db.Model):
+    """
+    Cursor reanudable de tareas largas por lotes (ej: "send-reminders:0/4").
+    Se actualiza en la misma transacción que cada lote procesado.
+    """
+    __tablename__ = "task_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(80), primary_key=True)
+    # último id procesado (keyset)
+    cursor: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # "now" de la corrida: al reanudar se usa el mismo corte
+    run_started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    stats: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow)
+
+    def serialize(self):
+        return {
+            "name": self.name,
+            "cursor": self.cursor,
+            "run_started_at": self.run_started_at,
+            "finished_at": self.finished_at,
+            "stats": self.stats,
+            "updated_at": self.updated_at,
+        }
+
+
+# IDEMPOTENCY-KEY (reintentos de clientes)
+
+
+class IdempotencyKey(db.Model):
+    """
+    Respuesta guardada por (usuario, Idempotency-Key) para las escrituras que
+    suman puntos: un reintento recibe la misma respuesta sin volver a escribir.
+    status_code NULL = request en curso (ver api/idempotency.py).
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_user_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key: Mapped[str] = mapped_column(String(128), nullable=False)
+    # sha256 de método + ruta + body: la misma key con otro body es un error del cliente
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
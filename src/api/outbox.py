@@ -0,0 +1,180 @@
+"""
+Outbox de emails transaccionales (Loops).
+
+Las rutas solo hacen `enqueue_email(...)` dentro de su transacción; el envío real
+ocurre fuera del request:
+
+    $ flask drain-email-outbox              # una pasada (cron)
+    $ flask drain-email-outbox --loop       # worker continuo (Procfile: worker)
+
+o, en despliegues de un solo proceso, con EMAIL_OUTBOX_WORKER=thread (un hilo
+por worker de gunicorn, arrancado en la primera request).
+
+Cada fila se reclama con un UPDATE condicional (compare-and-set sobre status),
+así varios workers pueden drenar a la vez sin enviar dos veces. Los fallos se
+reintentan con backoff exponencial + jitter; tras max_attempts (o ante un 4xx
+definitivo de Loops) la fila queda en status "dead" (visible en el admin,
+reencolable con --requeue-dead).
+"""
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, or_, and_
+
+from api.models import db, EmailOutbox
+from api.service_loops.verify_email import send_verify_email
+from api.service_loops.welcome_user import send_welcome_transactional
+from api.service_loops.reset_password import send_password_reset
+from api.service_loops.client import LoopsError
+
+
+BACKOFF_BASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_BASE", "30"))
+BACKOFF_MAX_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX", "3600"))
+LEASE_SECONDS = 300  # "sending" más viejo que esto se considera abandonado
+
+_SENDERS = {
+    "verify_email": send_verify_email,
+    "welcome": send_welcome_transactional,
+    "password_reset": send_password_reset,
+}
+
+
+def enqueue_email(kind: str, to_email: str, payload: dict, user_id: int | None = None):
+    """Agrega el email a la transacción actual (sin commit)."""
+    if kind not in _SENDERS:
+        raise ValueError(f"Tipo de email desconocido: {kind}")
+    row = EmailOutbox(kind=kind, to_email=to_email, payload=payload, user_id=user_id,
+                      status="pending", next_attempt_at=datetime.utcnow())
+    db.session.add(row)
+    return row
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"[:64]
+
+
+def _claim_batch(batch_size: int, worker: str):
+    now = datetime.utcnow()
+    claimable = or_(
+        and_(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == "sending",
+             EmailOutbox.locked_at < now - timedelta(seconds=LEASE_SECONDS)),
+    )
+    candidates = db.session.execute(
+        select(EmailOutbox.id).where(claimable)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(batch_size)
+    ).scalars().all()
+
+    claimed = []
+    for outbox_id in candidates:
+        res = db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == outbox_id, claimable)
+            .values(status="sending", locked_at=now, locked_by=worker)
+        )
+        if res.rowcount == 1:
+            claimed.append(outbox_id)
+    db.session.commit()
+
+    if not claimed:
+        return []
+    return db.session.execute(
+        select(EmailOutbox).where(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id)
+    ).scalars().all()
+
+
+def _dispatch(row: EmailOutbox) -> str:
+    now = datetime.utcnow()
+    try:
+        # misma key en todos los intentos de la fila: Loops descarta duplicados
+        _SENDERS[row.kind](email=row.to_email, idempotency_key=f"email-outbox-{row.id}",
+                           **dict(row.payload or {}))
+    except Exception as e:
+        row.attempts += 1
+        row.last_error = repr(e)[:500]
+        row.locked_at = None
+        row.locked_by = None
+        permanent = isinstance(e, LoopsError) and not e.retryable
+        if permanent or row.attempts >= row.max_attempts:
+            row.status = "dead"
+        else:
+            row.status = "pending"
+            row.next_attempt_at = now + _backoff(row.attempts)
+        return row.status
+
+    row.attempts += 1
+    row.status = "sent"
+    row.sent_at = now
+    row.last_error = None
+    row.locked_at = None
+    row.locked_by = None
+    return "sent"
+
+
+def drain_outbox(batch_size: int = 50, max_batches: int | None = None):
+    """Envía lo pendiente en lotes. Commit por email enviado. Devuelve contadores."""
+    worker = _worker_id()
+    stats = {"sent": 0, "retry": 0, "dead": 0}
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        rows = _claim_batch(batch_size, worker)
+        if not rows:
+            break
+        batches += 1
+        for row in rows:
+            result = _dispatch(row)
+            db.session.commit()
+            stats["retry" if result == "pending" else result] += 1
+
+    return stats
+
+
+def requeue_dead() -> int:
+    res = db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == "dead")
+        .values(status="pending", attempts=0, next_attempt_at=datetime.utcnow(),
+                locked_at=None, locked_by=None)
+    )
+    db.session.commit()
+    return res.rowcount
+
+
+def setup_outbox(app):
+    """EMAIL_OUTBOX_WORKER=thread: drena en un hilo daemon (uno por proceso)."""
+    if os.getenv("EMAIL_OUTBOX_WORKER") != "thread":
+        return
+
+    interval = float(os.getenv("EMAIL_OUTBOX_INTERVAL", "5"))
+    started = {"pid": None}
+    lock = threading.Lock()
+
+    def _run():
+        while True:
+            try:
+                with app.app_context():
+                    drain_outbox()
+            except Exception as e:
+                print("Email outbox worker error:", repr(e))
+            time.sleep(interval)
+
+    @app.before_request
+    def _start_outbox_thread():
+        # lazy: después del fork de gunicorn, una vez por proceso
+        if started["pid"] == os.getpid():
+            return
+        with lock:
+            if started["pid"] != os.getpid():
+                threading.Thread(target=_run, name="email-outbox", daemon=True).start()
+                started["pid"] = os.getpid()
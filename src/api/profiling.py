@@ -0,0 +1,134 @@
+"""
+Profiling opt-in de una request puntual (cProfile).
+
+Se activa enviando los headers:
+
+    X-Profile: 1
+    X-Internal-Token: <INTERNAL_TASK_TOKEN>
+
+La request se ejecuta bajo cProfile y el resultado se guarda como .prof
+(pstats) en PROFILE_DIR. La respuesta trae `X-Profile-Id` con el nombre del
+archivo, que se puede ver/descargar desde el admin (Profiles).
+
+    python -m pstats <archivo>.prof       # o snakeviz <archivo>.prof
+"""
+import os
+import io
+import re
+import time
+import cProfile
+import pstats
+import tempfile
+from datetime import datetime, timezone
+
+from flask import g, request
+
+
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR", os.path.join(tempfile.gettempdir(), "place-between-profiles")
+)
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.\-]+\.prof$")
+
+
+def _profiling_requested() -> bool:
+    if request.headers.get("X-Profile") not in ("1", "true"):
+        return False
+    token = os.getenv("INTERNAL_TASK_TOKEN")
+    return bool(token) and request.headers.get("X-Internal-Token") == token
+
+
+def _profile_filename(status_code: int, elapsed_ms: float) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    endpoint = re.sub(r"[^A-Za-z0-9_]+", "-", request.endpoint or "unmatched")
+    return f"{stamp}_{request.method}_{endpoint}_{status_code}_{int(elapsed_ms)}ms.prof"
+
+
+def _prune_profiles():
+    files = sorted(list_profiles(), key=lambda p: p["name"], reverse=True)
+    for old in files[PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, old["name"]))
+        except OSError:
+            pass
+
+
+def _stop_profiler():
+    profiler = g.pop("_profiler", None)
+    if profiler is not None:
+        profiler.disable()
+    return profiler
+
+
+def list_profiles():
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    out = []
+    for name in os.listdir(PROFILE_DIR):
+        if not _SAFE_NAME.match(name):
+            continue
+        st = os.stat(os.path.join(PROFILE_DIR, name))
+        out.append({
+            "name": name,
+            "size": st.st_size,
+            "created_at": datetime.fromtimestamp(st.st_mtime, timezone.utc),
+        })
+    return sorted(out, key=lambda p: p["name"], reverse=True)
+
+
+def profile_path(name: str):
+    """Ruta absoluta de un profile guardado, o None si el nombre no es válido."""
+    if not _SAFE_NAME.match(name or ""):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def profile_summary(name: str, limit: int = 40, sort: str = "cumulative"):
+    path = profile_path(name)
+    if path is None:
+        return None
+    buf = io.StringIO()
+    stats = pstats.Stats(path, stream=buf)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return buf.getvalue()
+
+
+def setup_profiling(app):
+    @app.before_request
+    def _start_profiler():
+        if not _profiling_requested():
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # ya hay otro profiler activo en este proceso
+            return
+        g._profiler = profiler
+        g._profile_start = time.perf_counter()
+
+    @app.after_request
+    def _save_profile(response):
+        profiler = _stop_profiler()
+        if profiler is None:
+            return response
+
+        elapsed_ms = (time.perf_counter() - g.pop("_profile_start")) * 1000
+        name = _profile_filename(response.status_code, elapsed_ms)
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+            _prune_profiles()
+        except OSError as e:
+            print("No se pudo guardar el profile:", repr(e))
+            return response
+
+        response.headers["X-Profile-Id"] = name
+        return response
+
+    @app.teardown_request
+    def _discard_profiler(exc):
+        # si la vista explotó, after_request no corrió: no dejar el profiler activo
+        _stop_profiler()
@@ -0,0 +1,141 @@
+"""
+Read models para los GET de solo lectura (/goals, /activities, /emotions,
+/mirror/today, /reminders).
+
+Cada DTO es un dataclass con __slots__ cuyos campos se llaman igual que las
+columnas del modelo: se cargan con un select(...) de esas columnas, sin
+instanciar el modelo ORM (sin identity map, sin estado de instrumentación, sin
+relaciones que puedan disparar lazy loads):
+
+    goals = GoalRead.fetch(GoalRead.select().where(Goal.user_id == user_id))
+    return jsonify([g.serialize() for g in goals]), 200
+
+serialize() devuelve exactamente el mismo dict que Model.serialize(), así que
+el JSON no cambia. Si se agrega un campo a un serialize() del modelo, va también
+acá.
+"""
+from dataclasses import dataclass, fields
+from datetime import date, datetime, time
+from typing import ClassVar
+
+from sqlalchemy import select
+
+from api.models import (
+    db, Goal, GoalSize, Activity, ActivityType, Emotion, DailySession, SessionType,
+    Reminder, ReminderType, ReminderMode, ALL_DAYS_MASK, mask_to_days,
+)
+
+
+class ReadModel:
+    __slots__ = ()
+    __model__: ClassVar[type]
+
+    @classmethod
+    def columns(cls):
+        return [getattr(cls.__model__, f.name) for f in fields(cls)]
+
+    @classmethod
+    def select(cls):
+        return select(*cls.columns())
+
+    @classmethod
+    def fetch(cls, stmt) -> list:
+        """Ejecuta un select() de columns() (con sus where/order_by) y arma los DTOs."""
+        return [cls(*row) for row in db.session.execute(stmt)]
+
+    def serialize(self):
+        # con slots=True, __slots__ son los campos en orden de declaración
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True, frozen=True)
+class EmotionRead(ReadModel):
+    __model__: ClassVar[type] = Emotion
+
+    id: int
+    name: str
+    description: str | None
+    value: int | None
+    url_music: str | None
+
+
+@dataclass(slots=True, frozen=True)
+class ActivityRead(ReadModel):
+    __model__: ClassVar[type] = Activity
+
+    id: int
+    external_id: str
+    category_id: int
+    name: str
+    description: str | None
+    activity_type: ActivityType
+    is_active: bool
+
+
+@dataclass(slots=True, frozen=True)
+class DailySessionRead(ReadModel):
+    __model__: ClassVar[type] = DailySession
+
+    id: int
+    user_id: int
+    session_date: date
+    session_type: SessionType
+    points_earned: int
+    is_active: bool
+    created_at: datetime
+
+
+@dataclass(slots=True, frozen=True)
+class GoalRead(ReadModel):
+    __model__: ClassVar[type] = Goal
+
+    id: int
+    user_id: int
+    title: str
+    description: str | None
+    goal_type: str | None
+    frequency: str | None
+    start_date: date | None
+    end_date: date | None
+    size: GoalSize
+    target_value: int | None
+    current_value: int | None
+    points_reward: int
+    is_active: bool
+    completed_at: datetime | None
+    created_at: datetime
+
+    def serialize(self):
+        data = ReadModel.serialize(self)
+        data["points_reward"] = int(self.points_reward or 0)
+        return data
+
+
+@dataclass(slots=True, frozen=True)
+class ReminderRead(ReadModel):
+    __model__: ClassVar[type] = Reminder
+
+    id: int
+    user_id: int
+    reminder_type: ReminderType
+    mode: ReminderMode
+    local_time: time | None
+    inactive_after_minutes: int | None
+    days_mask: int | None
+    last_sent_at: datetime | None
+    next_due_at: datetime | None
+    is_active: bool
+
+    def serialize(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "reminder_type": self.reminder_type,
+            "mode": self.mode,
+            "local_time": self.local_time.strftime("%H:%M") if self.local_time else None,
+            "inactive_after_minutes": self.inactive_after_minutes,
+            "days_of_week": mask_to_days(ALL_DAYS_MASK if self.days_mask is None else self.days_mask),
+            "last_sent_at": self.last_sent_at,
+            "next_due_at": self.next_due_at,
+            "is_active": self.is_active,
+        }
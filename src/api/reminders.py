@@ -0,0 +1,379 @@
+"""
+Sweep de reminders de inactividad (POST /api/tasks/send-reminders).
+
+La selección es una sola query por lote: reminder activo inactive_nudge /
+inactivity + usuario verificado + EXISTS sesión + fuera de la ventana
+anti-duplicado de 1h + inactivo más allá del umbral. Se pagina por id
+(keyset).
+
+Por lote:
+  1. claim: UPDATE last_sent_at = now solo de los que siguen elegibles (commit).
+     Otro sweep concurrente ya no los ve (ventana de 1h).
+  2. envíos en paralelo (REMINDER_SEND_CONCURRENCY hilos; el rate limit por
+     proveedor lo aplica el cliente de Loops).
+  3. resultados en batch: éxito -> avanza etapa / desactiva en la 3;
+     fallo -> se devuelve last_sent_at al valor previo. Un commit.
+Si el proceso muere entre 1 y 3, el reintento (>1h después) usa el mismo
+Idempotency-Key (reminder + etapa + última actividad) y Loops no duplica.
+
+Fuera del request: `flask send-reminders --shard i/n` (ver run_reminder_shard)
+reparte por user_id % n y guarda un checkpoint por shard para reanudar.
+
+Con debug (force / FLASK_DEBUG) el payload lista también por qué se saltó cada
+reminder activo (skipped_debug_rows): una query aparte, solo en ese modo.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, exists, func, or_, and_, bindparam
+
+from api.models import (
+    db, User, DailySession, Reminder, ReminderType, ReminderMode, TaskCheckpoint
+)
+from api.service_loops.inactive_reminder import send_inactive_reminder
+from api.sql_compat import minutes_before
+
+
+STEP_1 = 1440   # 24h
+STEP_2 = 2880   # 48h
+STEP_3 = 4320   # 72h
+
+ANTI_DUPLICATE_WINDOW = timedelta(hours=1)
+SWEEP_CHUNK_SIZE = int(os.getenv("REMINDER_SWEEP_CHUNK", "500"))
+SEND_CONCURRENCY = int(os.getenv("REMINDER_SEND_CONCURRENCY", "8"))
+STALE_RUN = timedelta(hours=6)
+DEBUG_ROWS_MAX = 50
+
+
+def next_stage(threshold: int):
+    """Etapa (1/2/3) del umbral guardado y el umbral siguiente (None = última)."""
+    if threshold <= STEP_1:
+        return 1, STEP_2
+    if threshold <= STEP_2:
+        return 2, STEP_3
+    return 3, None
+
+
+def parse_shard(raw: str):
+    """"i/n" -> (i, n), con 0 <= i < n."""
+    try:
+        i, n = (int(x) for x in raw.split("/"))
+    except (AttributeError, ValueError):
+        raise ValueError("shard debe tener la forma i/n (ej: 0/4)")
+    if n < 1 or not 0 <= i < n:
+        raise ValueError("shard fuera de rango: se espera 0 <= i < n")
+    return i, n
+
+
+def due_inactive_reminders(now: datetime, force: bool = False, after_id: int = 0,
+                           limit: int = SWEEP_CHUNK_SIZE, shard=None):
+    """
+    Reminders que tocan enviar ahora (un lote, ordenado por id > after_id).
+    `now` es UTC naive, como se guardan las fechas en la base.
+    shard=(i, n): solo usuarios con user_id % n == i.
+    """
+    threshold = func.coalesce(Reminder.inactive_after_minutes, STEP_1)
+    last_seen = func.coalesce(User.last_activity_at, User.last_login_at, User.created_at)
+
+    q = (
+        select(
+            Reminder.id,
+            Reminder.user_id,
+            Reminder.last_sent_at,
+            threshold.label("threshold"),
+            last_seen.label("last_seen"),
+            User.email,
+            User.username,
+        )
+        .join(User, User.id == Reminder.user_id)
+        .where(
+            Reminder.id > after_id,
+            Reminder.is_active.is_(True),
+            Reminder.reminder_type == ReminderType.inactive_nudge,
+            Reminder.mode == ReminderMode.inactivity,
+            User.is_email_verified.is_(True),
+            # SOLO después de la primera sesión
+            exists().where(DailySession.user_id == User.id),
+            # anti-duplicado por cron (1h)
+            or_(Reminder.last_sent_at.is_(None),
+                Reminder.last_sent_at <= now - ANTI_DUPLICATE_WINDOW),
+        )
+        .order_by(Reminder.id)
+        .limit(limit)
+    )
+    if shard is not None:
+        q = q.where(Reminder.user_id % shard[1] == shard[0])
+    if not force:
+        # respeta umbral (24/48/72): última actividad <= now - umbral
+        q = q.where(last_seen <= minutes_before(now, threshold))
+
+    return db.session.execute(q).all()
+
+
+def skipped_debug_rows(now: datetime, force: bool = False, shard=None,
+                       limit: int = DEBUG_ROWS_MAX):
+    """
+    Solo para debug (force / FLASK_DEBUG): por qué se salta cada reminder
+    activo que due_inactive_reminders no devuelve. Correr antes del sweep, que
+    mueve last_sent_at de los que envía.
+    """
+    threshold = func.coalesce(Reminder.inactive_after_minutes, STEP_1)
+    last_seen = func.coalesce(User.last_activity_at, User.last_login_at, User.created_at)
+    q = (
+        select(
+            Reminder.id,
+            Reminder.user_id,
+            Reminder.mode,
+            Reminder.last_sent_at,
+            threshold.label("threshold"),
+            last_seen.label("last_seen"),
+            User.id.label("found_user_id"),
+            User.is_email_verified,
+            exists().where(DailySession.user_id == Reminder.user_id).label("has_session"),
+        )
+        .outerjoin(User, User.id == Reminder.user_id)
+        .where(
+            Reminder.is_active.is_(True),
+            Reminder.reminder_type == ReminderType.inactive_nudge,
+        )
+        .order_by(Reminder.id)
+    )
+    if shard is not None:
+        q = q.where(Reminder.user_id % shard[1] == shard[0])
+
+    rows = []
+    for r in db.session.execute(q):
+        if len(rows) >= limit:
+            break
+        if r.found_user_id is None:
+            rows.append({"reminder_id": r.id, "reason": "user_not_found"})
+        elif not r.is_email_verified:
+            rows.append({"reminder_id": r.id, "user_id": r.user_id, "reason": "email_not_verified"})
+        elif r.mode != ReminderMode.inactivity:
+            rows.append({"reminder_id": r.id, "user_id": r.user_id, "reason": "mode_not_inactivity"})
+        elif not r.has_session:
+            # todavía sin primera sesión: se salta sin fila, como siempre
+            continue
+        elif r.last_sent_at and now - r.last_sent_at < ANTI_DUPLICATE_WINDOW:
+            rows.append({"reminder_id": r.id, "user_id": r.user_id, "reason": "sent_recently"})
+        elif not force:
+            diff_minutes = int((now - r.last_seen).total_seconds() // 60)
+            if diff_minutes < int(r.threshold):
+                rows.append({
+                    "reminder_id": r.id,
+                    "user_id": r.user_id,
+                    "reason": "below_threshold",
+                    "diff_minutes": diff_minutes,
+                    "threshold": int(r.threshold),
+                })
+    return rows
+
+
+def _eligible(now: datetime):
+    return and_(
+        Reminder.is_active.is_(True),
+        or_(Reminder.last_sent_at.is_(None),
+            Reminder.last_sent_at <= now - ANTI_DUPLICATE_WINDOW),
+    )
+
+
+def _claim(ids, now: datetime) -> set:
+    """Marca last_sent_at = now en los que siguen elegibles; devuelve los reclamados."""
+    if not ids:
+        return set()
+    stmt = (
+        update(Reminder)
+        .where(Reminder.id.in_(ids), _eligible(now))
+        .values(last_sent_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if db.engine.dialect.update_returning:
+        claimed = set(db.session.execute(stmt.returning(Reminder.id)).scalars())
+    else:
+        claimed = {
+            rid for rid in ids
+            if db.session.execute(stmt.where(Reminder.id == rid)).rowcount == 1
+        }
+    db.session.commit()
+    return claimed
+
+
+def _apply_results(succeeded, failed, claimed_at: datetime):
+    """Un executemany por tipo de resultado, solo sobre filas que siguen con nuestro claim."""
+    table = Reminder.__table__
+    ours = and_(table.c.id == bindparam("rid"), table.c.last_sent_at == bindparam("claimed_at"))
+    if succeeded:
+        db.session.execute(
+            update(table).where(ours).values(
+                inactive_after_minutes=bindparam("next_threshold"),
+                is_active=bindparam("still_active"),
+            ),
+            [{**row, "claimed_at": claimed_at} for row in succeeded],
+        )
+    if failed:
+        db.session.execute(
+            update(table).where(ours).values(last_sent_at=bindparam("previous")),
+            [{**row, "claimed_at": claimed_at} for row in failed],
+        )
+
+
+def _idempotency_key(r, stage: int) -> str:
+    anchor = r.last_seen.strftime("%Y%m%d%H%M%S") if r.last_seen else "0"
+    return f"inactive-{r.id}-s{stage}-{anchor}"
+
+
+def _send(r, stage: int, url_app: str):
+    """Corre en un hilo del pool: solo HTTP, sin tocar la sesión de DB."""
+    try:
+        send_inactive_reminder(
+            email=r.email,
+            username=r.username,
+            url_app=url_app,
+            stage=stage,
+            idempotency_key=_idempotency_key(r, stage),
+        )
+        return None
+    except Exception as e:
+        return e
+
+
+def sweep_inactive_reminders(now: datetime, force: bool = False, debug: bool = False,
+                             chunk_size: int = SWEEP_CHUNK_SIZE,
+                             concurrency: int = SEND_CONCURRENCY,
+                             shard=None, after_id: int = 0, on_chunk=None):
+    """
+    on_chunk(cursor, chunk_stats) se llama al cerrar cada lote, dentro de la
+    misma transacción que sus resultados (checkpoint atómico con el lote).
+    """
+    frontend_url = (os.getenv("VITE_FRONTEND_URL") or "").rstrip("/")
+    url_app = f"{frontend_url}/" if frontend_url else "/"
+
+    active_q = select(func.count(Reminder.id)).where(
+        Reminder.is_active.is_(True),
+        Reminder.reminder_type == ReminderType.inactive_nudge,
+    )
+    if shard is not None:
+        active_q = active_q.where(Reminder.user_id % shard[1] == shard[0])
+    active = db.session.execute(active_q).scalar() or 0
+
+    due = sent = errors = 0
+    debug_rows = []
+    # motivos de salto antes de que el sweep toque last_sent_at
+    skipped_rows = skipped_debug_rows(now, force=force, shard=shard) if debug else []
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency),
+                            thread_name_prefix="reminder-send") as pool:
+        while True:
+            batch = due_inactive_reminders(now, force=force, after_id=after_id,
+                                           limit=chunk_size, shard=shard)
+            if not batch:
+                break
+            after_id = batch[-1].id
+            due += len(batch)
+
+            claimed = _claim([r.id for r in batch], now)
+            work = [(r, next_stage(int(r.threshold))) for r in batch if r.id in claimed]
+            results = pool.map(lambda item: _send(item[0], item[1][0], url_app), work)
+
+            succeeded, failed = [], []
+            for (r, (stage, next_threshold)), error in zip(work, results):
+                if error is not None:
+                    print("Error Loops inactive reminder:", repr(error))
+                    errors += 1
+                    failed.append({"rid": r.id, "previous": r.last_sent_at})
+                    continue
+
+                succeeded.append({
+                    "rid": r.id,
+                    # última etapa: se conserva el umbral y se desactiva (STOP definitivo)
+                    "next_threshold": next_threshold or int(r.threshold),
+                    "still_active": next_threshold is not None,
+                })
+                sent += 1
+                if debug and len(debug_rows) < DEBUG_ROWS_MAX:
+                    debug_rows.append({"reminder_id": r.id, "user_id": r.user_id, "stage": stage})
+
+            _apply_results(succeeded, failed, now)
+            if on_chunk is not None:
+                on_chunk(after_id, {"due": len(batch), "sent": len(succeeded),
+                                    "errors": len(failed)})
+            db.session.commit()
+
+            if len(batch) < chunk_size:
+                break
+
+    payload = {
+        "ok": True,
+        "processed": active,
+        "due": due,
+        "sent": sent,
+        "skipped": active - due,
+        "errors": errors,
+        "force": force,
+    }
+    if debug:
+        payload["debug"] = skipped_rows + debug_rows
+    return payload
+
+
+def _checkpoint_name(shard) -> str:
+    i, n = shard
+    return f"send-reminders:{i}/{n}"
+
+
+def run_reminder_shard(shard=(0, 1), chunk_size: int = SWEEP_CHUNK_SIZE,
+                       concurrency: int = SEND_CONCURRENCY, restart: bool = False,
+                       progress=print):
+    """
+    Sweep de un shard con checkpoint en task_checkpoints. Si la corrida anterior
+    quedó a medias, continúa desde su cursor y con su mismo `now`.
+    """
+    name = _checkpoint_name(shard)
+    cp = db.session.get(TaskCheckpoint, name)
+    now = datetime.utcnow()
+    # una corrida a medias muy vieja no se reanuda: sus umbrales ya no valen
+    stale = cp is not None and cp.run_started_at < now - STALE_RUN
+
+    if cp is None or cp.finished_at is not None or restart or stale:
+        if cp is None:
+            cp = TaskCheckpoint(name=name, run_started_at=now)
+            db.session.add(cp)
+        cp.cursor = 0
+        cp.run_started_at = now
+        cp.finished_at = None
+        cp.stats = {"due": 0, "sent": 0, "errors": 0}
+        cp.updated_at = now
+        db.session.commit()
+    else:
+        progress(f"[{name}] resuming from reminder id > {cp.cursor} "
+                 f"(run started {cp.run_started_at.isoformat()}Z)")
+
+    started = time.perf_counter()
+    totals = dict(cp.stats or {})
+
+    def _on_chunk(cursor, chunk):
+        for k, v in chunk.items():
+            totals[k] = totals.get(k, 0) + v
+        cp.cursor = cursor
+        cp.stats = dict(totals)
+        cp.updated_at = datetime.utcnow()
+        elapsed = time.perf_counter() - started
+        progress(f"[{name}] cursor={cursor} due={totals['due']} sent={totals['sent']} "
+                 f"errors={totals['errors']} ({totals['due'] / elapsed if elapsed else 0:.1f}/s)")
+
+    sweep_inactive_reminders(
+        cp.run_started_at,
+        chunk_size=chunk_size,
+        concurrency=concurrency,
+        shard=shard,
+        after_id=cp.cursor,
+        on_chunk=_on_chunk,
+    )
+
+    cp.finished_at = datetime.utcnow()
+    cp.updated_at = cp.finished_at
+    db.session.commit()
+    progress(f"[{name}] done: due={totals['due']} sent={totals['sent']} errors={totals['errors']}")
+    return totals
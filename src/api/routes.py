@@ -1,7 +1,6 @@
 import os
 import json
 import re
-import uuid
 import unicodedata
 import random
 from collections import defaultdict
@@ -11,15 +10,20 @@ from flask_cors import CORS
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, decode_token
 from zoneinfo import ZoneInfo
 from werkzeug.security import generate_password_hash
-from werkzeug.utils import secure_filename
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from flask import request, jsonify, render_template
 
 from datetime import time as dtime
 from datetime import datetime, timedelta, timezone
-from api.service_loops.welcome_user import send_welcome_transactional, LoopsError
-from api.service_loops.reset_password import send_password_reset
-from api.service_loops.verify_email import send_verify_email, LoopsError
-from api.service_loops.inactive_reminder import send_inactive_reminder, LoopsError
+from api.service_loops.client import LoopsError
+from api.reminders import sweep_inactive_reminders
+from api.user_time import user_today, user_local_day
+from api.scoring import (
+    activity_points, upsert_session, insert_completion, insert_completions, add_session_points
+)
+from api.fixed_reminders import schedule_reminder, reschedule_user_reminders
+from api.outbox import enqueue_email
 from api.models import (
     db,
     User,
@@ -41,6 +45,25 @@ from api.models import (
     ReminderType,
     ReminderMode
 )
+from api.mirror import (
+    cached_mirror_range_payload,
+    record_activity_completion,
+    record_emotion_checkin,
+    record_session_points,
+    rebuild_user_daily_stats,
+    delete_user_daily_stats,
+)
+from api.instrumentation import query_budget
+from api.idempotency import idempotent
+from api.avatars import (
+    AVATAR_DIR, AvatarError, process_avatar, avatar_url, avatar_urls, is_content_addressed
+)
+from api.read_models import (
+    EmotionRead, ActivityRead, DailySessionRead, GoalRead, ReminderRead
+)
+from api.cache import (
+    mirror_cache, bump_user_data_version, conditional, user_etag, catalog_etag, user_today_by_id
+)
 
 
 api = Blueprint("api", __name__)
@@ -113,15 +136,6 @@ def _normalize_days_of_week(s: str):
     return ",".join(out)
 
 
-def _daterange_days(start_date: date, end_date: date):
-    days = []
-    d = start_date
-    while d <= end_date:
-        days.append(d)
-        d += timedelta(days=1)
-    return days
-
-
 def _parse_date_ymd(s: str):
     try:
         return datetime.strptime(s, "%Y-%m-%d").date()
@@ -129,31 +143,6 @@ def _parse_date_ymd(s: str):
         return None
 
 
-def _calc_streak(flags_by_date):
-    """
-    flags_by_date: lista bool en orden cronológico (True = día consistente)
-    current: racha desde el final
-    best: máxima racha
-    """
-    best = 0
-    tmp = 0
-    for f in flags_by_date:
-        if f:
-            tmp += 1
-            best = max(best, tmp)
-        else:
-            tmp = 0
-
-    cur = 0
-    for f in reversed(flags_by_date):
-        if f:
-            cur += 1
-        else:
-            break
-
-    return cur, best
-
-
 def _utc_iso(dt: datetime):
     if not dt:
         return None
@@ -162,263 +151,8 @@ def _utc_iso(dt: datetime):
     return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
-def build_mirror_range_payload(user_id: int, start_date, end_date):
-    # 1) sesiones en rango
-    sessions = (
-        DailySession.query
-        .filter(
-            DailySession.user_id == user_id,
-            DailySession.session_date >= start_date,
-            DailySession.session_date <= end_date
-        )
-        .all()
-    )
-
-    # 2) inicializa days map (siempre incluye todos los días aunque no haya datos)
-    days_map = {}
-    for d in _daterange_days(start_date, end_date):
-        iso = d.isoformat()
-        days_map[iso] = {
-            "date": iso,
-            "points_total": 0,
-            "points_day": 0,
-            "points_night": 0,
-            "completions_count": 0,
-            "principal_count": 0,      # points_awarded >= 10
-            "recommended_count": 0,    # points_awarded == 20
-            "categories": {},          # {cat_name: points}
-            "emotions": {},            # {emotion_name: {count, intensity_avg}}
-            "emotion_entries": [],     # [{name,intensity,note,created_at}]
-            # [{name,category_name,points,session_type,completed_at,external_id}]
-            "activities": [],
-        }
-
-    # 3) puntos day/night por sesión
-    session_ids = []
-    session_by_id = {}
-
-    for s in sessions:
-        session_ids.append(s.id)
-        session_by_id[s.id] = s
-
-        key = s.session_date.isoformat()
-        pts = int(s.points_earned or 0)
-
-        if key in days_map:
-            days_map[key]["points_total"] += pts
-            if s.session_type == SessionType.day:
-                days_map[key]["points_day"] += pts
-            else:
-                days_map[key]["points_night"] += pts
-
-    # si no hay sesiones, devolvemos vacío pero con días
-    if not session_ids:
-        days_list = list(days_map.values())
-        flags = [False for _ in days_list]
-        cur, best = _calc_streak(flags)
-        return {
-            "range": {
-                "start": start_date.isoformat(),
-                "end": end_date.isoformat(),
-                "days": len(days_list),
-                "timezone": "UTC"
-            },
-            "days": days_list,
-            "totals": {
-                "points_total": 0,
-                "completions_total": 0,
-                "principal_days": 0,
-                "recommended_days": 0
-            },
-            "streak": {"current": cur, "best": best},
-            "distributions": {"categories_points": {}, "emotions": {}},
-        }
-
-    # 4) completions + categorías + ACTIVITIES[] por día
-    completions = (
-        ActivityCompletion.query
-        .join(Activity, ActivityCompletion.activity_id == Activity.id)
-        .join(ActivityCategory, Activity.category_id == ActivityCategory.id)
-        .filter(ActivityCompletion.daily_session_id.in_(session_ids))
-        .all()
-    )
-
-    dist_cat_points = defaultdict(int)
-
-    for c in completions:
-        s = session_by_id.get(c.daily_session_id)
-        if not s:
-            continue
-
-        day_key = s.session_date.isoformat()
-        if day_key not in days_map:
-            continue
-
-        pts = int(c.points_awarded or 0)
-        cat_name = "General"
-        act_name = "Actividad"
-
-        if c.activity:
-            act_name = c.activity.name or act_name
-            if c.activity.category:
-                cat_name = c.activity.category.name or cat_name
-
-        days_map[day_key]["completions_count"] += 1
-        if pts >= 10:
-            days_map[day_key]["principal_count"] += 1
-        if pts == 20:
-            days_map[day_key]["recommended_count"] += 1
-
-        # puntos por categoría por día
-        day_cats = days_map[day_key]["categories"]
-        day_cats[cat_name] = int(day_cats.get(cat_name, 0)) + pts
-
-        # distribución global por categoría
-        dist_cat_points[cat_name] += pts
-
-        # DRILLDOWN: lista de actividades del día
-        completed_at = None
-        try:
-            completed_at = c.completed_at.isoformat() + "Z" if c.completed_at else None
-        except Exception:
-            completed_at = None
-
-        days_map[day_key]["activities"].append({
-            "external_id": c.activity.external_id if c.activity else None,
-            "name": c.activity.name if c.activity else "Actividad",
-            "category_name": cat_name,
-            "points": pts,
-            "session_type": s.session_type.value,
-            "completed_at": (c.completed_at.isoformat() + "Z") if c.completed_at else None,
-        })
-
-    # ordena activities por hora (si existe)
-    for d in days_map.values():
-        d["activities"].sort(key=lambda x: (x.get("completed_at") or ""))
-
-    # 5) emociones (freq + intensidad avg)
-    checkins = (
-        EmotionCheckin.query
-        .join(DailySession, EmotionCheckin.daily_session_id == DailySession.id)
-        .join(Emotion, EmotionCheckin.emotion_id == Emotion.id)
-        .filter(DailySession.id.in_(session_ids))
-        .all()
-    )
-
-    dist_emotions = {}  # name -> {count, intensity_sum, intensity_count}
-
-    for ch in checkins:
-        s = session_by_id.get(ch.daily_session_id)
-        if not s:
-            continue
-
-        day_key = s.session_date.isoformat()
-        if day_key not in days_map:
-            continue
-
-        name = ch.emotion.name if ch.emotion else "Desconocida"
-
-        days_map[day_key]["emotion_entries"].append({
-            "name": name,
-            "intensity": int(ch.intensity) if ch.intensity is not None else None,
-            "note": ch.note if ch.note else None,
-            "created_at": (ch.created_at.isoformat() + "Z") if ch.created_at else None
-        })
-
-        # por día
-        day_em = days_map[day_key]["emotions"].get(
-            name, {"count": 0, "intensity_sum": 0, "intensity_count": 0})
-        day_em["count"] += 1
-        if ch.intensity is not None:
-            day_em["intensity_sum"] += int(ch.intensity)
-            day_em["intensity_count"] += 1
-        days_map[day_key]["emotions"][name] = day_em
-
-        # global
-        g = dist_emotions.get(
-            name, {"count": 0, "intensity_sum": 0, "intensity_count": 0})
-        g["count"] += 1
-        if ch.intensity is not None:
-            g["intensity_sum"] += int(ch.intensity)
-            g["intensity_count"] += 1
-        dist_emotions[name] = g
-
-    # normaliza intensity_avg (día + global)
-    for d in days_map.values():
-        for name, obj in list(d["emotions"].items()):
-            ic = obj.get("intensity_count", 0)
-            avg = (obj["intensity_sum"] / ic) if ic else None
-            d["emotions"][name] = {"count": obj["count"], "intensity_avg": avg}
-
-    dist_emotions_out = {}
-    for name, obj in dist_emotions.items():
-        ic = obj.get("intensity_count", 0)
-        avg = (obj["intensity_sum"] / ic) if ic else None
-        dist_emotions_out[name] = {"count": obj["count"], "intensity_avg": avg}
-
-    for da in days_map.values():
-        da["emotion_entries"].sort(key=lambda x: (
-            x.get("created_at") or ""), reverse=True)
-
-    # 6) totales + streak
-    days_list = list(days_map.values())
-
-    # Consistencia: día con >= 1 "principal" (points_awarded >= 10)
-    # IMPORTANTE: "racha actual" debe medirse hasta HOY, no hasta el final del rango
-    today_utc = datetime.now(timezone.utc).date()
-    cutoff_date = min(end_date, today_utc)
-
-    def _day_leq_cutoff(day_obj):
-        try:
-            d = date.fromisoformat(day_obj["date"])
-            return d <= cutoff_date
-        except Exception:
-            # Si por algún motivo falla el parseo, no bloqueamos el streak
-            return True
-
-    consistency_flags_all = [d["principal_count"] > 0 for d in days_list]
-    consistency_flags_upto_today = [
-        d["principal_count"] > 0 for d in days_list if _day_leq_cutoff(d)]
-
-    # Best streak puede calcularse con todo el rango (da igual que haya futuros a False, no reduce el máximo),
-    # pero current streak debe excluir días futuros.
-    _, streak_best = _calc_streak(consistency_flags_all)
-    streak_cur, _ = _calc_streak(consistency_flags_upto_today)
-
-    totals = {
-        "points_total": sum(int(d["points_total"] or 0) for d in days_list),
-        "completions_total": sum(int(d["completions_count"] or 0) for d in days_list),
-        "principal_days": sum(1 for d in days_list if (d["principal_count"] or 0) > 0),
-        "recommended_days": sum(1 for d in days_list if (d["recommended_count"] or 0) > 0),
-    }
-
-    return {
-        "range": {
-            "start": start_date.isoformat(),
-            "end": end_date.isoformat(),
-            "days": len(days_list),
-            "timezone": "UTC"
-        },
-        "days": days_list,
-        "totals": totals,
-        "streak": {"current": streak_cur, "best": streak_best},
-        "distributions": {
-            "categories_points": dict(dist_cat_points),
-            "emotions": dist_emotions_out
-        },
-    }
-
-
-ALLOWED_EXT = {"png", "jpg", "jpeg", "webp"}
 MAX_AVATAR_MB = 5
 
-
-def _allowed(filename: str) -> bool:
-    if "." not in filename:
-        return False
-    ext = filename.rsplit(".", 1)[1].lower()
-    return ext in ALLOWED_EXT
-
 # -------------------------
 # AUTH
 # -------------------------
@@ -453,13 +187,11 @@ def register():
     user.set_password(password)
 
     db.session.add(user)
-    db.session.commit()
-
-    try:
-        verify_id = os.getenv("LOOPS_VERIFY_EMAIL_TRANSACTIONAL_ID")
-        if not verify_id:
-            raise LoopsError("Falta LOOPS_VERIFY_EMAIL_TRANSACTIONAL_ID")
+    db.session.flush()
 
+    # email de verificación: va al outbox en la misma transacción que el usuario
+    verify_id = os.getenv("LOOPS_VERIFY_EMAIL_TRANSACTIONAL_ID")
+    if verify_id:
         verify_token = create_access_token(
             identity=str(user.id),
             expires_delta=timedelta(hours=24),
@@ -469,14 +201,15 @@ def register():
         frontend_base = (os.getenv("VITE_BACKEND_URL") or "").rstrip("/")
         verify_url = f"{frontend_base}/api/verify-email?token={verify_token}"
 
-        send_verify_email(
-            email=user.email,
-            transactional_id=verify_id,
-            username=user.username,
-            url_verify=verify_url,
-        )
-    except Exception as e:
-        print("Error Loops verify email (debug):", repr(e))
+        enqueue_email("verify_email", user.email, {
+            "transactional_id": verify_id,
+            "username": user.username,
+            "url_verify": verify_url,
+        }, user_id=user.id)
+    else:
+        print("Error Loops verify email (debug): Falta LOOPS_VERIFY_EMAIL_TRANSACTIONAL_ID")
+
+    db.session.commit()
 
     return jsonify({"msg": "Usuario creado", "user": user.serialize()}), 201
 
@@ -497,6 +230,8 @@ def login():
         return jsonify({"msg": "Credenciales inválidas"}), 401
 
     user.last_login_at = datetime.now(timezone.utc)
+    # login cambia la fila del usuario (last_login_at): invalida sus ETags
+    bump_user_data_version(user.id)
     db.session.commit()
 
     expires = timedelta(days=30) if remember_me else timedelta(hours=24)
@@ -533,19 +268,17 @@ def verify_email():
         if not user.is_email_verified:
             user.is_email_verified = True
             user.email_verified_at = datetime.now(timezone.utc)
-            db.session.commit()
+            bump_user_data_version(user.id)
 
-            # email de bienvenida (opcional)
-            try:
-                transactional_id = os.getenv("LOOPS_WELCOME_TRANSACTIONAL_ID")
-                if transactional_id:
-                    send_welcome_transactional(
-                        email=user.email,
-                        transactional_id=transactional_id,
-                        data=user.username.capitalize(),
-                    )
-            except Exception as e:
-                print("Error Loops welcome:", repr(e))
+            # email de bienvenida (opcional), vía outbox
+            transactional_id = os.getenv("LOOPS_WELCOME_TRANSACTIONAL_ID")
+            if transactional_id:
+                enqueue_email("welcome", user.email, {
+                    "transactional_id": transactional_id,
+                    "data": user.username.capitalize(),
+                }, user_id=user.id)
+
+            db.session.commit()
 
         return render_template(
             "verify_email.html",
@@ -571,7 +304,9 @@ def verify_email():
 
 
 @api.route("/users/user", methods=["GET"])
+@query_budget(2)
 @jwt_required()
+@conditional(user_etag())
 def get_current_user():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
@@ -623,7 +358,10 @@ def update_user():
             ZoneInfo(tz)
         except Exception:
             return jsonify({"msg": "timezone inválida (IANA). Ej: Europe/Madrid"}), 400
-        user.timezone = tz
+        if tz != user.timezone:
+            user.timezone = tz
+            # next_due_at está en UTC: otra zona cambia el instante de envío
+            reschedule_user_reminders(user)
 
     if "day_start_time" in body:
         t = _parse_hhmm(body.get("day_start_time"))
@@ -641,16 +379,21 @@ def update_user():
         v = (body.get("avatar_url") or "").strip()
         user.avatar_url = v if v else None
 
+    bump_user_data_version(user.id)
     db.session.commit()
     return jsonify({"success": True}), 200
 
 
 @api.route("/uploads/avatars/<path:filename>", methods=["GET"])
 def serve_avatar(filename):
-    # Ajusta esta ruta a tu estructura real
-    base_dir = os.path.dirname(os.path.realpath(__file__))  # .../src/api
-    folder = os.path.join(base_dir, "uploads", "avatars")
-    return send_from_directory(folder, filename)
+    # <hash>-<size>.webp no cambia nunca (otro contenido = otro nombre)
+    if is_content_addressed(filename):
+        response = send_from_directory(AVATAR_DIR, filename, max_age=31536000)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+    # avatares subidos antes del pipeline (<uuid>.<ext>)
+    return send_from_directory(AVATAR_DIR, filename)
 
 
 @api.route("/users/avatar", methods=["POST"])
@@ -673,25 +416,23 @@ def upload_avatar():
     if not file or file.filename == "":
         return jsonify({"msg": "Archivo inválido"}), 400
 
-    if not _allowed(file.filename):
-        return jsonify({"msg": "Formato no permitido (png/jpg/jpeg/webp)"}), 400
-
-    base_dir = os.path.dirname(os.path.realpath(__file__))
-    folder = os.path.join(base_dir, "uploads", "avatars")
-    os.makedirs(folder, exist_ok=True)
-
-    original = secure_filename(file.filename)
-    ext = original.rsplit(".", 1)[1].lower()
-    fname = f"{uuid.uuid4().hex}.{ext}"
-    path = os.path.join(folder, fname)
+    # sin Content-Length (chunked) el guard de arriba no aplica: se corta al leer
+    data = file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        return jsonify({"msg": f"El archivo supera el límite de {MAX_AVATAR_MB}MB"}), 413
 
-    file.save(path)
+    # el tipo real lo decide el contenido, no la extensión
+    try:
+        digest = process_avatar(data)
+    except AvatarError as e:
+        return jsonify({"msg": str(e)}), 400
 
-    public_url = f"/api/uploads/avatars/{fname}"
+    public_url = avatar_url(digest)
     user.avatar_url = public_url
+    bump_user_data_version(user.id)
     db.session.commit()
 
-    return jsonify({"avatar_url": public_url}), 200
+    return jsonify({"avatar_url": public_url, "avatar_urls": avatar_urls(public_url)}), 200
 
 
 # --------------------------
@@ -746,7 +487,8 @@ def forgot_password():
 
     url_reset = os.getenv('VITE_FRONTEND_URL') + "auth/reset?token=" + token
 
-    send_password_reset(email, url_reset)
+    enqueue_email("password_reset", email, {"reset_url": url_reset}, user_id=user.id)
+    db.session.commit()
 
     return jsonify({"msg": "Si el email existe, recibirás un enlace para restablecer tu contraseña."}), 200
 
@@ -786,18 +528,18 @@ def reset_password():
 @jwt_required()
 def create_or_get_session():
     body = request.get_json(silent=True) or {}
+    # opcional: si no viene, la fase sale del reloj del usuario
     session_type_raw = (body.get("session_type") or "").strip().lower()
-    if session_type_raw not in ("day", "night"):
+    if session_type_raw not in ("", "day", "night"):
         return jsonify({"msg": "session_type debe ser 'day' o 'night'"}), 400
 
     date_raw = (body.get("date") or "").strip()
+    session_date = None
     if date_raw:
         try:
             session_date = datetime.strptime(date_raw, "%Y-%m-%d").date()
         except ValueError:
             return jsonify({"msg": "date debe tener formato YYYY-MM-DD"}), 400
-    else:
-        session_date = datetime.now(timezone.utc).date()
 
     user_id = get_jwt_identity()
     try:
@@ -809,7 +551,11 @@ def create_or_get_session():
     if not user:
         return jsonify({"msg": "Usuario no encontrado"}), 404
 
-    st_enum = SessionType.day if session_type_raw == "day" else SessionType.night
+    today, st_enum = user_local_day(user)
+    if session_date is None:
+        session_date = today
+    if session_type_raw:
+        st_enum = SessionType(session_type_raw)
 
     session = DailySession.query.filter_by(
         user_id=user.id,
@@ -825,6 +571,7 @@ def create_or_get_session():
             points_earned=0,
         )
         db.session.add(session)
+        bump_user_data_version(user.id)
 
     # Siempre que interactúa, actualiza last_activity_at
     user.last_activity_at = datetime.now(timezone.utc)
@@ -865,7 +612,9 @@ def create_or_get_session():
 # -------------------------
 
 @api.route("/mirror/today", methods=["GET"])
+@query_budget(5)
 @jwt_required()
+@conditional(user_etag(daily=True))
 def mirror_today():
     """
     Optional query: ?session_type=day|night
@@ -880,16 +629,15 @@ def mirror_today():
     if not user:
         return jsonify({"msg": "Usuario no encontrado"}), 404
 
-    today = datetime.now(timezone.utc).date()
+    today = user_today(user)
     session_type_q = (request.args.get("session_type") or "").strip().lower()
 
-    sessions_q = DailySession.query.filter_by(
-        user_id=user.id, session_date=today)
+    sessions_q = DailySessionRead.select().where(
+        DailySession.user_id == user.id, DailySession.session_date == today)
     if session_type_q in ("day", "night"):
         st_enum = SessionType.day if session_type_q == "day" else SessionType.night
-        sessions = sessions_q.filter_by(session_type=st_enum).all()
-    else:
-        sessions = sessions_q.all()
+        sessions_q = sessions_q.where(DailySession.session_type == st_enum)
+    sessions = DailySessionRead.fetch(sessions_q)
 
     if not sessions:
         return jsonify({
@@ -906,51 +654,67 @@ def mirror_today():
 
     activities = []
     points_by_category = {}
-
-    for s in sessions:
-        completions = (
-            ActivityCompletion.query
-            .join(Activity, ActivityCompletion.activity_id == Activity.id)
-            .join(ActivityCategory, Activity.category_id == ActivityCategory.id)
-            .filter(ActivityCompletion.daily_session_id == s.id)
-            .order_by(ActivityCompletion.completed_at.asc())
-            .all()
+    session_type_by_id = {s.id: s.session_type for s in sessions}
+
+    # Una sola proyección para todas las sesiones (sin lazy loads de activity/category)
+    completion_rows = db.session.execute(
+        select(
+            ActivityCompletion.daily_session_id,
+            ActivityCompletion.points_awarded,
+            ActivityCompletion.completed_at,
+            Activity.id,
+            Activity.external_id,
+            Activity.name,
+            ActivityCategory.name,
         )
+        .join(Activity, ActivityCompletion.activity_id == Activity.id)
+        .join(ActivityCategory, Activity.category_id == ActivityCategory.id)
+        .where(ActivityCompletion.daily_session_id.in_(list(session_type_by_id)))
+        .order_by(ActivityCompletion.completed_at.asc(), ActivityCompletion.id.asc())
+    ).all()
 
-        for c in completions:
-            cat_name = c.activity.category.name if c.activity and c.activity.category else "General"
-            pts = int(c.points_awarded or 0)
-            points_by_category[cat_name] = points_by_category.get(
-                cat_name, 0) + pts
-
-            activities.append({
-                "id": c.activity.id,
-                "external_id": c.activity.external_id,
-                "name": c.activity.name,
-                "category_name": cat_name,
-                "points": pts,
-                "session_type": s.session_type.value,
-                "completed_at": _utc_iso(c.completed_at),
-            })
+    for session_id, points_awarded, completed_at, act_id, act_ext, act_name, cat_name in completion_rows:
+        cat_name = cat_name or "General"
+        pts = int(points_awarded or 0)
+        points_by_category[cat_name] = points_by_category.get(
+            cat_name, 0) + pts
+
+        activities.append({
+            "id": act_id,
+            "external_id": act_ext,
+            "name": act_name,
+            "category_name": cat_name,
+            "points": pts,
+            "session_type": session_type_by_id[session_id].value,
+            "completed_at": _utc_iso(completed_at),
+        })
 
     activities.sort(key=lambda x: x.get("completed_at") or "")
 
-    latest_checkin = (
-        EmotionCheckin.query
+    latest_checkin = db.session.execute(
+        select(
+            Emotion.name,
+            Emotion.value,
+            EmotionCheckin.intensity,
+            EmotionCheckin.note,
+            EmotionCheckin.created_at,
+        )
         .join(DailySession, EmotionCheckin.daily_session_id == DailySession.id)
-        .filter(DailySession.user_id == user.id, DailySession.session_date == today)
+        .join(Emotion, EmotionCheckin.emotion_id == Emotion.id)
+        .where(DailySession.user_id == user.id, DailySession.session_date == today)
         .order_by(EmotionCheckin.created_at.desc())
-        .first()
-    )
+        .limit(1)
+    ).first()
 
     emotion = None
-    if latest_checkin and latest_checkin.emotion:
+    if latest_checkin:
+        emo_name, emo_value, intensity, note, created_at = latest_checkin
         emotion = {
-            "name": latest_checkin.emotion.name,
-            "value": latest_checkin.emotion.value,
-            "intensity": latest_checkin.intensity,
-            "note": latest_checkin.note,
-            "created_at": _utc_iso(latest_checkin.created_at),
+            "name": emo_name,
+            "value": emo_value,
+            "intensity": intensity,
+            "note": note,
+            "created_at": _utc_iso(created_at),
         }
 
     return jsonify({
@@ -964,7 +728,9 @@ def mirror_today():
 
 
 @api.route("/mirror/range", methods=["GET"])
+@query_budget(2)
 @jwt_required()
+@conditional(user_etag(daily=True))
 def mirror_range():
     user_id_raw = get_jwt_identity()
     try:
@@ -983,7 +749,7 @@ def mirror_range():
     if start > end:
         return jsonify({"message": "start debe ser <= end."}), 400
 
-    payload = build_mirror_range_payload(
+    payload = cached_mirror_range_payload(
         user_id=user_id, start_date=start, end_date=end)
     return jsonify(payload), 200
 
@@ -993,7 +759,9 @@ def mirror_range():
 # -------------------------
 
 @api.route("/mirror/week", methods=["GET"])
+@query_budget(2)
 @jwt_required()
+@conditional(user_etag(daily=True))
 def mirror_week():
     user_id_raw = get_jwt_identity()
     try:
@@ -1001,16 +769,18 @@ def mirror_week():
     except Exception:
         return jsonify({"message": "Token inválido (identity)."}), 401
 
-    today = datetime.now(timezone.utc).date()
+    today = user_today_by_id(user_id)
     start = today - timedelta(days=6)
 
-    payload = build_mirror_range_payload(
+    payload = cached_mirror_range_payload(
         user_id=user_id, start_date=start, end_date=today)
     return jsonify(payload), 200
 
 
 @api.route("/mirror/month", methods=["GET"])
+@query_budget(2)
 @jwt_required()
+@conditional(user_etag(daily=True))
 def mirror_month():
     user_id_raw = get_jwt_identity()
     try:
@@ -1018,10 +788,10 @@ def mirror_month():
     except Exception:
         return jsonify({"message": "Token inválido (identity)."}), 401
 
-    today = datetime.now(timezone.utc).date()
+    today = user_today_by_id(user_id)
     start = today - timedelta(days=29)
 
-    payload = build_mirror_range_payload(
+    payload = cached_mirror_range_payload(
         user_id=user_id, start_date=start, end_date=today)
     return jsonify(payload), 200
 
@@ -1031,14 +801,19 @@ def mirror_month():
 # -------------------------
 
 @api.route("/emotions", methods=["GET"])
+@query_budget(2)
+@conditional(catalog_etag("emotions"))
 def get_all_emotions():
-    emotions = Emotion.query.all()
+    emotions = EmotionRead.fetch(EmotionRead.select())
     return jsonify([e.serialize() for e in emotions]), 200
 
 
 @api.route("/activities", methods=["GET"])
+@query_budget(2)
+@conditional(catalog_etag("activities"))
 def get_all_activities():
-    activities = Activity.query.filter_by(is_active=True).all()
+    activities = ActivityRead.fetch(
+        ActivityRead.select().where(Activity.is_active.is_(True)))
     return jsonify([a.serialize() for a in activities]), 200
 
 
@@ -1048,86 +823,220 @@ def get_all_activities():
 
 @api.route("/activities/complete", methods=["POST"])
 @jwt_required()
+@idempotent()
 def complete_activity():
     body = request.get_json(silent=True) or {}
 
     external_id = body.get("external_id")
+    # opcional: si no viene, la fase sale del reloj del usuario
     session_type = body.get("session_type")  # "day" | "night"
     is_recommended = bool(body.get("is_recommended", False))
     source = (body.get("source") or "today").strip().lower()  # today | catalog
 
-    if not external_id or session_type not in ("day", "night"):
+    if not external_id or session_type not in (None, "day", "night"):
         return jsonify({"msg": "Datos incompletos"}), 400
 
     user_id = int(get_jwt_identity())
-    today = datetime.now(timezone.utc).date()
 
     user = User.query.get(user_id)
     if not user:
         return jsonify({"msg": "Usuario no encontrado"}), 404
+    # día local del usuario; la fase explícita del cliente (vista forzada,
+    # actividad de noche del catálogo) manda sobre la del reloj
+    today, st_enum = user_local_day(user)
+    if session_type is not None:
+        st_enum = SessionType(session_type)
 
-    activity = Activity.query.filter_by(
+    activity = Activity.query.options(joinedload(Activity.category)).filter_by(
         external_id=external_id, is_active=True).first()
     if not activity:
         return jsonify({"msg": "Actividad no encontrada"}), 404
 
-    st_enum = SessionType.day if session_type == "day" else SessionType.night
+    points = activity_points(is_recommended, source)
 
-    session = DailySession.query.filter_by(
-        user_id=user.id,
-        session_date=today,
-        session_type=st_enum
-    ).first()
+    # get-or-create de la sesión + idempotencia + suma de puntos, sin carreras
+    # ante doble tap (ver api/scoring.py); un solo commit
+    session_id, points_total = upsert_session(user.id, today, st_enum)
+    completed_at = datetime.utcnow()
+    completion_id = insert_completion(session_id, activity.id, points, completed_at)
 
-    if not session:
-        session = DailySession(
-            user_id=user.id,
-            session_date=today,
-            session_type=st_enum,
-            points_earned=0
-        )
-        db.session.add(session)
+    if completion_id is None:
         db.session.commit()
-
-    # idempotencia (misma activity en misma sesión)
-    existing = ActivityCompletion.query.filter_by(
-        daily_session_id=session.id,
-        activity_id=activity.id
-    ).first()
-
-    if existing:
         return jsonify({
             "points_awarded": 0,
-            "points_total": session.points_earned,
+            "points_total": points_total,
             "already_completed": True
         }), 200
 
-    if is_recommended:
-        points = 20
-    elif source == "catalog":
-        points = 5
-    else:
-        points = 10
-
-    completion = ActivityCompletion(
-        daily_session_id=session.id,
-        activity_id=activity.id,
-        points_awarded=points
-    )
-    session.points_earned = int(session.points_earned or 0) + points
+    points_total = add_session_points(session_id, points)
     user.last_activity_at = datetime.now(timezone.utc)
 
-    db.session.add(completion)
+    record_activity_completion(
+        user_id=user.id,
+        session_date=today,
+        session_type=st_enum,
+        activity=activity,
+        category_name=activity.category.name if activity.category else "General",
+        points=points,
+        completed_at=completed_at,
+    )
+    bump_user_data_version(user.id)
+    activity_external_id = activity.external_id  # antes del commit (expira la entidad)
     db.session.commit()
 
     return jsonify({
         "points_awarded": points,
-        "points_total": session.points_earned,
-        "session_id": session.id,
-        "activity_id": activity.external_id
+        "points_total": points_total,
+        "session_id": session_id,
+        "activity_id": activity_external_id
     }), 201
 
 
+BATCH_MAX_ITEMS = 100
+BATCH_MAX_REPLAY_AGE = timedelta(days=7)
+
+
+def _parse_client_ts(raw, now):
+    """ISO-8601 del cliente -> UTC aware, acotado a [now - 7 días, now]. None si no viene."""
+    if raw in (None, ""):
+        return None
+    try:
+        ts = _as_utc_aware(datetime.fromisoformat(str(raw).replace("Z", "+00:00")))
+    except ValueError:
+        raise ValueError("client_ts inválido (ISO-8601)")
+    if ts < now - BATCH_MAX_REPLAY_AGE:
+        raise ValueError("client_ts demasiado antiguo (máx 7 días)")
+    # reloj del cliente adelantado: nunca en el futuro
+    return min(ts, now)
+
+
+@api.route("/activities/complete/batch", methods=["POST"])
+@jwt_required()
+@idempotent()
+def complete_activities_batch():
+    """
+    Varias completions en una request (runners encadenados, replay offline).
+    Body: {"items": [{external_id, session_type?, is_recommended?, source?, client_ts?}]}
+    (o directamente la lista). Mismas reglas que /activities/complete; client_ts
+    decide el día local (y la fase si el item no trae session_type) al que cuenta
+    (replay de hasta 7 días). Todo en una
+    transacción; results[i] corresponde a items[i] con su propio status.
+    """
+    body = request.get_json(silent=True)
+    items = body.get("items") if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        return jsonify({"msg": "items debe ser una lista no vacía"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"msg": f"Máximo {BATCH_MAX_ITEMS} items por batch"}), 400
+
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({"msg": "Usuario no encontrado"}), 404
+
+    now = datetime.now(timezone.utc)
+    results = [None] * len(items)
+    parsed = []
+    for i, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        external_id = item.get("external_id")
+        session_type = item.get("session_type")
+        if not external_id or session_type not in (None, "day", "night"):
+            results[i] = {"status": 400, "msg": "Datos incompletos"}
+            continue
+        try:
+            ts = _parse_client_ts(item.get("client_ts"), now)
+        except ValueError as e:
+            results[i] = {"status": 400, "msg": str(e), "activity_id": external_id}
+            continue
+        parsed.append((i, str(external_id), session_type, ts or now, activity_points(
+            bool(item.get("is_recommended", False)),
+            (item.get("source") or "today").strip().lower(),
+        )))
+
+    # todas las actividades en una query
+    activities = {
+        a.external_id: a for a in Activity.query.options(joinedload(Activity.category)).filter(
+            Activity.external_id.in_({p[1] for p in parsed}), Activity.is_active.is_(True)
+        ).all()
+    } if parsed else {}
+
+    # una sesión por (día local, tipo); un upsert por sesión distinta
+    sessions = {}
+    entries = []
+    for i, external_id, session_type, ts, points in parsed:
+        activity = activities.get(external_id)
+        if activity is None:
+            results[i] = {"status": 404, "msg": "Actividad no encontrada", "activity_id": external_id}
+            continue
+        # (día local, fase) en el momento de la completion; session_type explícito manda
+        key = user_local_day(user, ts)
+        if session_type is not None:
+            key = (key[0], SessionType(session_type))
+        if key not in sessions:
+            sessions[key] = upsert_session(user.id, *key)
+        entries.append((i, activity, key, ts, points))
+
+    # repetidos dentro del batch: solo el primero puede puntuar
+    rows, seen = [], set()
+    for i, activity, key, ts, points in entries:
+        pair = (sessions[key][0], activity.id)
+        if pair not in seen:
+            seen.add(pair)
+            rows.append({"daily_session_id": pair[0], "activity_id": activity.id,
+                         "points_awarded": points,
+                         "completed_at": ts.astimezone(timezone.utc).replace(tzinfo=None)})
+    inserted = insert_completions(rows)
+
+    awarded = {}  # session_id -> puntos nuevos
+    # no_autoflush: un solo UPDATE por fila del rollup al final, no uno por item
+    with db.session.no_autoflush:
+        for i, activity, key, ts, points in entries:
+            session_id = sessions[key][0]
+            pair = (session_id, activity.id)
+            if pair not in inserted:
+                results[i] = {"status": 200, "points_awarded": 0, "already_completed": True,
+                              "session_id": session_id, "activity_id": activity.external_id}
+                continue
+            inserted.discard(pair)
+            awarded[session_id] = awarded.get(session_id, 0) + points
+            results[i] = {"status": 201, "points_awarded": points,
+                          "session_id": session_id, "activity_id": activity.external_id}
+            record_activity_completion(
+                user_id=user.id,
+                session_date=key[0],
+                session_type=key[1],
+                activity=activity,
+                category_name=activity.category.name if activity.category else "General",
+                points=points,
+                completed_at=ts.astimezone(timezone.utc).replace(tzinfo=None),
+            )
+
+    totals = {session_id: points for session_id, points in sessions.values()}
+    for session_id, pts in awarded.items():
+        totals[session_id] = add_session_points(session_id, pts)
+
+    # points_total por item = total de su sesión tras aplicar ese item (orden del batch)
+    running = {session_id: totals[session_id] - awarded.get(session_id, 0)
+               for session_id in totals}
+    for r in results:
+        if r.get("session_id") is not None:
+            running[r["session_id"]] += r["points_awarded"]
+            r["points_total"] = running[r["session_id"]]
+
+    if awarded:
+        user.last_activity_at = now
+        bump_user_data_version(user.id)
+    db.session.commit()
+
+    return jsonify({
+        "results": results,
+        "completed": sum(1 for r in results if r["status"] == 201),
+        "already_completed": sum(1 for r in results if r["status"] == 200),
+        "errors": sum(1 for r in results if r["status"] >= 400),
+    }), 200
+
+
 # -------------------------
 # EMOTION CHECKIN
 # -------------------------
@@ -1136,7 +1045,7 @@ def complete_activity():
 @jwt_required()
 def create_emotion_checkin():
     """
-    Guarda un check-in emocional ligado a la sesión NIGHT de hoy (UTC date).
+    Guarda un check-in emocional ligado a la sesión NIGHT de hoy (día local del usuario).
     Body: { emotion_id, intensity (1..10), note? }
     """
     body = request.get_json(silent=True) or {}
@@ -1159,11 +1068,11 @@ def create_emotion_checkin():
         return jsonify({"msg": "intensity debe estar entre 1 y 10"}), 400
 
     user_id = int(get_jwt_identity())
-    today = datetime.now(timezone.utc).date()
 
     user = User.query.get(user_id)
     if not user:
         return jsonify({"msg": "Usuario no encontrado"}), 404
+    today = user_today(user)
 
     emotion = Emotion.query.get(emotion_id)
     if not emotion:
@@ -1190,11 +1099,21 @@ def create_emotion_checkin():
         daily_session_id=session.id,
         emotion_id=emotion.id,
         intensity=intensity,
-        note=note_text if note_text else None
+        note=note_text if note_text else None,
+        created_at=datetime.utcnow()
     )
 
     db.session.add(checkin)
     user.last_activity_at = datetime.now(timezone.utc)
+    record_emotion_checkin(
+        user_id=user.id,
+        session_date=session.session_date,
+        emotion_name=emotion.name,
+        intensity=checkin.intensity,
+        note=checkin.note,
+        created_at=checkin.created_at,
+    )
+    bump_user_data_version(user.id)
     db.session.commit()
 
     return jsonify({
@@ -1587,7 +1506,7 @@ def dev_reset_today():
         return jsonify({"msg": "Not found"}), 404
 
     user_id = int(get_jwt_identity())
-    today = datetime.now(timezone.utc).date()
+    today = user_today_by_id(user_id)
 
     sessions = DailySession.query.filter_by(
         user_id=user_id, session_date=today).all()
@@ -1601,6 +1520,9 @@ def dev_reset_today():
         DailySession.query.filter(DailySession.id.in_(
             session_ids)).delete(synchronize_session=False)
 
+    delete_user_daily_stats(user_id, today, today)
+    bump_user_data_version(user_id)
+
     db.session.commit()
     return jsonify({"msg": "Reset de hoy completado"}), 200
 
@@ -1624,6 +1546,13 @@ def dev_deactivate_activity():
 
     return jsonify({"msg": "Actividad desactivada", "external_id": external_id}), 200
 
+@api.route("/dev/cache/stats", methods=["GET"])
+def dev_cache_stats():
+    if not dev_only():
+        return jsonify({"msg": "Not found"}), 404
+
+    return jsonify({"mirror": mirror_cache.stats()}), 200
+
 # -------------------------
 # DEV: EMOTIONS SEED
 # -------------------------
@@ -1797,7 +1726,7 @@ def dev_seed_fake_history():
     created_completions = 0
     created_checkins = 0
 
-    today = date.today()
+    today = user_today(user)
 
     # Distribución simple de puntos (cumple constraint 0/5/10/20)
     points_choices = [20, 10, 5]
@@ -1870,6 +1799,10 @@ def dev_seed_fake_history():
                     db.session.add(checkin)
                     created_checkins += 1
 
+    db.session.flush()
+    rebuild_user_daily_stats(
+        user.id, today - timedelta(days=days - 1), today)
+    bump_user_data_version(user.id)
     db.session.commit()
 
     return jsonify({
@@ -1946,6 +1879,9 @@ def dev_reset_user_data():
             DailySession.id.in_(session_ids)
         ).delete(synchronize_session=False)
 
+    delete_user_daily_stats(user.id)
+    bump_user_data_version(user.id)
+
     # 2) goals del usuario (opcional)
     if include_goals:
         # borra progreso, luego goals
@@ -1977,15 +1913,14 @@ def dev_reset_user_data():
 # -------------------------
 # REMINDERS
 # -------------------------
-"""
 
 @api.route("/reminders", methods=["GET"])
 @jwt_required()
 def list_reminders():
     user_id = int(get_jwt_identity())
 
-    reminders = Reminder.query.filter_by(
-        user_id=user_id).order_by(Reminder.id.desc()).all()
+    reminders = ReminderRead.fetch(
+        ReminderRead.select().where(Reminder.user_id == user_id).order_by(Reminder.id.desc()))
     return jsonify([r.serialize() for r in reminders]), 200
 
 
@@ -2049,6 +1984,7 @@ def create_reminder():
         days_of_week=days_of_week,
         is_active=True
     )
+    schedule_reminder(r, db.session.get(User, user_id).timezone)
 
     db.session.add(r)
     db.session.commit()
@@ -2103,6 +2039,7 @@ def update_reminder(reminder_id):
 
         r.local_time = None
 
+    schedule_reminder(r, r.user.timezone)
     db.session.commit()
     return jsonify({"msg": "Reminder actualizado", "reminder": r.serialize()}), 200
 
@@ -2117,10 +2054,12 @@ def delete_reminder(reminder_id):
 
     # Soft delete
     r.is_active = False
+    r.next_due_at = None
     db.session.commit()
 
     return jsonify({"msg": "Reminder desactivado"}), 200
-"""
+
+
 # -------------------------
 # ENVIAR REMINDERS (INACTIVOS)
 # -------------------------
@@ -2142,129 +2081,11 @@ def task_send_reminders():
     if force and not dev_only():
         return jsonify({"msg": "Not found"}), 404
 
-    now_utc = datetime.now(timezone.utc)
-
-    reminders = Reminder.query.filter_by(
-        is_active=True,
-        reminder_type=ReminderType.inactive_nudge
-    ).all()
-
-    sent = 0
-    skipped = 0
-    errors = 0
-
-    debug_rows = []  # útil para saber por qué se salta
-    debug_enabled = force or dev_only()
-
-    frontend_url = (os.getenv("VITE_FRONTEND_URL") or "").rstrip("/")
-    url_app = f"{frontend_url}/" if frontend_url else "/"
-
-    STEP_1 = 1440   # 24h
-    STEP_2 = 2880   # 48h
-    STEP_3 = 4320   # 72h
-
-    for r in reminders:
-        try:
-            user = User.query.get(r.user_id)
-            if not user:
-                skipped += 1
-                if debug_enabled:
-                    debug_rows.append({"reminder_id": r.id, "reason": "user_not_found"})
-                continue
-
-            if not user.is_email_verified:
-                skipped += 1
-                if debug_enabled:
-                    debug_rows.append({"reminder_id": r.id, "user_id": user.id, "reason": "email_not_verified"})
-                continue
-
-            if r.mode != ReminderMode.inactivity:
-                skipped += 1
-                if debug_enabled:
-                    debug_rows.append({"reminder_id": r.id, "user_id": user.id, "reason": "mode_not_inactivity"})
-                continue
-
-            # SOLO después de la primera DAY session (tu regla)
-            has_any_session = DailySession.query.filter_by(user_id=user.id).first()
-            if not has_any_session:
-                skipped += 1
-                continue
-
-            # Default si viene null
-            if not r.inactive_after_minutes:
-                r.inactive_after_minutes = STEP_1
-
-            # anti-duplicado por cron (1h)
-            last_sent = _as_utc_aware(r.last_sent_at)
-            if last_sent and (now_utc - last_sent) < timedelta(hours=1):
-                skipped += 1
-                if debug_enabled:
-                    debug_rows.append({"reminder_id": r.id, "user_id": user.id, "reason": "sent_recently"})
-                continue
-
-            # base de inactividad: desde última actividad
-            last = user.last_activity_at or user.last_login_at or user.created_at
-            last = _as_utc_aware(last)
-            diff_minutes = int((now_utc - last).total_seconds() // 60)
-
-            # respeta umbral (24/48/72) salvo force
-            if not force and diff_minutes < int(r.inactive_after_minutes):
-                skipped += 1
-                if debug_enabled:
-                    debug_rows.append({
-                        "reminder_id": r.id,
-                        "user_id": user.id,
-                        "reason": "below_threshold",
-                        "diff_minutes": diff_minutes,
-                        "threshold": int(r.inactive_after_minutes)
-                    })
-                continue
-
-            # etapa según umbral guardado
-            threshold = int(r.inactive_after_minutes)
-            if threshold <= STEP_1:
-                stage = 1
-                next_threshold = STEP_2
-            elif threshold <= STEP_2:
-                stage = 2
-                next_threshold = STEP_3
-            else:
-                stage = 3
-                next_threshold = None
-
-            # enviar
-            send_inactive_reminder(
-                email=user.email,
-                username=user.username,
-                url_app=url_app,
-                stage=stage
-            )
-
-            r.last_sent_at = now_utc
-            if next_threshold is None:
-                r.is_active = False  # STOP definitivo
-            else:
-                r.inactive_after_minutes = next_threshold
-
-            db.session.commit()
-            sent += 1
-
-        except Exception as e:
-            print("Error Loops inactive reminder:", repr(e))
-            db.session.rollback()
-            errors += 1
-
-    payload = {
-        "ok": True,
-        "processed": len(reminders),
-        "sent": sent,
-        "skipped": skipped,
-        "errors": errors,
-        "force": force
-    }
-
-    if debug_enabled:
-        payload["debug"] = debug_rows[:50]  # no explotar el response
+    payload = sweep_inactive_reminders(
+        datetime.utcnow(),
+        force=force,
+        debug=force or dev_only(),
+    )
 
     return jsonify(payload), 200
 
@@ -2302,11 +2123,13 @@ def _get_or_create_day_session(user_id: int, session_date: date):
 
 
 @api.route("/goals", methods=["GET"])
+@query_budget(2)
 @jwt_required()
+@conditional(user_etag())
 def list_goals():
     user_id = int(get_jwt_identity())
-    goals = Goal.query.filter_by(user_id=user_id).order_by(
-        Goal.created_at.desc()).all()
+    goals = GoalRead.fetch(
+        GoalRead.select().where(Goal.user_id == user_id).order_by(Goal.created_at.desc()))
     return jsonify([g.serialize() for g in goals]), 200
 
 
@@ -2364,6 +2187,7 @@ def create_goal():
     )
 
     db.session.add(goal)
+    bump_user_data_version(user_id)
     db.session.commit()
     return jsonify(goal.serialize()), 201
 
@@ -2377,6 +2201,7 @@ def _get_user_goal_or_404(user_id: int, goal_id: int):
 
 @api.route("/goals/<int:goal_id>", methods=["GET"])
 @jwt_required()
+@conditional(user_etag())
 def get_goal(goal_id):
     user_id = int(get_jwt_identity())
     goal = _get_user_goal_or_404(user_id, goal_id)
@@ -2452,6 +2277,7 @@ def update_goal(goal_id):
     if "is_active" in data:
         goal.is_active = bool(data.get("is_active"))
 
+    bump_user_data_version(user_id)
     db.session.commit()
     return jsonify(goal.serialize()), 200
 
@@ -2465,12 +2291,14 @@ def delete_goal(goal_id):
         return jsonify({"msg": "goal not found"}), 404
 
     db.session.delete(goal)
+    bump_user_data_version(user_id)
     db.session.commit()
     return jsonify({"msg": "deleted"}), 200
 
 
 @api.route("/goals/<int:goal_id>/progress", methods=["POST"])
 @jwt_required()
+@idempotent()
 def add_goal_progress(goal_id):
     """Adds a progress entry for a goal (optionally tied to a DailySession)."""
     user_id = int(get_jwt_identity())
@@ -2504,18 +2332,20 @@ def add_goal_progress(goal_id):
     # Sync current_value (acumulativo) si es numérico
     goal.current_value = int(goal.current_value or 0) + int(delta_value or 0)
 
+    bump_user_data_version(user_id)
     db.session.commit()
     return jsonify(progress.serialize()), 201
 
 
 @api.route("/goals/<int:goal_id>/complete", methods=["POST"])
 @jwt_required()
+@idempotent()
 def complete_goal(goal_id):
     """
     Marks a goal as completed and awards points into a DailySession.
     daily_session_id es opcional:
       - si viene: usa esa sesión (del usuario)
-      - si no viene: crea/usa sesión DAY de hoy (UTC date)
+      - si no viene: crea/usa sesión DAY de hoy (día local del usuario)
     """
     user_id = int(get_jwt_identity())
     goal = _get_user_goal_or_404(user_id, goal_id)
@@ -2525,7 +2355,7 @@ def complete_goal(goal_id):
     data = request.get_json(silent=True) or {}
     daily_session_id = data.get("daily_session_id")
 
-    today = datetime.now(timezone.utc).date()
+    today = user_today_by_id(user_id)
 
     if daily_session_id is not None:
         daily_session = DailySession.query.get(daily_session_id)
@@ -2553,8 +2383,15 @@ def complete_goal(goal_id):
         goal.completed_at = datetime.now(timezone.utc)
         daily_session.points_earned = int(
             daily_session.points_earned or 0) + reward
+        record_session_points(
+            user_id=user_id,
+            session_date=daily_session.session_date,
+            session_type=daily_session.session_type,
+            points=reward,
+        )
         did_award = True
 
+    bump_user_data_version(user_id)
     db.session.commit()
 
     return jsonify({
@@ -2615,6 +2452,7 @@ def normalize_emotion(name: str) -> str:
 
 @api.route("/music/current", methods=["GET"])
 @jwt_required()
+@conditional(user_etag())
 def get_current_music():
     user_id = get_jwt_identity()
     phase = request.args.get("phase", "day")
@@ -0,0 +1,85 @@
+"""
+Escrituras de puntaje de sesión en statements atómicos (sin read-modify-write).
+
+complete_activity usa:
+  1. upsert_session: INSERT ... ON CONFLICT (uq_session_user_date_type)
+     DO UPDATE no-op + RETURNING -> id y puntos de la sesión, exista o no.
+  2. insert_completion: INSERT ... ON CONFLICT (uq_session_activity) DO NOTHING
+     RETURNING id -> None si la actividad ya estaba completada (doble tap).
+  3. add_session_points: UPDATE points_earned = points_earned + :pts RETURNING.
+Todo dentro de la transacción de la request (un solo commit al final).
+
+/activities/complete/batch hace lo mismo por lote: un upsert por sesión
+distinta, un único INSERT multi-fila de completions y una suma por sesión.
+"""
+from datetime import date, datetime
+
+from sqlalchemy import update
+
+from api.models import db, DailySession, ActivityCompletion, SessionType
+from api.sql_compat import upsert_insert
+
+
+def activity_points(is_recommended: bool, source: str) -> int:
+    """Regla de puntaje: recomendada 20, desde catálogo 5, resto 10."""
+    if is_recommended:
+        return 20
+    if source == "catalog":
+        return 5
+    return 10
+
+
+def upsert_session(user_id: int, session_date: date, session_type: SessionType):
+    """(session_id, points_earned) de la sesión del día, creándola si no existe."""
+    stmt = upsert_insert(DailySession.__table__, db.engine.dialect.name).values(
+        user_id=user_id,
+        session_date=session_date,
+        session_type=session_type,
+        points_earned=0,
+    )
+    # DO UPDATE (no DO NOTHING) para que RETURNING también devuelva la fila existente
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "session_date", "session_type"],
+        set_={"session_type": stmt.excluded.session_type},
+    ).returning(DailySession.id, DailySession.points_earned)
+    row = db.session.execute(stmt).one()
+    return row.id, int(row.points_earned or 0)
+
+
+def insert_completion(session_id: int, activity_id: int, points: int, completed_at: datetime):
+    """Id de la completion nueva, o None si ya existía (sesión + actividad)."""
+    stmt = upsert_insert(ActivityCompletion.__table__, db.engine.dialect.name).values(
+        daily_session_id=session_id,
+        activity_id=activity_id,
+        points_awarded=points,
+        completed_at=completed_at,
+    ).on_conflict_do_nothing(
+        index_elements=["daily_session_id", "activity_id"],
+    ).returning(ActivityCompletion.id)
+    return db.session.execute(stmt).scalar()
+
+
+def insert_completions(rows) -> set:
+    """
+    rows: [{daily_session_id, activity_id, points_awarded, completed_at}], sin
+    repetidos. Un solo INSERT; devuelve {(session_id, activity_id)} realmente insertados.
+    """
+    if not rows:
+        return set()
+    stmt = upsert_insert(ActivityCompletion.__table__, db.engine.dialect.name).values(
+        rows
+    ).on_conflict_do_nothing(
+        index_elements=["daily_session_id", "activity_id"],
+    ).returning(ActivityCompletion.daily_session_id, ActivityCompletion.activity_id)
+    return {(r.daily_session_id, r.activity_id) for r in db.session.execute(stmt)}
+
+
+def add_session_points(session_id: int, points: int) -> int:
+    """Suma atómica; devuelve el total resultante."""
+    return db.session.execute(
+        update(DailySession)
+        .where(DailySession.id == session_id)
+        .values(points_earned=DailySession.points_earned + points)
+        .returning(DailySession.points_earned)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
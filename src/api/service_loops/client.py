@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api.metrics import observe_loops_send
+
+DEFAULT_BASE_URL = "https://app.loops.so/api/v1"
+
+
+class LoopsError(Exception):
+    """Error de envío a Loops. retryable=False para 4xx definitivos (email inválido, id inexistente...)."""
+
+    def __init__(self, message: str, status_code: int | None = None, retryable: bool = True):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+
+
+class RateLimiter:
+    """Token bucket thread-safe: como mucho `rate` envíos/seg (ráfagas de hasta `burst`)."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class LoopsClient:
+    """
+    Cliente HTTP único para Loops: requests.Session con keep-alive, pool de
+    conexiones por proceso, config leída una sola vez y reintentos de urllib3
+    en 429/5xx (respetando Retry-After). Cada envío lleva un Idempotency-Key,
+    así un reintento nunca duplica el email. LOOPS_RATE_LIMIT (envíos/seg por
+    proceso, 0 = sin límite) se comparte entre todos los hilos que envían.
+    """
+
+    def __init__(self, api_key=None, base_url=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, pool_size=None, rate_limit=None):
+        self.api_key = api_key if api_key is not None else os.getenv("LOOPS_API_KEY")
+        self.base_url = (base_url or os.getenv("LOOPS_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = (
+            float(connect_timeout or os.getenv("LOOPS_CONNECT_TIMEOUT", "3.05")),
+            float(read_timeout or os.getenv("LOOPS_READ_TIMEOUT", "10")),
+        )
+        max_retries = int(max_retries if max_retries is not None else os.getenv("LOOPS_MAX_RETRIES", "2"))
+        pool_size = int(pool_size or os.getenv("LOOPS_POOL_SIZE", "10"))
+        self.rate_limiter = RateLimiter(float(
+            rate_limit if rate_limit is not None else os.getenv("LOOPS_RATE_LIMIT", "10")))
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry, pool_block=True)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        if self.api_key:
+            self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+
+        self.transactional_ids = {
+            "welcome": os.getenv("LOOPS_WELCOME_TRANSACTIONAL_ID"),
+            "verify_email": os.getenv("LOOPS_VERIFY_EMAIL_TRANSACTIONAL_ID"),
+            "password_reset": os.getenv("LOOPS_PASSWORD_RESET_TRANSACTIONAL_ID"),
+            "inactive_reminder": os.getenv("LOOPS_INACTIVE_NUDGE_TRANSACTIONAL_ID"),
+            "fixed_reminder": os.getenv("LOOPS_FIXED_REMINDER_TRANSACTIONAL_ID"),
+        }
+
+    def transactional_id(self, template: str, env_name: str) -> str:
+        value = self.transactional_ids.get(template)
+        if not value:
+            raise LoopsError(f"Falta {env_name} en el .env", retryable=False)
+        return value
+
+    def send_transactional(self, template: str, transactional_id: str, email: str,
+                           data_variables: dict, idempotency_key: str | None = None) -> dict:
+        """POST /transactional. `template` solo etiqueta métricas y errores."""
+        with observe_loops_send(template):
+            if not self.api_key:
+                raise LoopsError("Falta LOOPS_API_KEY en el .env", retryable=False)
+
+            payload = {
+                "transactionalId": transactional_id,
+                "email": email,
+                "dataVariables": data_variables,
+            }
+            headers = {"Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+
+            self.rate_limiter.acquire()
+            try:
+                r = self.session.post(f"{self.base_url}/transactional", json=payload,
+                                      headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                raise LoopsError(f"Loops {template} request failed: {e!r}") from e
+
+            if r.status_code >= 400:
+                retryable = r.status_code == 429 or r.status_code >= 500
+                # 409: Idempotency-Key ya usado -> el email ya salió
+                if r.status_code == 409:
+                    return {"success": True, "duplicate": True}
+                raise LoopsError(f"Loops {template} error {r.status_code}: {r.text}",
+                                 status_code=r.status_code, retryable=retryable)
+
+            try:
+                return r.json()
+            except ValueError:
+                return {}
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_loops_client() -> LoopsClient:
+    """Un cliente por proceso (se recrea tras fork: los sockets no se comparten entre workers)."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = LoopsClient()
+                _client_pid = pid
+    return _client
+
+
+def reset_loops_client():
+    """Descarta el cliente cacheado (p. ej. tras cambiar variables de entorno en tests/scripts)."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+        _client_pid = None
@@ -0,0 +1,21 @@
+from api.service_loops.client import get_loops_client
+
+
+def send_fixed_reminder(email: str, username: str, url_app: str, reminder_type: str,
+                        idempotency_key: str | None = None) -> None:
+    # una sola plantilla para todos los tipos: `reminder_type` elige el texto en Loops
+    client = get_loops_client()
+    transactional_id = client.transactional_id(
+        "fixed_reminder", "LOOPS_FIXED_REMINDER_TRANSACTIONAL_ID")
+
+    client.send_transactional(
+        "fixed_reminder",
+        transactional_id,
+        email,
+        {
+            "username": username,
+            "url_app": url_app,
+            "reminder_type": reminder_type,
+        },
+        idempotency_key=idempotency_key,
+    )
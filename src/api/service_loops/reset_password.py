@@ -1,29 +1,16 @@
-import os
-import requests
+from api.service_loops.client import get_loops_client, LoopsError
 
-def send_password_reset(email: str, reset_url: str) -> None:
-    loops_api_key = os.getenv("LOOPS_API_KEY")
-    LOOPS_PASSWORD_RESET_TRANSACTIONAL_ID = os.getenv("LOOPS_PASSWORD_RESET_TRANSACTIONAL_ID")
+def send_password_reset(email: str, reset_url: str, idempotency_key: str | None = None) -> dict:
+    client = get_loops_client()
+    transactional_id = client.transactional_id(
+        "password_reset", "LOOPS_PASSWORD_RESET_TRANSACTIONAL_ID")
 
-    if not loops_api_key:
-        raise RuntimeError("Falta LOOPS_API_KEY en el .env")
-    if not LOOPS_PASSWORD_RESET_TRANSACTIONAL_ID:
-        raise RuntimeError("Falta LOOPS_PASSWORD_RESET_TRANSACTIONAL_ID en el .env")
-
-    url = "https://app.loops.so/api/v1/transactional"
-    headers = {
-        "Authorization": f"Bearer {loops_api_key}",
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "transactionalId": LOOPS_PASSWORD_RESET_TRANSACTIONAL_ID,
-        "email": email,
-        "dataVariables": {
+    return client.send_transactional(
+        "password_reset",
+        transactional_id,
+        email,
+        {
             "reset": reset_url
-        }
-    }
-
-    r = requests.post(url, json=payload, headers=headers, timeout=15)
-    r.raise_for_status()
-    return r.json()
\ No newline at end of file
+        },
+        idempotency_key=idempotency_key,
+    )
@@ -0,0 +1,48 @@
+"""
+Expresiones SQL que cambian según el dialecto (Postgres en producción, SQLite en local).
+"""
+from sqlalchemy import DateTime
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class minutes_before(FunctionElement):
+    """
+    `ts - N minutos`, con N una columna/expresión entera:
+
+        minutes_before(now, Reminder.inactive_after_minutes)
+
+    Postgres: ts - (N * INTERVAL '1 minute')
+    SQLite:   datetime(ts, '-' || N || ' minutes')
+    """
+    type = DateTime()
+    name = "minutes_before"
+    inherit_cache = True
+
+
+@compiles(minutes_before)
+def _minutes_before_default(element, compiler, **kw):
+    ts, minutes = list(element.clauses)
+    return "(%s - (%s * INTERVAL '1 minute'))" % (
+        compiler.process(ts, **kw), compiler.process(minutes, **kw))
+
+
+@compiles(minutes_before, "sqlite")
+def _minutes_before_sqlite(element, compiler, **kw):
+    ts, minutes = list(element.clauses)
+    # mismo formato que SQLAlchemy usa al guardar DateTime en SQLite (comparable como texto)
+    return "strftime('%%Y-%%m-%%d %%H:%%M:%%f000', %s, '-' || (%s) || ' minutes')" % (
+        compiler.process(ts, **kw), compiler.process(minutes, **kw))
+
+
+def upsert_insert(table, dialect_name: str):
+    """
+    insert() del dialecto, con .on_conflict_do_nothing / .on_conflict_do_update
+    y .excluded (INSERT ... ON CONFLICT existe igual en Postgres y SQLite >= 3.24).
+    """
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"INSERT ... ON CONFLICT no soportado en {dialect_name}")
@@ -0,0 +1,151 @@
+"""
+SPA (dist/) servida desde un manifest armado al arrancar.
+
+Una sola pasada por dist/ al iniciar: por archivo, tamaño, mtime, sha256 y
+ETag, más sus hermanos .br / .gz (scripts/precompress.mjs). Los archivos
+chicos (STATIC_INLINE_MAX_BYTES, 512 KB) quedan en memoria. El request no
+toca el filesystem (ni isfile ni stat): lookup en el dict + Response.
+
+Cache-Control:
+  - assets con hash en el nombre (assets/index-BJ3x9aZq.js, los genera vite):
+    "public, max-age=31536000, immutable" (cambia el contenido -> cambia la URL)
+  - index.html y toda ruta del SPA que cae en él: "no-cache" (revalida con ETag)
+  - el resto (favicon, robots.txt...): STATIC_MAX_AGE segundos (1h)
+
+Un `npm run build` nuevo requiere reiniciar el proceso (el deploy ya lo hace);
+en debug el manifest se rearma en cada request.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from flask import request, abort
+from werkzeug.wsgi import wrap_file
+
+from api.compression import STATIC_ENCODINGS, accepts_encoding
+
+
+INLINE_MAX_BYTES = int(os.getenv("STATIC_INLINE_MAX_BYTES", str(512 * 1024)))
+MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+NO_CACHE = "no-cache"
+INDEX = "index.html"
+
+# vite: assets/[name]-[hash].[ext], hash de 8 caracteres base64url
+HASHED_NAME = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+
+
+@dataclass(slots=True, frozen=True)
+class StaticFile:
+    """Un archivo en disco: el original o un hermano .br / .gz."""
+    fs_path: str
+    size: int
+    etag: str
+    data: bytes | None  # None: muy grande, se lee al servir
+
+
+@dataclass(slots=True, frozen=True)
+class StaticAsset:
+    path: str
+    mimetype: str
+    last_modified: datetime
+    cache_control: str
+    # "identity" siempre; "br" / "gzip" si el build los generó
+    variants: dict = field(default_factory=dict)
+
+
+def _read(fs_path: str, size: int) -> StaticFile:
+    with open(fs_path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    return StaticFile(fs_path, size, digest, data if size <= INLINE_MAX_BYTES else None)
+
+
+def _cache_control(path: str) -> str:
+    if path == INDEX:
+        return NO_CACHE
+    if HASHED_NAME.match(path):
+        return IMMUTABLE
+    return f"public, max-age={MAX_AGE}"
+
+
+def build_manifest(directory: str) -> dict:
+    """path relativo (con /) -> StaticAsset. Directorio inexistente: manifest vacío."""
+    manifest = {}
+    suffixes = tuple(ext for _, ext in STATIC_ENCODINGS)
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(suffixes):
+                continue
+            fs_path = os.path.join(root, name)
+            path = os.path.relpath(fs_path, directory).replace(os.sep, "/")
+            st = os.stat(fs_path)
+            original = _read(fs_path, st.st_size)
+
+            variants = {"identity": original}
+            for encoding, ext in STATIC_ENCODINGS:
+                if os.path.isfile(fs_path + ext):
+                    sibling = _read(fs_path + ext, os.path.getsize(fs_path + ext))
+                    # ETag por representación: "hash-br" / "hash-gzip"
+                    variants[encoding] = StaticFile(sibling.fs_path, sibling.size,
+                                                    f"{original.etag}-{encoding}", sibling.data)
+
+            manifest[path] = StaticAsset(
+                path=path,
+                mimetype=mimetypes.guess_type(name)[0] or "application/octet-stream",
+                last_modified=datetime.fromtimestamp(int(st.st_mtime), timezone.utc),
+                cache_control=_cache_control(path),
+                variants=variants,
+            )
+    return manifest
+
+
+class StaticSite:
+    def __init__(self, app, directory: str):
+        self.app = app
+        self.directory = directory
+        self.manifest = build_manifest(directory)
+
+    def _pick(self, asset: StaticAsset):
+        for encoding, _ in STATIC_ENCODINGS:
+            if encoding in asset.variants and accepts_encoding(encoding):
+                return encoding, asset.variants[encoding]
+        return None, asset.variants["identity"]
+
+    def serve(self, path: str):
+        """Asset por path; rutas desconocidas del SPA -> index.html."""
+        if self.app.debug:
+            self.manifest = build_manifest(self.directory)
+
+        asset = self.manifest.get(path) or self.manifest.get(INDEX)
+        if asset is None:
+            abort(404)
+
+        encoding, file = self._pick(asset)
+        if file.data is not None:
+            response = self.app.response_class(file.data, mimetype=asset.mimetype)
+        else:
+            response = self.app.response_class(
+                wrap_file(request.environ, open(file.fs_path, "rb")),
+                mimetype=asset.mimetype, direct_passthrough=True)
+            response.content_length = file.size
+
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        if len(asset.variants) > 1:
+            response.vary.add("Accept-Encoding")
+        response.set_etag(file.etag)
+        response.last_modified = asset.last_modified
+        response.headers["Cache-Control"] = asset.cache_control
+        # 304 con If-None-Match / If-Modified-Since; Range solo con el body en memoria
+        return response.make_conditional(request, accept_ranges=file.data is not None,
+                                         complete_length=file.size)
+
+
+def setup_static(app, directory: str) -> StaticSite:
+    site = StaticSite(app, directory)
+    app.extensions["static_site"] = site
+    return site
@@ -0,0 +1,68 @@
+"""
+"Hoy" y fase (día/noche) del usuario, en su zona y con sus horarios.
+
+El día del usuario empieza en day_start_time (06:00 por defecto), no a
+medianoche: una actividad a las 01:00 locales cuenta para la noche del día
+anterior. Fase: day entre day_start_time y night_start_time, night el resto.
+
+Todas las rutas que escriben o leen por fecha (sessions, complete_activity,
+emotion check-in, mirror) usan este resolver. DailySession.session_date ya
+queda guardada como día local, así que el mirror agrupa por día del usuario
+sin convertir zonas fila por fila. /sessions y complete_activity (y el
+batch, con client_ts) toman la fase de acá cuando el cliente no manda
+session_type; si lo manda, ese manda (vista con fase forzada, actividad de
+noche del catálogo) y solo el día sale del resolver.
+
+Las filas anteriores a este cambio quedan con su fecha UTC: no se migran.
+"""
+from datetime import datetime, timedelta, timezone, time, tzinfo
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from api.models import SessionType
+
+
+DEFAULT_DAY_START = time(6, 0)
+DEFAULT_NIGHT_START = time(19, 0)
+
+
+@lru_cache(maxsize=512)
+def get_zone(tz_name: str | None) -> tzinfo:
+    """ZoneInfo cacheado por nombre; UTC si el nombre no es una zona IANA válida."""
+    try:
+        return ZoneInfo(tz_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def resolve_local_day(tz_name: str | None, day_start: time | None = None,
+                      night_start: time | None = None, now: datetime | None = None):
+    """(fecha local del "día" del usuario, SessionType de la fase actual)."""
+    day_start = day_start or DEFAULT_DAY_START
+    night_start = night_start or DEFAULT_NIGHT_START
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+
+    local = now.astimezone(get_zone(tz_name))
+    clock = local.time().replace(tzinfo=None)
+
+    day = local.date()
+    if clock < day_start:
+        day -= timedelta(days=1)
+
+    if day_start <= night_start:
+        is_day = day_start <= clock < night_start
+    else:
+        # horario raro (noche antes que día): el tramo "day" cruza medianoche
+        is_day = clock >= day_start or clock < night_start
+    return day, SessionType.day if is_day else SessionType.night
+
+
+def user_local_day(user, now: datetime | None = None):
+    """`user`: User o cualquier fila con timezone / day_start_time / night_start_time."""
+    return resolve_local_day(user.timezone, user.day_start_time, user.night_start_time, now)
+
+
+def user_today(user, now: datetime | None = None):
+    return user_local_day(user, now)[0]
@@ -2,7 +2,7 @@
 This module takes care of starting the API Server, Loading the DB and Adding the endpoints
 """
 import os
-from flask import Flask, request, jsonify, url_for, send_from_directory
+from flask import Flask, request, jsonify, url_for
 from flask_migrate import Migrate
 from flask_swagger import swagger
 from api.utils import APIException, generate_sitemap
@@ -11,6 +11,13 @@ import api.models
 from api.routes import api
 from api.admin import setup_admin
 from api.commands import setup_commands
+from api.instrumentation import setup_instrumentation
+from api.metrics import setup_metrics, TimedQueuePool
+from api.profiling import setup_profiling
+from api.outbox import setup_outbox
+from api.json_provider import setup_json
+from api.compression import setup_compression
+from api.static_files import setup_static
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 
@@ -43,14 +50,40 @@ else:
 
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Pool que mide la espera de checkout (métrica db_pool_checkout_wait_seconds)
+if ":memory:" not in app.config["SQLALCHEMY_DATABASE_URI"]:
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"poolclass": TimedQueuePool}
+
 MIGRATE = Migrate(app, db, compare_type=True)
 db.init_app(app)
 
 
+# JSON: orjson si está instalado (fechas/enums de los modelos se formatean al codificar)
+setup_json(app)
+
+# gzip / brotli de respuestas grandes; primero, así su after_request corre último
+setup_compression(app)
+
 # Admin + commands
 setup_admin(app)
 setup_commands(app)
 
+# Queries por request (Server-Timing + presupuesto en debug)
+setup_instrumentation(app)
+
+# Prometheus: GET /metrics
+setup_metrics(app)
+
+# cProfile por request (X-Profile + X-Internal-Token)
+setup_profiling(app)
+
+# Outbox de emails: hilo de envío opcional (EMAIL_OUTBOX_WORKER=thread)
+setup_outbox(app)
+
+
+# SPA: manifest de dist/ armado una vez al arrancar
+static_site = setup_static(app, static_file_dir)
+
 
 # Register API blueprint
 app.register_blueprint(api, url_prefix="/api")
@@ -67,17 +100,14 @@ def handle_invalid_usage(error):
 def sitemap():
     if ENV == "development":
         return generate_sitemap(app)
-    return send_from_directory(static_file_dir, "index.html")
+    return static_site.serve("index.html")
 
 
 # Serve SPA
 @app.route("/<path:path>", methods=["GET"])
 def serve_any_other_file(path):
-    if not os.path.isfile(os.path.join(static_file_dir, path)):
-        path = "index.html"
-    response = send_from_directory(static_file_dir, path)
-    response.cache_control.max_age = 0
-    return response
+    # sin stat: lookup en el manifest; rutas del SPA -> index.html (no-cache)
+    return static_site.serve(path)
 
 
 if __name__ == "__main__":
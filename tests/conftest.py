@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# src/ como en gunicorn (--chdir ./src/) y `flask` (FLASK_APP=src/app.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+_db_dir = tempfile.mkdtemp(prefix="place-between-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.setdefault("FLASK_APP_KEY", "place-between-tests-secret-key-0123456789")
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as flask_app
+    from api.models import db
+
+    flask_app.config.update(TESTING=True)
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Crea un usuario verificado y devuelve (user_id, headers con JWT)."""
+    from uuid import uuid4
+    from flask_jwt_extended import create_access_token
+    from api.models import db, User
+
+    def _make(**fields):
+        suffix = uuid4().hex[:10]
+        with app.app_context():
+            user = User(**{"email": f"test_{suffix}@test.com", "username": f"test_{suffix}",
+                           "is_email_verified": True, **fields})
+            user.set_password(suffix)
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=str(user.id))
+            return user.id, {"Authorization": f"Bearer {token}"}
+    return _make
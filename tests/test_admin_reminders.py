@@ -0,0 +1,38 @@
+from api.models import db, Reminder
+
+
+def test_admin_edits_days_and_reschedules(app, client, make_user):
+    user_id, headers = make_user()
+    reminder_id = client.post("/api/reminders", headers=headers, json={
+        "reminder_type": "activity_daily", "mode": "fixed", "local_time": "09:00",
+        "days_of_week": "mon,wed",
+    }).get_json()["reminder"]["id"]
+
+    listing = client.get("/admin/reminder/")
+    assert listing.status_code == 200
+    assert "mon,wed" in listing.text
+
+    resp = client.post(f"/admin/reminder/edit/?id={reminder_id}", data={
+        "user": str(user_id), "reminder_type": "activity_daily", "mode": "fixed",
+        "local_time": "07:15", "days": ["tue", "sat"], "is_active": "y",
+    })
+    assert resp.status_code == 302
+
+    with app.app_context():
+        r = db.session.get(Reminder, reminder_id)
+        assert r.days_of_week == "tue,sat"
+        assert r.next_due_at is not None and r.next_due_at.weekday() in (1, 5)
+
+
+def test_admin_rejects_reminder_without_days(client, make_user):
+    user_id, headers = make_user()
+    reminder_id = client.post("/api/reminders", headers=headers, json={
+        "reminder_type": "activity_daily", "mode": "fixed", "local_time": "09:00",
+    }).get_json()["reminder"]["id"]
+
+    resp = client.post(f"/admin/reminder/edit/?id={reminder_id}", data={
+        "user": str(user_id), "reminder_type": "activity_daily", "mode": "fixed",
+        "local_time": "09:00", "is_active": "y",
+    })
+    assert resp.status_code == 200  # el form vuelve con el error
+    assert client.get("/api/reminders", headers=headers).get_json()[0]["days_of_week"] == "daily"
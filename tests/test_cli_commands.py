@@ -0,0 +1,14 @@
+import pytest
+
+
+# Workers / crons del Procfile y render.yaml: si un comando no queda
+# registrado en setup_commands, `flask <comando>` falla al arrancar.
+@pytest.mark.parametrize("command", [
+    "drain-email-outbox",
+    "loops-stub",
+    "send-reminders",
+    "send-fixed-reminders",
+    "purge-idempotency-keys",
+])
+def test_command_is_registered(app, command):
+    assert command in app.cli.commands
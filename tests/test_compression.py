@@ -0,0 +1,29 @@
+import gzip
+
+from test_query_budget import _seed_history
+
+
+def test_compressed_response_and_304_share_the_etag(app, client, make_user):
+    user_id, headers = make_user()
+    with app.app_context():
+        _seed_history(user_id, 30)
+
+    plain = client.get("/api/mirror/month", headers=headers)
+    compressed = client.get("/api/mirror/month", headers={**headers, "Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.data) == plain.data
+
+    etag = compressed.headers["ETag"]
+    assert etag.startswith('W/"') and plain.headers["ETag"] == etag
+
+    not_modified = client.get("/api/mirror/month", headers={
+        **headers, "Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+
+def test_small_responses_are_not_compressed(client):
+    resp = client.get("/api/emotions", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert "Content-Encoding" not in resp.headers
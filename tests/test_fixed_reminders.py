@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from api import fixed_reminders
+from api.models import db, Reminder
+
+
+def test_created_fixed_reminder_is_scheduled_and_sent(app, client, make_user, monkeypatch):
+    user_id, headers = make_user(timezone="America/New_York")
+
+    resp = client.post("/api/reminders", headers=headers, json={
+        "reminder_type": "activity_daily",
+        "mode": "fixed",
+        "local_time": "09:00",
+        "days_of_week": "mon,wed",
+    })
+    assert resp.status_code == 201, resp.get_json()
+    reminder_id = resp.get_json()["reminder"]["id"]
+
+    with app.app_context():
+        due = db.session.get(Reminder, reminder_id).next_due_at
+        assert due is not None
+        # 09:00 en Nueva York = 13:00 o 14:00 UTC según DST, lunes o miércoles
+        assert due.hour in (13, 14) and due.weekday() in (0, 2)
+
+        sent = []
+        monkeypatch.setattr(fixed_reminders, "send_fixed_reminder",
+                            lambda **kwargs: sent.append(kwargs))
+        stats = fixed_reminders.tick_fixed_reminders(now=due + timedelta(minutes=1))
+        assert stats["sent"] == 1 and len(sent) == 1
+
+        r = db.session.get(Reminder, reminder_id)
+        db.session.refresh(r)
+        assert r.next_due_at > due
+
+
+def test_disabled_reminder_is_unscheduled(client, make_user):
+    _, headers = make_user()
+    resp = client.post("/api/reminders", headers=headers, json={
+        "reminder_type": "activity_daily", "mode": "fixed", "local_time": "21:30",
+    })
+    reminder_id = resp.get_json()["reminder"]["id"]
+
+    resp = client.delete(f"/api/reminders/{reminder_id}", headers=headers)
+    assert resp.status_code == 200
+    assert client.get("/api/reminders", headers=headers).get_json()[0]["next_due_at"] is None
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+from api.idempotency import purge_expired_idempotency_keys
+from api.models import db, Goal, GoalProgress, IdempotencyKey
+
+
+def _add_progress(client, headers, goal_id, key, delta=1):
+    return client.post(f"/api/goals/{goal_id}/progress", json={"delta_value": delta},
+                       headers={**headers, "Idempotency-Key": key})
+
+
+def _create_goal(client, headers):
+    return client.post("/api/goals", headers=headers,
+                       json={"title": "leer", "target_value": 10, "size": "small"}).get_json()
+
+
+def test_replay_applies_the_write_once(app, client, make_user):
+    _, headers = make_user()
+    goal = _create_goal(client, headers)
+
+    first = _add_progress(client, headers, goal["id"], "k-once")
+    assert first.status_code == 201
+    replay = _add_progress(client, headers, goal["id"], "k-once")
+    assert replay.status_code == 201
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+    assert replay.get_json() == first.get_json()
+
+    with app.app_context():
+        assert db.session.get(Goal, goal["id"]).current_value == 1
+        assert GoalProgress.query.filter_by(goal_id=goal["id"]).count() == 1
+
+
+def test_same_key_with_another_body_is_rejected(app, client, make_user):
+    _, headers = make_user()
+    goal = _create_goal(client, headers)
+
+    assert _add_progress(client, headers, goal["id"], "k-body").status_code == 201
+    res = _add_progress(client, headers, goal["id"], "k-body", delta=5)
+    assert res.status_code == 422
+    assert "Idempotent-Replayed" not in res.headers
+
+    with app.app_context():
+        assert db.session.get(Goal, goal["id"]).current_value == 1
+
+
+def test_expired_keys_are_purged(app, client, make_user):
+    user_id, headers = make_user()
+    goal = _create_goal(client, headers)
+
+    first = _add_progress(client, headers, goal["id"], "k-1")
+    assert first.status_code in (200, 201)
+    replay = _add_progress(client, headers, goal["id"], "k-1")
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+
+    with app.app_context():
+        assert purge_expired_idempotency_keys() == 0
+        purged = purge_expired_idempotency_keys(now=datetime.utcnow() + timedelta(days=2))
+        assert purged >= 1
+        assert IdempotencyKey.query.filter_by(user_id=user_id).count() == 0
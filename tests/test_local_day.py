@@ -0,0 +1,101 @@
+"""
+complete_activity y /sessions fechan la sesión con el día local del usuario
+(zona, day_start_time); la fase es la que manda el cliente y, si no manda
+ninguna, la del resolver (night_start_time).
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+from api import routes
+from api.models import db, Activity, ActivityCategory, DailySession, SessionType
+from api.user_time import get_zone, resolve_local_day
+
+TZ = "America/New_York"
+# 23:30 en Nueva York: noche del 9 de marzo
+LATE_NIGHT = datetime(2026, 3, 10, 3, 30, tzinfo=timezone.utc)
+
+
+def _activity(external_id):
+    cat = ActivityCategory(name=f"cat-{external_id}")
+    db.session.add(cat)
+    db.session.flush()
+    db.session.add(Activity(external_id=external_id, name=external_id, category_id=cat.id))
+    db.session.commit()
+
+
+def _session(app, session_id):
+    with app.app_context():
+        s = db.session.get(DailySession, session_id)
+        return s.session_date, s.session_type
+
+
+@pytest.fixture
+def late_night(monkeypatch):
+    real = routes.user_local_day
+    monkeypatch.setattr(routes, "user_local_day", lambda user, now=None: real(user, now or LATE_NIGHT))
+
+
+def test_resolver_phase_and_day_boundary():
+    # 01:00 locales cuenta para la noche del día anterior
+    day, phase = resolve_local_day(TZ, now=datetime(2026, 3, 10, 5, 0, tzinfo=timezone.utc))
+    assert (day, phase) == (date(2026, 3, 9), SessionType.night)
+    day, phase = resolve_local_day(TZ, time(6), time(19), datetime(2026, 3, 10, 16, 0, tzinfo=timezone.utc))
+    assert (day, phase) == (date(2026, 3, 10), SessionType.day)
+
+
+@pytest.mark.parametrize("sent, expected", [
+    (None, SessionType.night),  # sin fase: la del reloj del usuario
+    ("day", SessionType.day),   # fase forzada (?phase=) o actividad del catálogo
+])
+def test_complete_phase(app, client, make_user, late_night, sent, expected):
+    _, headers = make_user(timezone=TZ)
+    external_id = f"local-day-{sent}"
+    with app.app_context():
+        _activity(external_id)
+
+    body = {"external_id": external_id}
+    if sent:
+        body["session_type"] = sent
+    res = client.post("/api/activities/complete", headers=headers, json=body)
+    assert res.status_code == 201
+    assert _session(app, res.get_json()["session_id"]) == (date(2026, 3, 9), expected)
+
+
+def test_complete_rejects_unknown_phase(client, make_user):
+    _, headers = make_user(timezone=TZ)
+    res = client.post("/api/activities/complete", headers=headers,
+                      json={"external_id": "x", "session_type": "tarde"})
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize("sent, expected", [(None, "night"), ("day", "day")])
+def test_sessions_phase(client, make_user, late_night, sent, expected):
+    _, headers = make_user(timezone=TZ)
+    res = client.post("/api/sessions", headers=headers,
+                      json={"session_type": sent} if sent else {})
+    assert res.status_code in (200, 201)
+    session = res.get_json()
+    assert (session["session_date"], session["session_type"]) == ("2026-03-09", expected)
+
+
+def test_batch_day_follows_client_ts(app, client, make_user):
+    _, headers = make_user(timezone=TZ)
+    with app.app_context():
+        _activity("local-day-a")
+        _activity("local-day-b")
+
+    zone = get_zone(TZ)
+    yesterday = datetime.now(zone).date() - timedelta(days=1)
+    at_1am = datetime.combine(yesterday, time(1, 0), zone)
+    at_8pm = datetime.combine(yesterday, time(20, 0), zone)
+    res = client.post("/api/activities/complete/batch", headers=headers, json={"items": [
+        {"external_id": "local-day-a", "session_type": "day", "client_ts": at_1am.isoformat()},
+        {"external_id": "local-day-b", "client_ts": at_8pm.isoformat()},
+    ]})
+    assert res.status_code in (200, 201, 207), res.get_json()
+    first, second = res.get_json()["results"]
+    # 01:00 es del día anterior; la fase explícita se respeta
+    assert _session(app, first["session_id"]) == (yesterday - timedelta(days=1), SessionType.day)
+    # sin session_type: fase según la hora local del client_ts
+    assert _session(app, second["session_id"]) == (yesterday, SessionType.night)
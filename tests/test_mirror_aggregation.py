@@ -0,0 +1,5 @@
+def test_mirror_modes_match_original_implementation(app):
+    # verify-mirror-aggregation falla (exit != 0) si algún body difiere del original
+    result = app.test_cli_runner().invoke(args=["verify-mirror-aggregation", "--days", "45"])
+    assert result.exit_code == 0, result.output
+    assert "All mirror payloads match" in result.output
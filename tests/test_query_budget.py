@@ -0,0 +1,78 @@
+"""
+Las vistas del mirror hacen un número fijo de queries, sin importar cuánta
+historia tenga el usuario (Server-Timing: db;desc="N queries").
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.mirror import rebuild_user_daily_stats
+from api.models import (
+    db, User, DailySession, SessionType, Activity, ActivityCategory, ActivityCompletion,
+    Emotion, EmotionCheckin,
+)
+from api.user_time import user_today
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def _catalog():
+    activities = Activity.query.all()
+    if not activities:
+        cat = ActivityCategory(name="budget")
+        db.session.add(cat)
+        db.session.flush()
+        activities = [Activity(external_id=f"budget-{i}", name=f"Activity {i}",
+                               category_id=cat.id) for i in range(4)]
+        db.session.add_all(activities)
+    emotions = Emotion.query.all()
+    if not emotions:
+        emotions = [Emotion(name=f"budget-{i}") for i in range(2)]
+        db.session.add_all(emotions)
+    db.session.flush()
+    return activities, emotions
+
+
+def _seed_history(user_id: int, days: int):
+    """Sesión day + night por día (hoy incluido), con completions y check-ins."""
+    activities, emotions = _catalog()
+    today = user_today(db.session.get(User, user_id))
+    for back in range(days):
+        d = today - timedelta(days=back)
+        for stype in (SessionType.day, SessionType.night):
+            session = DailySession(user_id=user_id, session_date=d, session_type=stype,
+                                   points_earned=0)
+            db.session.add(session)
+            db.session.flush()
+            for i, activity in enumerate(activities[:3]):
+                db.session.add(ActivityCompletion(
+                    daily_session_id=session.id, activity_id=activity.id,
+                    points_awarded=[20, 10, 5][i],
+                    completed_at=datetime(d.year, d.month, d.day, 9 + i)))
+            session.points_earned = 35
+            if stype == SessionType.night:
+                db.session.add(EmotionCheckin(
+                    daily_session_id=session.id, emotion_id=emotions[back % 2].id,
+                    intensity=5, created_at=datetime(d.year, d.month, d.day, 21)))
+    rebuild_user_daily_stats(user_id)
+    db.session.commit()
+
+
+def _query_count(response) -> int:
+    return int(QUERIES.search(response.headers["Server-Timing"]).group(1))
+
+
+@pytest.mark.parametrize("days", [1, 7, 30, 90])
+@pytest.mark.parametrize("path, budget", [
+    ("/api/mirror/today", 5),
+    ("/api/mirror/month", 2),
+])
+def test_mirror_query_count_does_not_grow_with_history(app, client, make_user, days, path, budget):
+    user_id, headers = make_user()
+    with app.app_context():
+        _seed_history(user_id, days)
+
+    resp = client.get(path, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    assert _query_count(resp) <= budget
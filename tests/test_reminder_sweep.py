@@ -0,0 +1,48 @@
+"""En modo debug el sweep dice por qué se saltó cada reminder, además de los enviados."""
+from datetime import datetime, timedelta
+
+from api import reminders
+from api.models import db, User, DailySession, Reminder, ReminderType, ReminderMode, SessionType
+
+
+def _inactive_reminder(user_id, **fields):
+    r = Reminder(user_id=user_id, reminder_type=ReminderType.inactive_nudge,
+                 mode=ReminderMode.inactivity, inactive_after_minutes=1440, **fields)
+    db.session.add(r)
+    db.session.flush()
+    return r.id
+
+
+def test_debug_payload_lists_skip_reasons(app, make_user, monkeypatch):
+    now = datetime.utcnow()
+    sent_to = []
+    monkeypatch.setattr(reminders, "send_inactive_reminder",
+                        lambda **kw: sent_to.append(kw["email"]))
+
+    unverified, _ = make_user(is_email_verified=False)
+    recent, _ = make_user(last_activity_at=now - timedelta(minutes=30))
+    already, _ = make_user(last_activity_at=now - timedelta(days=2))
+    due, _ = make_user(last_activity_at=now - timedelta(days=2))
+
+    with app.app_context():
+        for user_id in (recent, already, due):
+            db.session.add(DailySession(user_id=user_id, session_date=now.date(),
+                                        session_type=SessionType.day, points_earned=0))
+        ids = {
+            "email_not_verified": _inactive_reminder(unverified),
+            "below_threshold": _inactive_reminder(recent),
+            "sent_recently": _inactive_reminder(already, last_sent_at=now - timedelta(minutes=10)),
+            "user_not_found": _inactive_reminder(10_000_000),
+            "sent": _inactive_reminder(due),
+        }
+        db.session.commit()
+
+        payload = reminders.sweep_inactive_reminders(now, debug=True, concurrency=1)
+        rows = {row["reminder_id"]: row for row in payload["debug"]}
+        due_email = db.session.get(User, due).email
+
+    for reason in ("email_not_verified", "below_threshold", "sent_recently", "user_not_found"):
+        assert rows[ids[reason]]["reason"] == reason
+    assert rows[ids["below_threshold"]]["threshold"] == 1440
+    assert rows[ids["sent"]]["stage"] == 1
+    assert due_email in sent_to
@@ -0,0 +1,61 @@
+"""Doble tap sin Idempotency-Key: la completion puntúa una sola vez."""
+from api.models import db, Activity, ActivityCategory, ActivityCompletion, DailySession
+
+
+def test_repeated_completion_awards_points_once(app, client, make_user):
+    user_id, headers = make_user()
+    with app.app_context():
+        cat = ActivityCategory(name="scoring")
+        db.session.add(cat)
+        db.session.flush()
+        activity = Activity(external_id="scoring-tap", name="tap", category_id=cat.id)
+        db.session.add(activity)
+        db.session.commit()
+        activity_id = activity.id
+
+    body = {"external_id": "scoring-tap", "session_type": "day", "is_recommended": True}
+    responses = [client.post("/api/activities/complete", headers=headers, json=body)
+                 for _ in range(8)]
+
+    first, repeats = responses[0], responses[1:]
+    assert first.status_code == 201
+    points = first.get_json()["points_awarded"]
+    assert points > 0
+    for res in repeats:
+        assert res.status_code == 200
+        assert res.get_json()["already_completed"] is True
+        assert res.get_json()["points_awarded"] == 0
+        assert res.get_json()["points_total"] == points
+
+    with app.app_context():
+        session = DailySession.query.filter_by(user_id=user_id).one()
+        assert session.points_earned == points
+        assert ActivityCompletion.query.filter_by(
+            daily_session_id=session.id, activity_id=activity_id).count() == 1
+
+
+def test_concurrent_taps_award_points_once(app, make_user):
+    from concurrent.futures import ThreadPoolExecutor
+
+    user_id, headers = make_user()
+    with app.app_context():
+        cat = ActivityCategory(name="scoring-concurrent")
+        db.session.add(cat)
+        db.session.flush()
+        db.session.add(Activity(external_id="scoring-race", name="race", category_id=cat.id))
+        db.session.commit()
+
+    body = {"external_id": "scoring-race", "session_type": "night"}
+
+    def tap(_):
+        return app.test_client().post("/api/activities/complete", headers=headers, json=body)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(tap, range(8)))
+
+    assert sorted(r.status_code for r in responses) == [200] * 7 + [201]
+    points = sum(r.get_json()["points_awarded"] for r in responses)
+    with app.app_context():
+        session = DailySession.query.filter_by(user_id=user_id).one()
+        assert session.points_earned == points
+        assert ActivityCompletion.query.filter_by(daily_session_id=session.id).count() == 1
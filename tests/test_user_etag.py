@@ -0,0 +1,26 @@
+from api.models import db, User
+
+
+def test_login_invalidates_the_user_etag(app, client, make_user):
+    user_id, headers = make_user()
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        user.set_password("secreto-123")
+        db.session.commit()
+        email = user.email
+
+    def login():
+        res = client.post("/api/login", json={"email": email, "password": "secreto-123"})
+        assert res.status_code == 200
+
+    login()
+    first = client.get("/api/users/user", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/api/users/user", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # un login nuevo cambia la fila: nada de 304 con el ETag anterior
+    login()
+    after = client.get("/api/users/user", headers={**headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag